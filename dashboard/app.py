@@ -5,6 +5,7 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 import os
+import sys
 
 st.set_page_config(
     page_title="Climate & Health Analytics",
@@ -409,118 +410,95 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROCESSED_DATA_DIR = os.path.join(BASE_DIR, 'data', 'processed')
 RESULTS_DIR = os.path.join(BASE_DIR, 'results')
 
+sys.path.append(BASE_DIR)
+from scripts.utils.countries import continents
+from scripts.utils.cube import AggregateCube
+from scripts.utils.explain import load_explanations
+from scripts.utils.downsampling import bin2d, downsample_groups
+from scripts.utils.figure_cache import FigureCache, filter_key
+from scripts.utils.model_registry import IncompatibleModelError, ModelRegistry
+from scripts.utils.response_surface import ResponseSurface
+from scripts.utils.storage import read_table
+
 @st.cache_data
 def load_data():
-    df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'integrated_data_1990_2019.csv'))
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR, memory_map=True)
     corr_df = pd.read_csv(os.path.join(RESULTS_DIR, 'climate_mortality_correlations.csv'))
     
-    continent_mapping = {
-        'Germany': 'Europe', 'United Kingdom': 'Europe', 'France': 'Europe', 'Italy': 'Europe',
-        'Spain': 'Europe', 'Poland': 'Europe', 'Netherlands': 'Europe', 'Belgium': 'Europe',
-        'Greece': 'Europe', 'Portugal': 'Europe',
-        'China': 'Asia', 'India': 'Asia', 'Japan': 'Asia', 'Indonesia': 'Asia',
-        'Pakistan': 'Asia', 'Bangladesh': 'Asia', 'Russia': 'Asia', 'Turkey': 'Asia',
-        'Iran': 'Asia', 'Thailand': 'Asia',
-        'United States': 'Americas', 'Brazil': 'Americas', 'Mexico': 'Americas', 'Canada': 'Americas',
-        'Argentina': 'Americas', 'Colombia': 'Americas', 'Peru': 'Americas', 'Venezuela': 'Americas',
-        'Chile': 'Americas', 'Ecuador': 'Americas',
-        'Nigeria': 'Africa', 'Ethiopia': 'Africa', 'Egypt': 'Africa', 'South Africa': 'Africa',
-        'Tanzania': 'Africa', 'Kenya': 'Africa', 'Algeria': 'Africa', 'Sudan': 'Africa',
-        'Uganda': 'Africa',
-        'Australia': 'Oceania', 'Papua New Guinea': 'Oceania', 'New Zealand': 'Oceania',
-        'Fiji': 'Oceania', 'Solomon Islands': 'Oceania', 'Samoa': 'Oceania',
-        'Vanuatu': 'Oceania', 'Kiribati': 'Oceania', 'Tonga': 'Oceania', 'Micronesia': 'Oceania'
-    }
-    df['Continent'] = df['Country/Territory'].map(continent_mapping)
+    df['Continent'] = continents(df['Country/Territory'])
     
     return df, corr_df
 
-df, corr_df = load_data()
+@st.cache_resource
+def load_cube():
+    df, _ = load_data()
+    return AggregateCube.from_frame(df)
 
-# Hero Section
-st.markdown('''
-<div class="hero-section">
-    <h1 class="main-title">Climate & Health Analytics Platform</h1>
-    <p class="subtitle">Comprehensive analysis of climate-mortality relationships across 49 countries (1990-2019)</p>
-</div>
-''', unsafe_allow_html=True)
+df, corr_df = load_data()
+cube = load_cube()
 
-st.markdown("---")
+DEFAULT_COUNTRIES = ['United States', 'Germany', 'Italy', 'Japan', 'United Kingdom']
+CLIMATE_TREND_VARIABLES = ['Temperature_C', 'Precipitation_mm', 'Surface_Pressure_Pa', 'Wind_Speed_ms']
+RATE_COLS = [col for col in df.columns if col.endswith('_Rate_per_100k')]
+CORRELATION_TYPES = ["Strongest (Absolute)", "Positive", "Negative"]
 
-st.sidebar.header("Filters")
+# Large-data mode: above LARGE_DATA_POINTS points charts render with WebGL and
+# lines are reduced to LINE_MAX_POINTS per series (LTTB); scatters above
+# BINNED_SCATTER_POINTS are aggregated server side into a 2-D raster
+LARGE_DATA_POINTS = int(os.environ.get('DASHBOARD_LARGE_DATA_POINTS', 5000))
+LINE_MAX_POINTS = int(os.environ.get('DASHBOARD_LINE_MAX_POINTS', 1000))
+BINNED_SCATTER_POINTS = int(os.environ.get('DASHBOARD_BINNED_SCATTER_POINTS', 100000))
 
-selected_countries = st.sidebar.multiselect(
-    "Select Countries",
-    options=sorted(df['Country/Territory'].unique()),
-    default=['United States', 'Germany', 'Italy', 'Japan', 'United Kingdom']
+DARK_LAYOUT = dict(
+    template='plotly_dark',
+    paper_bgcolor='#0e1117',
+    plot_bgcolor='#1e293b',
+    font=dict(color='#ffffff', size=12),
+    title_font=dict(color='#ffffff', size=16),
+    xaxis=dict(gridcolor='#334155', color='#ffffff'),
+    yaxis=dict(gridcolor='#334155', color='#ffffff'),
+    legend=dict(font=dict(color='#ffffff'))
 )
 
-year_range = st.sidebar.slider(
-    "Year Range",
-    min_value=int(df['Year'].min()),
-    max_value=int(df['Year'].max()),
-    value=(1990, 2019)
-)
-
-filtered_df = df[
-    (df['Country/Territory'].isin(selected_countries)) &
-    (df['Year'] >= year_range[0]) &
-    (df['Year'] <= year_range[1])
-]
+def themed(fig, **layout):
+    # Shared dark theme; keyword arguments replace whole entries (e.g. xaxis)
+    fig.update_layout(**{**DARK_LAYOUT, **layout})
+    return fig
 
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Overview", "Climate Trends", "Mortality Analysis", "Correlations", "Predictions 2020-2030", "ML Model Analysis"])
+def line_data(data, y, by):
+    # (data, px render_mode) for a long line chart, reduced in large-data mode
+    if len(data) <= LARGE_DATA_POINTS:
+        return data, 'auto'
+    return downsample_groups(data, 'Year', y, by, LINE_MAX_POINTS), 'webgl'
 
-with tab1:
-    st.header("Dataset Overview")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Countries", df['Country/Territory'].nunique())
-    with col2:
-        st.metric("Years", f"{df['Year'].min()}-{df['Year'].max()}")
-    with col3:
-        st.metric("Total Records", len(df))
-    with col4:
-        st.metric("Variables", len(df.columns))
-    
-    st.subheader("Sample Data")
-    st.dataframe(filtered_df.head(10))
-
-with tab2:
-    st.header("Climate Trends")
-    
-    climate_var = st.selectbox(
-        "Select Climate Variable",
-        ['Temperature_C', 'Precipitation_mm', 'Surface_Pressure_Pa', 'Wind_Speed_ms']
-    )
-    
-    # Aggregate data to ensure one value per country-year
-    climate_plot_data = filtered_df.groupby(['Country/Territory', 'Year'])[climate_var].mean().reset_index()
-    
+def climate_trend_figure(countries, year_start, year_end, climate_var):
+    data, render_mode = line_data(cube.series(countries, year_start, year_end, climate_var), climate_var,
+                                  'Country/Territory')
     fig = px.line(
-        climate_plot_data,
+        data,
         x='Year',
         y=climate_var,
         color='Country/Territory',
-        title=f'{climate_var} Evolution Over Time'
+        title=f'{climate_var} Evolution Over Time',
+        render_mode=render_mode
     )
-    fig.update_layout(
-        template='plotly_dark',
-        paper_bgcolor='#0e1117',
-        plot_bgcolor='#1e293b',
-        font=dict(color='#ffffff', size=12),
-        title_font=dict(color='#ffffff', size=16),
-        height=500,
-        xaxis=dict(gridcolor='#334155', color='#ffffff'),
-        yaxis=dict(gridcolor='#334155', color='#ffffff'),
-        legend=dict(font=dict(color='#ffffff'))
+    return themed(fig, height=500)
+
+def continent_trend_figure(year_start, year_end, climate_var):
+    data, render_mode = line_data(cube.group_series(year_start, year_end, climate_var), climate_var, 'Continent')
+    fig = px.line(
+        data,
+        x='Year',
+        y=climate_var,
+        color='Continent',
+        title=f'{climate_var} - Continent Averages',
+        render_mode=render_mode
     )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.subheader("Temperature Distribution by Country")
-    fig2 = px.violin(
-        filtered_df,
+    return themed(fig, height=500)
+
+def temperature_violin_figure(countries, year_start, year_end):
+    fig = px.violin(
+        cube.series(countries, year_start, year_end, 'Temperature_C'),
         x='Country/Territory',
         y='Temperature_C',
         title='Temperature Distribution',
@@ -528,90 +506,48 @@ with tab2:
         points='outliers',
         color='Country/Territory'
     )
-    fig2.update_layout(
-        template='plotly_dark',
-        paper_bgcolor='#0e1117',
-        plot_bgcolor='#1e293b',
-        font=dict(color='#ffffff', size=12),
-        title_font=dict(color='#ffffff', size=16),
-        showlegend=False,
-        height=600,
-        xaxis=dict(tickangle=45, gridcolor='#334155', color='#ffffff'),
-        yaxis=dict(gridcolor='#334155', color='#ffffff')
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    return themed(fig, showlegend=False, height=600, xaxis=dict(tickangle=45, gridcolor='#334155', color='#ffffff'))
 
-with tab3:
-    st.header("Mortality Analysis")
-    
-    rate_cols = [col for col in df.columns if col.endswith('_Rate_per_100k')]
-    
-    selected_cause = st.selectbox(
-        "Select Cause of Death",
-        [col.replace('_Rate_per_100k', '') for col in rate_cols]
-    )
-    
-    rate_col = f'{selected_cause}_Rate_per_100k'
-    
-    # Aggregate data to ensure one value per country-year
-    mortality_plot_data = filtered_df.groupby(['Country/Territory', 'Year'])[rate_col].mean().reset_index()
-    
+def mortality_trend_figure(countries, year_start, year_end, cause):
+    rate_col = f'{cause}_Rate_per_100k'
+    data, render_mode = line_data(cube.series(countries, year_start, year_end, rate_col), rate_col,
+                                  'Country/Territory')
     fig = px.line(
-        mortality_plot_data,
+        data,
         x='Year',
         y=rate_col,
         color='Country/Territory',
-        title=f'{selected_cause} - Death Rate per 100k'
-    )
-    fig.update_layout(
-        template='plotly_dark',
-        paper_bgcolor='#0e1117',
-        plot_bgcolor='#1e293b',
-        font=dict(color='#ffffff', size=12),
-        title_font=dict(color='#ffffff', size=16),
-        height=500,
-        xaxis=dict(gridcolor='#334155', color='#ffffff'),
-        yaxis=dict(gridcolor='#334155', color='#ffffff'),
-        legend=dict(font=dict(color='#ffffff'))
+        title=f'{cause} - Death Rate per 100k',
+        render_mode=render_mode
     )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.subheader(f"Average {selected_cause} Rate by Country")
-    avg_by_country = filtered_df.groupby('Country/Territory')[rate_col].mean().sort_values(ascending=False)
-    
-    fig2 = px.bar(
+    return themed(fig, height=500)
+
+def mortality_by_country_figure(countries, year_start, year_end, cause):
+    rate_col = f'{cause}_Rate_per_100k'
+    avg_by_country = cube.mean_by_country(countries, year_start, year_end, rate_col).sort_values(ascending=False)
+    fig = px.bar(
         x=avg_by_country.index,
         y=avg_by_country.values,
         labels={'x': 'Country', 'y': 'Average Rate per 100k'},
-        title=f'Average {selected_cause} Rate by Country',
+        title=f'Average {cause} Rate by Country',
         color=avg_by_country.values,
         color_continuous_scale='Viridis'
     )
-    fig2.update_layout(
-        template='plotly_dark',
-        paper_bgcolor='#0e1117',
-        plot_bgcolor='#1e293b',
-        font=dict(color='#ffffff', size=12),
-        title_font=dict(color='#ffffff', size=16),
-        xaxis=dict(tickangle=45, gridcolor='#334155', color='#ffffff'),
-        yaxis=dict(gridcolor='#334155', color='#ffffff'),
-        height=600
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    return themed(fig, height=600, xaxis=dict(tickangle=45, gridcolor='#334155', color='#ffffff'))
 
-with tab4:
-    st.header("Climate-Mortality Correlations")
-    
-    top_n = st.slider("Number of top correlations to display", 10, 50, 20)
-    
-    corr_type = st.radio("Correlation Type", ["Strongest (Absolute)", "Positive", "Negative"])
+def correlation_bar_figure(top_n, corr_type, significant_only):
+    # Tablas generadas con 06_exploratory_analysis.py incluyen p-valores, q-valores (FDR) e IC bootstrap
+    has_intervals = {'CI_Low', 'CI_High'}.issubset(corr_df.columns)
+    shown_corr = corr_df
+    if significant_only:
+        shown_corr = corr_df[corr_df['Q_Value'] < 0.05]
     
     if corr_type == "Strongest (Absolute)":
-        top_corr = corr_df.nlargest(top_n, 'Correlation', keep='all')
+        top_corr = shown_corr.nlargest(top_n, 'Correlation', keep='all')
     elif corr_type == "Positive":
-        top_corr = corr_df.nlargest(top_n, 'Correlation')
+        top_corr = shown_corr.nlargest(top_n, 'Correlation')
     else:
-        top_corr = corr_df.nsmallest(top_n, 'Correlation')
+        top_corr = shown_corr.nsmallest(top_n, 'Correlation')
         
         # La figura se ve rara porque los valores son negativos 
     
@@ -625,26 +561,24 @@ with tab4:
         title=f'Top {top_n} Climate-Mortality Correlations ({corr_type})',
         color='Correlation',
         color_continuous_scale='RdBu_r',
-        text='Correlation'
+        text='Correlation',
+        hover_data=[col for col in ['P_Value', 'Q_Value', 'CI_Low', 'CI_High'] if col in top_corr.columns],
+        error_x=top_corr['CI_High'] - top_corr['Correlation'] if has_intervals else None,
+        error_x_minus=top_corr['Correlation'] - top_corr['CI_Low'] if has_intervals else None
     )
     fig.update_traces(
         texttemplate='%{text:.3f}',
         textposition='outside'
     )
-    fig.update_layout(
-        template='plotly_dark',
-        paper_bgcolor='#0e1117',
-        plot_bgcolor='#1e293b',
+    return themed(
+        fig,
         font=dict(color='#ffffff', size=11),
-        title_font=dict(color='#ffffff', size=16),
         height=max(600, top_n * 25),
         yaxis=dict(tickfont=dict(size=10, color='#ffffff'), color='#ffffff'),
-        xaxis=dict(gridcolor='#334155', color='#ffffff'),
         margin=dict(l=300, r=50, t=80, b=50)
     )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.subheader("Correlation Heatmap - Top Causes")
+
+def correlation_heatmap_figure():
     top_causes = corr_df.groupby('Cause')['Correlation'].apply(lambda x: x.abs().max()).nlargest(10).index
     
     heatmap_data = corr_df[corr_df['Cause'].isin(top_causes)].pivot(
@@ -661,12 +595,8 @@ with tab4:
         aspect="auto",
         text_auto='.2f'
     )
-    fig_heatmap.update_layout(
-        template='plotly_dark',
-        paper_bgcolor='#0e1117',
-        plot_bgcolor='#1e293b',
-        font=dict(color='#ffffff', size=12),
-        title_font=dict(color='#ffffff', size=16),
+    themed(
+        fig_heatmap,
         height=600,
         xaxis=dict(side='bottom', color='#ffffff'),
         yaxis=dict(tickfont=dict(size=11, color='#ffffff'), color='#ffffff')
@@ -676,9 +606,155 @@ with tab4:
         texttemplate='%{text:.2f}',
         textfont=dict(size=10)
     )
+    return fig_heatmap
+
+def figure_request(name, build, countries=None, year_range=None, **params):
+    # Cache key plus builder; countries are passed in sorted order so the
+    # figure depends only on the normalized key
+    key = filter_key(name, countries, year_range, **params)
+    args = ([list(key[1])] if countries is not None else []) + (list(key[2]) if year_range is not None else [])
+    return key, lambda: build(*args, **params)
+
+def cached_figure(name, build, countries=None, year_range=None, **params):
+    return figure_cache.get(*figure_request(name, build, countries, year_range, **params))
+
+@st.cache_resource
+def load_figure_cache():
+    # Shared by all sessions; the default views are built once at startup
+    cache = FigureCache(maxsize=256)
+    years = (int(cube.years[0]), int(cube.years[-1]))
+    default_cause = RATE_COLS[0].replace('_Rate_per_100k', '')
+    for climate_var in CLIMATE_TREND_VARIABLES:
+        cache.warm(*figure_request('climate_trend', climate_trend_figure, DEFAULT_COUNTRIES, years,
+                                   climate_var=climate_var))
+    cache.warm(*figure_request('continent_trend', continent_trend_figure, year_range=years,
+                               climate_var=CLIMATE_TREND_VARIABLES[0]))
+    cache.warm(*figure_request('temperature_violin', temperature_violin_figure, DEFAULT_COUNTRIES, years))
+    cache.warm(*figure_request('mortality_trend', mortality_trend_figure, DEFAULT_COUNTRIES, years,
+                               cause=default_cause))
+    cache.warm(*figure_request('mortality_by_country', mortality_by_country_figure, DEFAULT_COUNTRIES, years,
+                               cause=default_cause))
+    cache.warm(*figure_request('correlation_bar', correlation_bar_figure,
+                               top_n=20, corr_type=CORRELATION_TYPES[0], significant_only=False))
+    cache.warm(*figure_request('correlation_heatmap', correlation_heatmap_figure))
+    return cache
+
+figure_cache = load_figure_cache()
+
+# Hero Section
+st.markdown('''
+<div class="hero-section">
+    <h1 class="main-title">Climate & Health Analytics Platform</h1>
+    <p class="subtitle">Comprehensive analysis of climate-mortality relationships across 49 countries (1990-2019)</p>
+</div>
+''', unsafe_allow_html=True)
+
+st.markdown("---")
+
+st.sidebar.header("Filters")
+
+selected_countries = st.sidebar.multiselect(
+    "Select Countries",
+    options=cube.countries,
+    default=DEFAULT_COUNTRIES
+)
+
+year_range = st.sidebar.slider(
+    "Year Range",
+    min_value=int(cube.years[0]),
+    max_value=int(cube.years[-1]),
+    value=(1990, 2019)
+)
+
+# Los filtros son cortes de índices sobre el cubo precalculado, sin recorrer el DataFrame
+year_start, year_end = year_range
+
+# Only the active section is built on each rerun (st.tabs would run every tab body),
+# and each section is a fragment so its own widgets rerun just that section
+TAB_NAMES = ["Overview", "Climate Trends", "Mortality Analysis", "Correlations", "Predictions 2020-2030", "ML Model Analysis"]
+active_tab = st.radio("Section", TAB_NAMES, horizontal=True, key='active_tab', label_visibility='collapsed')
+
+@st.fragment
+def render_overview():
+    st.header("Dataset Overview")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Countries", df['Country/Territory'].nunique())
+    with col2:
+        st.metric("Years", f"{df['Year'].min()}-{df['Year'].max()}")
+    with col3:
+        st.metric("Total Records", len(df))
+    with col4:
+        st.metric("Variables", len(df.columns))
+    
+    st.subheader("Sample Data")
+    st.dataframe(df.iloc[cube.row_positions(selected_countries, year_start, year_end)[:10]])
+
+@st.fragment
+def render_climate_trends():
+    st.header("Climate Trends")
+    
+    climate_var = st.selectbox(
+        "Select Climate Variable",
+        CLIMATE_TREND_VARIABLES
+    )
+    
+    # Pre-themed figures served from the shared cache, keyed by the normalized filters
+    fig = cached_figure('climate_trend', climate_trend_figure, countries=selected_countries,
+                        year_range=(year_start, year_end), climate_var=climate_var)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    if st.checkbox("Show continent averages", value=False):
+        fig_continent = cached_figure('continent_trend', continent_trend_figure,
+                                      year_range=(year_start, year_end), climate_var=climate_var)
+        st.plotly_chart(fig_continent, use_container_width=True)
+    
+    st.subheader("Temperature Distribution by Country")
+    fig2 = cached_figure('temperature_violin', temperature_violin_figure, countries=selected_countries,
+                         year_range=(year_start, year_end))
+    st.plotly_chart(fig2, use_container_width=True)
+
+@st.fragment
+def render_mortality_analysis():
+    st.header("Mortality Analysis")
+    
+    selected_cause = st.selectbox(
+        "Select Cause of Death",
+        [col.replace('_Rate_per_100k', '') for col in RATE_COLS]
+    )
+    
+    fig = cached_figure('mortality_trend', mortality_trend_figure, countries=selected_countries,
+                        year_range=(year_start, year_end), cause=selected_cause)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader(f"Average {selected_cause} Rate by Country")
+    fig2 = cached_figure('mortality_by_country', mortality_by_country_figure, countries=selected_countries,
+                         year_range=(year_start, year_end), cause=selected_cause)
+    st.plotly_chart(fig2, use_container_width=True)
+
+@st.fragment
+def render_correlations():
+    st.header("Climate-Mortality Correlations")
+    
+    top_n = st.slider("Number of top correlations to display", 10, 50, 20)
+    
+    corr_type = st.radio("Correlation Type", CORRELATION_TYPES)
+    
+    has_significance = 'Q_Value' in corr_df.columns
+    significant_only = has_significance and st.checkbox("Only significant correlations (FDR q < 0.05)", value=False)
+    
+    fig = cached_figure('correlation_bar', correlation_bar_figure,
+                        top_n=top_n, corr_type=corr_type, significant_only=significant_only)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("Correlation Heatmap - Top Causes")
+    fig_heatmap = cached_figure('correlation_heatmap', correlation_heatmap_figure)
     st.plotly_chart(fig_heatmap, use_container_width=True)
 
-with tab5:
+@st.fragment
+def render_predictions():
     st.header("Future Mortality Predictions (2020-2030)")
     
     # Load predictions
@@ -720,8 +796,7 @@ with tab5:
         ]
         
         # Get historical data for comparison
-        hist_data = df[df['Country/Territory'] == pred_country].copy()
-        hist_data = hist_data[['Year', pred_cause]].groupby('Year')[pred_cause].mean().reset_index()
+        hist_data = cube.series([pred_country], cube.years[0], cube.years[-1], pred_cause)
         
         # Create combined historical + prediction plot
         st.subheader(f"{pred_cause} - Historical vs Predicted Trend")
@@ -880,27 +955,11 @@ with tab5:
     except Exception as e:
         st.error(f"Error loading predictions: {str(e)}")
 
-with tab6:
+@st.fragment
+def render_ml_model():
     st.header("Random Forest Model - Climate Impact Prediction")
     
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, rgba(30, 41, 59, 0.6) 0%, rgba(15, 23, 42, 0.6) 100%); 
-                padding: 1.5rem; border-radius: 12px; border: 1px solid #334155; margin-bottom: 2rem;">
-        <h3 style="color: #a78bfa; margin-top: 0;">About this Model</h3>
-        <p style="color: #e2e8f0; font-size: 1rem; line-height: 1.6;">
-            This Random Forest regressor predicts <strong>Neoplasms (Cancer) mortality rates</strong> based on 
-            5 climate variables. The model learns non-linear relationships between environmental conditions 
-            and health outcomes across 49 countries.
-        </p>
-        <p style="color: #cbd5e1; margin-bottom: 0;">
-            <strong>Target:</strong> Neoplasms_Rate_per_100k | 
-            <strong>Algorithm:</strong> Random Forest (100 trees, max_depth=10) |
-            <strong>Data Split:</strong> 80% training, 20% testing
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Train model on-the-fly with caching to avoid compatibility issues
+    # Train model on-the-fly with caching; only used when the registry has no compatible version
     @st.cache_resource
     def train_rf_model():
         from sklearn.ensemble import RandomForestRegressor
@@ -927,8 +986,90 @@ with tab6:
         
         return model, predictions_df
     
+    @st.cache_resource
+    def load_rf_model():
+        # Returns (model, test predictions, registry version directory, version metadata),
+        # the last two None for the model trained on the fly
+        registry = ModelRegistry(os.path.join(BASE_DIR, 'models', 'registry'))
+        try:
+            model, metadata = registry.load('rf_neoplasms')
+        except (FileNotFoundError, IncompatibleModelError):
+            return train_rf_model() + (None, None)
+        predictions_df = registry.predictions('rf_neoplasms', metadata['version'])
+        if predictions_df is None:
+            return train_rf_model() + (None, None)
+        return model, predictions_df, registry.version_dir('rf_neoplasms', metadata['version']), metadata
+    
+    # Slider ranges of the interactive predictor: (feature, label, min, max, default, step, grid nodes)
+    PREDICTOR_INPUTS = [
+        ('Temperature_C', "Temperature (°C)", -10.0, 35.0, 15.0, 0.5, 23),
+        ('Precipitation_mm', "Precipitation (mm)", 0.0, 200.0, 60.0, 5.0, 17),
+        ('Surface_Pressure_Pa', "Surface Pressure (Pa)", 95000.0, 105000.0, 101325.0, 100.0, 11),
+        ('Dewpoint_K', "Dewpoint (K)", 250.0, 300.0, 280.0, 1.0, 16),
+        ('Wind_Speed_ms', "Wind Speed (m/s)", 0.0, 15.0, 4.0, 0.5, 11),
+    ]
+    
+    @st.cache_resource
+    def load_response_surface(_model, model_dir):
+        # One batched predict over the slider grid; stored next to the registered model version
+        features = [spec[0] for spec in PREDICTOR_INPUTS]
+        axes = [np.linspace(low, high, nodes) for _, _, low, high, _, _, nodes in PREDICTOR_INPUTS]
+        if model_dir is None:
+            return ResponseSurface.from_model(_model, features, axes)
+        return ResponseSurface.cached(model_dir, _model, features, axes)
+    
+    @st.cache_resource
+    def load_model_explanations(model_dir):
+        # Precomputed by `08_predictive_modeling.py explain`; None when missing
+        if model_dir is None:
+            return None
+        return load_explanations(model_dir)
+    
+    def model_summary(metadata):
+        # (target, algorithm, evaluation) of the registered version; static text for the on-the-fly model
+        if metadata is None:
+            return ('Neoplasms_Rate_per_100k', 'Random Forest (100 trees, max_depth=10)',
+                    '80% training, 20% testing (trained on the fly, no registered model)')
+        params = metadata.get('params') or {}
+        depth = params.get('max_depth')
+        algorithm = (f"Random Forest ({params.get('n_estimators', '?')} trees, "
+                     f"max_depth={'unlimited' if depth is None else depth}, "
+                     f"min_samples_leaf={params.get('min_samples_leaf', 1)}, "
+                     f"max_features={params.get('max_features', 1.0)}) | "
+                     f"<strong>Version:</strong> v{metadata['version']} ({metadata['created']})")
+        evaluation = metadata.get('evaluation')
+        if evaluation is None:
+            split = f"test R² {metadata['metrics']['r2']:.3f} (split not recorded)"
+        else:
+            test_percent = round(100 * evaluation['test_size'])
+            split = (f"{100 - test_percent}% training, {test_percent}% testing "
+                     f"({evaluation['n_train']} / {evaluation['n_test']} rows)")
+            tuning = evaluation.get('tuning')
+            if tuning:
+                split += (f" | <strong>Tuning:</strong> GroupKFold({tuning['cv']['splits']}) by country, "
+                          f"CV R² {tuning['r2_mean']:.3f} ± {tuning['r2_std']:.3f}")
+        return metadata['target'], algorithm, split
+    
     try:
-        model, predictions_df = train_rf_model()
+        model, predictions_df, model_dir, model_metadata = load_rf_model()
+        
+        target_name, algorithm, split = model_summary(model_metadata)
+        st.markdown(f"""
+        <div style="background: linear-gradient(135deg, rgba(30, 41, 59, 0.6) 0%, rgba(15, 23, 42, 0.6) 100%); 
+                    padding: 1.5rem; border-radius: 12px; border: 1px solid #334155; margin-bottom: 2rem;">
+            <h3 style="color: #a78bfa; margin-top: 0;">About this Model</h3>
+            <p style="color: #e2e8f0; font-size: 1rem; line-height: 1.6;">
+                This Random Forest regressor predicts <strong>Neoplasms (Cancer) mortality rates</strong> based on 
+                5 climate variables. The model learns non-linear relationships between environmental conditions 
+                and health outcomes across {df['Country/Territory'].nunique()} countries.
+            </p>
+            <p style="color: #cbd5e1; margin-bottom: 0;">
+                <strong>Target:</strong> {target_name} | 
+                <strong>Algorithm:</strong> {algorithm} |
+                <strong>Data Split:</strong> {split}
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
         
         # Model Performance Metrics
         st.subheader("Model Performance Metrics")
@@ -991,7 +1132,8 @@ with tab6:
                 showscale=True,
                 colorbar=dict(title="Importance", titlefont=dict(color='#ffffff'), tickfont=dict(color='#ffffff'))
             ),
-            text=[f"{x:.3f}" for x in feature_importance_df['Importance']],
+            text=feature_importance_df['Importance'],
+            texttemplate='%{text:.3f}',
             textposition='outside',
             textfont=dict(color='#ffffff')
         ))
@@ -1036,24 +1178,42 @@ with tab6:
             showlegend=True
         ))
         
-        # Actual predictions
-        fig_scatter.add_trace(go.Scatter(
-            x=predictions_df['Actual'],
-            y=predictions_df['Predicted'],
-            mode='markers',
-            name='Predictions',
-            marker=dict(
-                size=8,
-                color=predictions_df['Error'].abs(),
-                colorscale=[[0, '#667eea'], [0.5, '#764ba2'], [1, '#f5576c']],
-                showscale=True,
-                colorbar=dict(title="Absolute Error", titlefont=dict(color='#ffffff'), tickfont=dict(color='#ffffff')),
-                line=dict(color='#ffffff', width=0.5)
-            ),
-            text=[f"Actual: {a:.1f}<br>Predicted: {p:.1f}<br>Error: {e:.1f}" 
-                  for a, p, e in zip(predictions_df['Actual'], predictions_df['Predicted'], predictions_df['Error'])],
-            hovertemplate='%{text}<extra></extra>'
-        ))
+        # Actual predictions; hover values are formatted client side from customdata
+        error_colorscale = [[0, '#667eea'], [0.5, '#764ba2'], [1, '#f5576c']]
+        error_colorbar = dict(title="Absolute Error", titlefont=dict(color='#ffffff'), tickfont=dict(color='#ffffff'))
+        if len(predictions_df) > BINNED_SCATTER_POINTS:
+            x_centers, y_centers, counts, mean_error = bin2d(
+                predictions_df['Actual'], predictions_df['Predicted'], bins=200,
+                values=predictions_df['Error'].abs()
+            )
+            fig_scatter.add_trace(go.Heatmap(
+                x=x_centers,
+                y=y_centers,
+                z=mean_error,
+                customdata=counts,
+                name='Predictions',
+                colorscale=error_colorscale,
+                colorbar=dict(error_colorbar, title="Mean Absolute Error"),
+                hovertemplate='Actual: %{x:.1f}<br>Predicted: %{y:.1f}<br>Mean |Error|: %{z:.1f}<br>Points: %{customdata:,}<extra></extra>'
+            ))
+        else:
+            scatter_trace = go.Scattergl if len(predictions_df) > LARGE_DATA_POINTS else go.Scatter
+            fig_scatter.add_trace(scatter_trace(
+                x=predictions_df['Actual'],
+                y=predictions_df['Predicted'],
+                mode='markers',
+                name='Predictions',
+                marker=dict(
+                    size=8,
+                    color=predictions_df['Error'].abs(),
+                    colorscale=error_colorscale,
+                    showscale=True,
+                    colorbar=error_colorbar,
+                    line=dict(color='#ffffff', width=0.5)
+                ),
+                customdata=predictions_df['Error'],
+                hovertemplate='Actual: %{x:.1f}<br>Predicted: %{y:.1f}<br>Error: %{customdata:.1f}<extra></extra>'
+            ))
         
         fig_scatter.update_layout(
             template='plotly_dark',
@@ -1108,69 +1268,202 @@ with tab6:
         </div>
         """, unsafe_allow_html=True)
         
+        surface = load_response_surface(model, model_dir)
+        
         col1, col2 = st.columns(2)
+        inputs = {}
+        for i, (feature, label, low, high, default, step, _) in enumerate(PREDICTOR_INPUTS):
+            with (col1 if i < 3 else col2):
+                inputs[feature] = st.slider(
+                    label,
+                    min_value=low,
+                    max_value=high,
+                    value=default,
+                    step=step
+                )
+        
+        # The slider lattice is far too large to precompute (~6e8 nodes), so between grid
+        # nodes the surface value is an interpolation; the exact value is one model call away
+        exact = st.checkbox("Exact prediction (evaluate the model at these values)", value=False)
+        if exact:
+            row = pd.DataFrame([[inputs[feature] for feature in surface.features]], columns=surface.features)
+            prediction = float(model.predict(row)[0])
+            prediction_prefix, prediction_note = "", "deaths per 100,000 population"
+        else:
+            # Multilinear interpolation on the precomputed response surface (no model evaluation)
+            prediction = surface.predict(inputs)
+            prediction_prefix = "≈ "
+            prediction_note = "deaths per 100,000 population (approximate, interpolated from the precomputed grid)"
         
-        with col1:
-            temp_input = st.slider(
-                "Temperature (°C)",
-                min_value=-10.0,
-                max_value=35.0,
-                value=15.0,
-                step=0.5
+        st.markdown(f"""
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                    padding: 2rem; border-radius: 16px; text-align: center; margin-top: 2rem;">
+            <p style="color: #e2e8f0; font-size: 1.2rem; margin: 0 0 1rem 0;">Predicted Neoplasms Mortality Rate</p>
+            <h1 style="color: #ffffff; margin: 0; font-size: 3rem;">{prediction_prefix}{prediction:.2f}</h1>
+            <p style="color: #cbd5e1; font-size: 1rem; margin: 1rem 0 0 0;">{prediction_note}</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.subheader("Partial Dependence over the Predictor Ranges")
+        
+        feature_labels = {spec[0]: spec[1] for spec in PREDICTOR_INPUTS}
+        pdp_col1, pdp_col2 = st.columns(2)
+        
+        with pdp_col1:
+            pdp_feature = st.selectbox(
+                "Feature",
+                list(feature_labels),
+                format_func=feature_labels.get,
+                key='pdp_feature'
             )
-            
-            precip_input = st.slider(
-                "Precipitation (mm)",
-                min_value=0.0,
-                max_value=200.0,
-                value=60.0,
-                step=5.0
+            (pdp_axis,), pdp_values = surface.partial_dependence(pdp_feature)
+            fig_pdp = go.Figure(go.Scatter(
+                x=pdp_axis,
+                y=pdp_values,
+                mode='lines+markers',
+                line=dict(color='#a78bfa', width=3)
+            ))
+            fig_pdp.add_vline(x=inputs[pdp_feature], line=dict(color='#f093fb', dash='dash'))
+            fig_pdp.update_layout(
+                template='plotly_dark',
+                paper_bgcolor='#0f1419',
+                plot_bgcolor='#1e293b',
+                font=dict(color='#ffffff', size=12),
+                xaxis_title=feature_labels[pdp_feature],
+                yaxis_title="Average Predicted Rate (per 100k)",
+                height=400
             )
-            
-            pressure_input = st.slider(
-                "Surface Pressure (Pa)",
-                min_value=95000.0,
-                max_value=105000.0,
-                value=101325.0,
-                step=100.0
+            st.plotly_chart(fig_pdp, use_container_width=True)
+        
+        with pdp_col2:
+            pdp_x = st.selectbox(
+                "X feature",
+                list(feature_labels),
+                format_func=feature_labels.get,
+                key='pdp_x'
             )
-        
-        with col2:
-            dewpoint_input = st.slider(
-                "Dewpoint (K)",
-                min_value=250.0,
-                max_value=300.0,
-                value=280.0,
-                step=1.0
+            pdp_y = st.selectbox(
+                "Y feature",
+                [feature for feature in feature_labels if feature != pdp_x],
+                index=2,
+                format_func=feature_labels.get,
+                key='pdp_y'
             )
-            
-            wind_input = st.slider(
-                "Wind Speed (m/s)",
-                min_value=0.0,
-                max_value=15.0,
-                value=4.0,
-                step=0.5
+            (x_axis, y_axis), pdp_grid = surface.partial_dependence(pdp_x, pdp_y)
+            fig_pdp2 = go.Figure(go.Heatmap(
+                x=x_axis,
+                y=y_axis,
+                z=pdp_grid.T,
+                colorscale=[[0, '#667eea'], [0.5, '#764ba2'], [1, '#f093fb']],
+                colorbar=dict(title="Rate", tickfont=dict(color='#ffffff'))
+            ))
+            fig_pdp2.update_layout(
+                template='plotly_dark',
+                paper_bgcolor='#0f1419',
+                plot_bgcolor='#1e293b',
+                font=dict(color='#ffffff', size=12),
+                xaxis_title=feature_labels[pdp_x],
+                yaxis_title=feature_labels[pdp_y],
+                height=400
             )
+            st.plotly_chart(fig_pdp2, use_container_width=True)
         
-        # Make prediction
-        input_data = pd.DataFrame({
-            'Temperature_C': [temp_input],
-            'Precipitation_mm': [precip_input],
-            'Surface_Pressure_Pa': [pressure_input],
-            'Dewpoint_K': [dewpoint_input],
-            'Wind_Speed_ms': [wind_input]
-        })
-        
-        prediction = model.predict(input_data)[0]
+        st.subheader("Model Explanations by Country")
         
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 2rem; border-radius: 16px; text-align: center; margin-top: 2rem;">
-            <p style="color: #e2e8f0; font-size: 1.2rem; margin: 0 0 1rem 0;">Predicted Neoplasms Mortality Rate</p>
-            <h1 style="color: #ffffff; margin: 0; font-size: 3rem;">{prediction:.2f}</h1>
-            <p style="color: #cbd5e1; font-size: 1rem; margin: 1rem 0 0 0;">deaths per 100,000 population</p>
-        </div>
-        """, unsafe_allow_html=True)
+        explanations = load_model_explanations(model_dir)
+        if explanations is None:
+            st.info("Explanations not found. Run `python scripts/08_predictive_modeling.py explain` to precompute SHAP values and ICE curves.")
+        else:
+            shap_features = [str(f) for f in explanations['features']]
+            shap_countries = explanations['key_Country/Territory']
+            shap_years = explanations['key_Year']
+            
+            shap_country = st.selectbox(
+                "Country",
+                sorted(set(shap_countries)),
+                key='shap_country'
+            )
+            rows = np.flatnonzero(shap_countries == shap_country)
+            rows = rows[np.argsort(shap_years[rows])]
+            
+            shap_col1, shap_col2 = st.columns(2)
+            
+            with shap_col1:
+                mean_abs_shap = np.abs(explanations['shap'][rows]).mean(axis=0)
+                order = np.argsort(mean_abs_shap)
+                fig_shap = go.Figure(go.Bar(
+                    x=mean_abs_shap[order],
+                    y=[feature_labels.get(shap_features[i], shap_features[i]) for i in order],
+                    orientation='h',
+                    marker=dict(color='#a78bfa')
+                ))
+                fig_shap.update_layout(
+                    template='plotly_dark',
+                    paper_bgcolor='#0f1419',
+                    plot_bgcolor='#1e293b',
+                    font=dict(color='#ffffff', size=12),
+                    title=f"Mean |SHAP| - {shap_country}",
+                    xaxis_title="Mean absolute contribution (per 100k)",
+                    height=400
+                )
+                st.plotly_chart(fig_shap, use_container_width=True)
+            
+            with shap_col2:
+                fig_shap_years = go.Figure()
+                for i, feature in enumerate(shap_features):
+                    fig_shap_years.add_trace(go.Scatter(
+                        x=shap_years[rows],
+                        y=explanations['shap'][rows, i],
+                        mode='lines',
+                        name=feature_labels.get(feature, feature)
+                    ))
+                fig_shap_years.update_layout(
+                    template='plotly_dark',
+                    paper_bgcolor='#0f1419',
+                    plot_bgcolor='#1e293b',
+                    font=dict(color='#ffffff', size=12),
+                    title=f"Contributions over Time (base {float(explanations['base']):.1f})",
+                    xaxis_title="Year",
+                    yaxis_title="SHAP value (per 100k)",
+                    height=400
+                )
+                st.plotly_chart(fig_shap_years, use_container_width=True)
+            
+            ice_feature = st.selectbox(
+                "ICE feature",
+                shap_features,
+                format_func=lambda f: feature_labels.get(f, f),
+                key='ice_feature'
+            )
+            j = shap_features.index(ice_feature)
+            fig_ice = go.Figure()
+            for row in rows:
+                fig_ice.add_trace(go.Scatter(
+                    x=explanations['grids'][j],
+                    y=explanations['ice'][j, row],
+                    mode='lines',
+                    line=dict(color='rgba(167, 139, 250, 0.35)', width=1),
+                    name=str(shap_years[row]),
+                    showlegend=False
+                ))
+            fig_ice.add_trace(go.Scatter(
+                x=explanations['grids'][j],
+                y=explanations['pdp'][j],
+                mode='lines',
+                line=dict(color='#f093fb', width=3),
+                name="Partial dependence (all rows)"
+            ))
+            fig_ice.update_layout(
+                template='plotly_dark',
+                paper_bgcolor='#0f1419',
+                plot_bgcolor='#1e293b',
+                font=dict(color='#ffffff', size=12),
+                title=f"ICE Curves - {shap_country} (one per year)",
+                xaxis_title=feature_labels.get(ice_feature, ice_feature),
+                yaxis_title="Predicted Rate (per 100k)",
+                height=450
+            )
+            st.plotly_chart(fig_ice, use_container_width=True)
         
         # Detailed predictions table
         with st.expander("View Detailed Predictions Data"):
@@ -1188,4 +1481,14 @@ with tab6:
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
 
+TAB_RENDERERS = dict(zip(TAB_NAMES, [
+    render_overview,
+    render_climate_trends,
+    render_mortality_analysis,
+    render_correlations,
+    render_predictions,
+    render_ml_model,
+]))
+TAB_RENDERERS[active_tab]()
+
 st.sidebar.markdown("---")
\ No newline at end of file
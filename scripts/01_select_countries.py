@@ -1,53 +1,58 @@
-import pandas as pd
+import argparse
 import os
+import sys
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'raw')
 PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
 
-os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
-
-deaths_df = pd.read_csv(os.path.join(RAW_DATA_DIR, 'cause_of_deaths.csv'))
-
-print(f"Rango de años en el dataset: {deaths_df['Year'].min()} - {deaths_df['Year'].max()}")
-print(f"Total registros originales: {len(deaths_df)}\n")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.config import YEAR_END, YEAR_START
+from scripts.utils.countries import CONTINENTS, COUNTRY_COL, encode_countries
+from scripts.utils.ingest import read_deaths
+from scripts.utils.storage import write_table
+
+parser = argparse.ArgumentParser(description='Selecciona países y años del extracto de causas de muerte')
+parser.add_argument('--input', default=os.path.join(RAW_DATA_DIR, 'cause_of_deaths.csv'),
+                    help='CSV de causas de muerte')
+parser.add_argument('--start-year', type=int, default=YEAR_START, help='Primer año')
+parser.add_argument('--end-year', type=int, default=YEAR_END, help='Último año')
+parser.add_argument('--block-size', type=int, default=16,
+                    help='MB leídos por bloque; los filtros se aplican a cada bloque')
+args = parser.parse_args()
 
-deaths_df_filtered = deaths_df[(deaths_df['Year'] >= 1990) & (deaths_df['Year'] <= 2019)]
+os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
 
-print(f"Registros después de filtrar (1990-2019): {len(deaths_df_filtered)}\n")
+# Filtros aplicados durante la lectura: solo se conservan en memoria las filas seleccionadas
+candidates = [country for countries in CONTINENTS.values() for country in countries]
+deaths_df_final, summary = read_deaths(
+    args.input, years=(args.start_year, args.end_year), countries=candidates,
+    block_size=args.block_size << 20
+)
+deaths_df_final[COUNTRY_COL] = encode_countries(deaths_df_final[COUNTRY_COL])
 
-continents = {
-    'Europe': ['Germany', 'United Kingdom', 'France', 'Italy', 'Spain', 'Poland', 'Netherlands', 'Belgium', 'Greece', 'Portugal'],
-    'Asia': ['China', 'India', 'Japan', 'Indonesia', 'Pakistan', 'Bangladesh', 'Russia', 'Turkey', 'Iran', 'Thailand'],
-    'Americas': ['United States', 'Brazil', 'Mexico', 'Canada', 'Argentina', 'Colombia', 'Peru', 'Venezuela', 'Chile', 'Ecuador'],
-    'Africa': ['Nigeria', 'Ethiopia', 'Egypt', 'Democratic Republic of Congo', 'South Africa', 'Tanzania', 'Kenya', 'Algeria', 'Sudan', 'Uganda'],
-    'Oceania': ['Australia', 'Papua New Guinea', 'New Zealand', 'Fiji', 'Solomon Islands', 'Samoa', 'Vanuatu', 'Kiribati', 'Tonga', 'Micronesia']
-}
+print(f"Rango de años en el dataset: {summary['year_min']} - {summary['year_max']}")
+print(f"Total registros originales: {summary['rows']}")
+print(f"Registros después de filtrar ({args.start_year}-{args.end_year}) y seleccionar países: {len(deaths_df_final)}\n")
 
-selected_countries = []
-for continent, countries in continents.items():
-    for country in countries:
-        if country in deaths_df_filtered['Country/Territory'].values:
-            selected_countries.append(country)
+available_countries = set(deaths_df_final[COUNTRY_COL].unique())
+selected_countries = [country for country in candidates if country in available_countries]
 
 print(f"Total de países seleccionados: {len(selected_countries)}\n")
 
-for continent, countries in continents.items():
-    available = [c for c in countries if c in deaths_df_filtered['Country/Territory'].values]
+for continent, countries in CONTINENTS.items():
+    available = [c for c in countries if c in available_countries]
     print(f"{continent}: {len(available)} países")
     for country in available:
         print(f"  - {country}")
     print()
 
-deaths_df_final = deaths_df_filtered[deaths_df_filtered['Country/Territory'].isin(selected_countries)]
-
 print(f"Registros finales: {len(deaths_df_final)}")
-print(f"Países: {len(deaths_df_final['Country/Territory'].unique())}")
+print(f"Países: {deaths_df_final[COUNTRY_COL].nunique()}")
 print(f"Años: {deaths_df_final['Year'].min()} - {deaths_df_final['Year'].max()}")
 
-output_path = os.path.join(PROCESSED_DATA_DIR, 'deaths_selected_countries.csv')
-deaths_df_final.to_csv(output_path, index=False)
-print(f"\nDataset filtrado guardado en: {output_path}")
+write_table(deaths_df_final, 'deaths_selected_countries', PROCESSED_DATA_DIR)
+print(f"\nDataset filtrado guardado en: {os.path.join(PROCESSED_DATA_DIR, 'deaths_selected_countries')}.{{parquet,arrow,csv}}")
 
 countries_list_path = os.path.join(PROCESSED_DATA_DIR, 'selected_countries.txt')
 with open(countries_list_path, 'w', encoding='utf-8') as f:
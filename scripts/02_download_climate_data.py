@@ -1,53 +1,78 @@
+import argparse
 import os
 import sys
-import cdsapi
-import subprocess
 from dotenv import load_dotenv
 
 load_dotenv()
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 EXTERNAL_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'external')
+CHUNKS_DIR = os.path.join(EXTERNAL_DATA_DIR, 'era5_chunks')
 
-os.makedirs(EXTERNAL_DATA_DIR, exist_ok=True)
-
-cdsapirc_path = os.path.join(os.path.expanduser("~"), ".cdsapirc")
-if os.path.exists(cdsapirc_path):
-    print(f"Archivo .cdsapirc encontrado en: {cdsapirc_path}")
-else:
-    print(f"ERROR: Archivo .cdsapirc NO encontrado en: {cdsapirc_path}")
-    sys.exit(1)
-
-try:
-    c = cdsapi.Client()
-    print("Cliente CDS inicializado correctamente")
-except Exception as e:
-    print(f"ERROR al inicializar cliente CDS: {e}")
-    sys.exit(1)
-
-output_file = os.path.join(EXTERNAL_DATA_DIR, 'era5_climate_data_1990_2019.nc')
-
-try:
-    c.retrieve(
-        'reanalysis-era5-single-levels-monthly-means',
-        {
-            'product_type': 'monthly_averaged_reanalysis',
-            'variable': [
-                '2m_temperature',
-                'total_precipitation',
-                'surface_pressure',
-                '2m_dewpoint_temperature',
-                '10m_u_component_of_wind',
-                '10m_v_component_of_wind'
-            ],
-            'year': [str(year) for year in range(1990, 2020)],
-            'month': [f'{month:02d}' for month in range(1, 13)],
-            'time': '00:00',
-            'format': 'netcdf'
-        },
-        output_file
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.cds_download import VARIABLES, ChunkManifest, MANIFEST_FILE, download_chunks, plan_chunks
+from scripts.utils.config import CDS_API_KEY, CDS_URL, YEAR_END, YEAR_START
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Descarga ERA5 mensual por bloques en paralelo, reanudando los bloques pendientes'
     )
-    print(f"\nDatos climáticos descargados en: {output_file}")
-except Exception as e:
-    print(f"\nERROR durante la descarga: {e}")
-    sys.exit(1)
\ No newline at end of file
+    parser.add_argument('--start-year', type=int, default=YEAR_START, help='Primer año')
+    parser.add_argument('--end-year', type=int, default=YEAR_END, help='Último año')
+    parser.add_argument('--by-variable', action='store_true',
+                        help='Un bloque por año y variable (por defecto un bloque por año)')
+    parser.add_argument('--workers', type=int, default=4, help='Peticiones simultáneas al CDS')
+    parser.add_argument('--retries', type=int, default=3, help='Intentos por bloque')
+    parser.add_argument('--verify', action='store_true',
+                        help='Recalcula el SHA-256 de los bloques ya descargados antes de darlos por buenos')
+    parser.add_argument('--output-dir', default=CHUNKS_DIR, help='Directorio de los bloques y del manifiesto')
+    return parser.parse_args()
+
+
+def cds_client_factory():
+    import cdsapi
+
+    if CDS_URL and CDS_API_KEY:
+        return lambda: cdsapi.Client(url=CDS_URL, key=CDS_API_KEY, quiet=True)
+
+    cdsapirc_path = os.path.join(os.path.expanduser("~"), ".cdsapirc")
+    if os.path.exists(cdsapirc_path):
+        print(f"Archivo .cdsapirc encontrado en: {cdsapirc_path}")
+    else:
+        print(f"ERROR: Archivo .cdsapirc NO encontrado en: {cdsapirc_path} (ni CDS_URL/CDS_API_KEY en el entorno)")
+        sys.exit(1)
+    return lambda: cdsapi.Client(quiet=True)
+
+
+def main(client_factory=None):
+    args = parse_args()
+    years = range(args.start_year, args.end_year + 1)
+    chunks = plan_chunks(years, VARIABLES, by_variable=args.by_variable)
+
+    if client_factory is None:
+        try:
+            client_factory = cds_client_factory()
+            client_factory()
+            print("Cliente CDS inicializado correctamente")
+        except Exception as e:
+            print(f"ERROR al inicializar cliente CDS: {e}")
+            sys.exit(1)
+
+    print(f"ERA5 {args.start_year}-{args.end_year}: {len(chunks)} bloques, {args.workers} peticiones simultáneas")
+    manifest = ChunkManifest(os.path.join(args.output_dir, MANIFEST_FILE))
+    status = download_chunks(client_factory, chunks, args.output_dir, manifest,
+                             workers=args.workers, retries=args.retries, check_hash=args.verify)
+
+    failed = {key: error for key, error in status.items() if error not in ('downloaded', 'cached')}
+    downloaded = sum(1 for result in status.values() if result == 'downloaded')
+    print(f"\nBloques descargados: {downloaded}, ya completos: {len(status) - downloaded - len(failed)}")
+    print(f"Manifiesto: {manifest.path}")
+    if failed:
+        print(f"\nERROR: {len(failed)} bloques fallaron; vuelve a ejecutar el script para reintentarlos")
+        sys.exit(1)
+    print(f"\nDatos climáticos descargados en: {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
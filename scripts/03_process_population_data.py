@@ -1,14 +1,18 @@
-import pandas as pd
 import os
+import sys
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
 
-deaths_df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'deaths_selected_countries.csv'))
-population_df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'population_annual_1990_2019.csv'))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.countries import COUNTRY_COL, encode_countries
+from scripts.utils.storage import read_table, write_table
 
-deaths_countries = set(deaths_df['Country/Territory'].unique())
-population_countries = set(population_df['Country/Territory'].unique())
+deaths_df = read_table('deaths_selected_countries', PROCESSED_DATA_DIR)
+population_df = read_table('population_annual_1990_2019', PROCESSED_DATA_DIR)
+
+deaths_countries = set(deaths_df[COUNTRY_COL].unique())
+population_countries = set(population_df[COUNTRY_COL].unique())
 
 common_countries = deaths_countries.intersection(population_countries)
 
@@ -16,14 +20,16 @@ print(f"Países en dataset de mortalidad: {len(deaths_countries)}")
 print(f"Países en dataset de población: {len(population_countries)}")
 print(f"Países comunes (final): {len(common_countries)}\n")
 
-deaths_df_final = deaths_df[deaths_df['Country/Territory'].isin(common_countries)]
-population_df_final = population_df[population_df['Country/Territory'].isin(common_countries)]
+deaths_df_final = deaths_df[deaths_df[COUNTRY_COL].isin(common_countries)].copy()
+population_df_final = population_df[population_df[COUNTRY_COL].isin(common_countries)].copy()
+deaths_df_final[COUNTRY_COL] = encode_countries(deaths_df_final[COUNTRY_COL])
+population_df_final[COUNTRY_COL] = encode_countries(population_df_final[COUNTRY_COL])
 
 print(f"Registros de mortalidad: {len(deaths_df_final)}")
 print(f"Registros de población: {len(population_df_final)}\n")
 
-deaths_df_final.to_csv(os.path.join(PROCESSED_DATA_DIR, 'deaths_selected_countries.csv'), index=False)
-population_df_final.to_csv(os.path.join(PROCESSED_DATA_DIR, 'population_annual_1990_2019.csv'), index=False)
+write_table(deaths_df_final, 'deaths_selected_countries', PROCESSED_DATA_DIR)
+write_table(population_df_final, 'population_annual_1990_2019', PROCESSED_DATA_DIR)
 
 with open(os.path.join(PROCESSED_DATA_DIR, 'selected_countries.txt'), 'w') as f:
     for country in sorted(common_countries):
@@ -1,98 +1,90 @@
-import xarray as xr
+import argparse
 import pandas as pd
 import numpy as np
 import os
+import sys
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 EXTERNAL_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'external')
 PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
+CHUNKS_DIR = os.path.join(EXTERNAL_DATA_DIR, 'era5_chunks')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.cds_download import MANIFEST_FILE
+from scripts.utils.config import YEAR_END, YEAR_START
+from scripts.utils.countries import COUNTRY_COL, coordinates, encode_countries
+from scripts.utils.era5 import extract_points
+from scripts.utils.era5_index import Era5Index
+from scripts.utils.storage import write_table
+from scripts.utils.zonal import aggregate_countries, load_country_polygons, load_or_build_weights
+
+parser = argparse.ArgumentParser(description='Extrae variables climáticas ERA5 por país')
+parser.add_argument('--chunk-size', type=int, default=12,
+                    help='Pasos de tiempo por bloque al leer ERA5 (0 carga los archivos completos)')
+parser.add_argument('--workers', type=int, default=None,
+                    help='Hilos de dask que leen y calculan cada bloque (en modo point y area)')
+parser.add_argument('--aggregation', choices=['point', 'area'], default='point',
+                    help='point: celda más cercana al centroide; area: media ponderada por área '
+                         'de todas las celdas dentro del polígono del país')
+parser.add_argument('--polygons', default=os.path.join(EXTERNAL_DATA_DIR, 'ne_10m_admin_0_countries.zip'),
+                    help='Polígonos de países (p. ej. Natural Earth admin 0) para --aggregation area')
+parser.add_argument('--start-year', type=int, default=YEAR_START, help='Primer año a leer')
+parser.add_argument('--end-year', type=int, default=YEAR_END, help='Último año a leer')
+args = parser.parse_args()
 
 print("Cargando datos climáticos de ERA5...")
 
-nc_file1 = os.path.join(EXTERNAL_DATA_DIR, 'data_stream-moda_stepType-avgua.nc')
-nc_file2 = os.path.join(EXTERNAL_DATA_DIR, 'data_stream-moda_stepType-avgad.nc')
+era5_variables = ['t2m', 'tp', 'sp', 'd2m', 'u10', 'v10']
 
-print(f"Archivo 1: {os.path.basename(nc_file1)} ({os.path.getsize(nc_file1) / (1024*1024):.2f} MB)")
-print(f"Archivo 2: {os.path.basename(nc_file2)} ({os.path.getsize(nc_file2) / (1024*1024):.2f} MB)")
+# Bloques de 02 leídos directamente desde sus ZIP; si no hay manifiesto, los NetCDF
+# extraídos de la descarga única (o el propio ZIP heredado)
+if os.path.exists(os.path.join(CHUNKS_DIR, MANIFEST_FILE)):
+    index = Era5Index(CHUNKS_DIR)
+else:
+    legacy_files = [os.path.join(EXTERNAL_DATA_DIR, name) for name in (
+        'data_stream-moda_stepType-avgua.nc', 'data_stream-moda_stepType-avgad.nc'
+    )]
+    if not all(os.path.exists(path) for path in legacy_files):
+        legacy_files = [os.path.join(EXTERNAL_DATA_DIR, 'era5_climate_data_1990_2019.nc')]
+    index = Era5Index(EXTERNAL_DATA_DIR, paths=legacy_files)
 
-ds1 = xr.open_dataset(nc_file1)
-ds2 = xr.open_dataset(nc_file2)
+start, end = f'{args.start_year}-01-01', f'{args.end_year}-12-31'
+selected = index.select(era5_variables, start, end)
+print(f"Índice: {len(index.entries)} archivos NetCDF, {len(selected)} necesarios para {args.start_year}-{args.end_year}")
 
-ds = xr.merge([ds1, ds2], join='outer', compat='override')
+ds = index.open(era5_variables, start, end, chunk_size=args.chunk_size or None)
 
 print(f"\nDataset combinado - Variables: {list(ds.data_vars)}")
 
-country_coordinates = {
-    'Germany': (51.1657, 10.4515),
-    'United Kingdom': (55.3781, -3.4360),
-    'France': (46.2276, 2.2137),
-    'Italy': (41.8719, 12.5674),
-    'Spain': (40.4637, -3.7492),
-    'Poland': (51.9194, 19.1451),
-    'Netherlands': (52.1326, 5.2913),
-    'Belgium': (50.5039, 4.4699),
-    'Greece': (39.0742, 21.8243),
-    'Portugal': (39.3999, -8.2245),
-    'China': (35.8617, 104.1954),
-    'India': (20.5937, 78.9629),
-    'Japan': (36.2048, 138.2529),
-    'Indonesia': (-0.7893, 113.9213),
-    'Pakistan': (30.3753, 69.3451),
-    'Bangladesh': (23.6850, 90.3563),
-    'Russia': (61.5240, 105.3188),
-    'Turkey': (38.9637, 35.2433),
-    'Iran': (32.4279, 53.6880),
-    'Thailand': (15.8700, 100.9925),
-    'United States': (37.0902, -95.7129),
-    'Brazil': (-14.2350, -51.9253),
-    'Mexico': (23.6345, -102.5528),
-    'Canada': (56.1304, -106.3468),
-    'Argentina': (-38.4161, -63.6167),
-    'Colombia': (4.5709, -74.2973),
-    'Peru': (-9.1900, -75.0152),
-    'Venezuela': (6.4238, -66.5897),
-    'Chile': (-35.6751, -71.5430),
-    'Ecuador': (-1.8312, -78.1834),
-    'Nigeria': (9.0820, 8.6753),
-    'Ethiopia': (9.1450, 40.4897),
-    'Egypt': (26.8206, 30.8025),
-    'South Africa': (-30.5595, 22.9375),
-    'Tanzania': (-6.3690, 34.8888),
-    'Kenya': (-0.0236, 37.9062),
-    'Algeria': (28.0339, 1.6596),
-    'Sudan': (12.8628, 30.2176),
-    'Uganda': (1.3733, 32.2903),
-    'Australia': (-25.2744, 133.7751),
-    'Papua New Guinea': (-6.3150, 143.9555),
-    'New Zealand': (-40.9006, 174.8860),
-    'Fiji': (-17.7134, 178.0650),
-    'Solomon Islands': (-9.6457, 160.1562),
-    'Samoa': (-13.7590, -172.1046),
-    'Vanuatu': (-15.3767, 166.9592),
-    'Kiribati': (-3.3704, -168.7340),
-    'Tonga': (-21.1790, -175.1982),
-    'Micronesia': (7.4256, 150.5508)
-}
-
-print("\nExtrayendo datos por país...")
-climate_data = []
-
-for country, (lat, lon) in country_coordinates.items():
-    print(f"Procesando {country}...")
-    
-    point_data = ds.sel(latitude=lat, longitude=lon, method='nearest')
-    
-    df_country = point_data.to_dataframe().reset_index()
-    df_country['Country/Territory'] = country
-    
-    climate_data.append(df_country)
-
-climate_df = pd.concat(climate_data, ignore_index=True)
-
+country_coordinates = coordinates()
+
+if args.aggregation == 'area':
+    print("\nAgregando por polígono de país (media ponderada por cos(latitud))...")
+    polygons = load_country_polygons(args.polygons, list(country_coordinates))
+    countries, weights = load_or_build_weights(
+        EXTERNAL_DATA_DIR, polygons, ds['latitude'].values, ds['longitude'].values
+    )
+    climate_df = aggregate_countries(ds, countries, weights,
+                                     variables=era5_variables,
+                                     time_chunk=args.chunk_size or 12, workers=args.workers)
+else:
+    print("\nExtrayendo datos de todos los países en una sola pasada...")
+    climate_df = extract_points(ds, country_coordinates, workers=args.workers)
+
+climate_df[COUNTRY_COL] = encode_countries(climate_df[COUNTRY_COL])
 climate_df['Year'] = pd.to_datetime(climate_df['valid_time']).dt.year
 climate_df['Month'] = pd.to_datetime(climate_df['valid_time']).dt.month
 
-climate_annual = climate_df.groupby(['Country/Territory', 'Year']).agg({
+# Tabla mensual con las mismas unidades que la anual (para anomalías y extremos en 04b)
+climate_monthly = climate_df[['Country/Territory', 'Year', 'Month']].copy()
+climate_monthly['Temperature_C'] = climate_df['t2m'] - 273.15
+climate_monthly['Precipitation_mm'] = climate_df['tp'] * 1000
+climate_monthly['Surface_Pressure_Pa'] = climate_df['sp']
+climate_monthly['Dewpoint_K'] = climate_df['d2m']
+climate_monthly['Wind_Speed_ms'] = np.sqrt(climate_df['u10']**2 + climate_df['v10']**2)
+climate_monthly = climate_monthly.sort_values(['Country/Territory', 'Year', 'Month']).reset_index(drop=True)
+
+climate_annual = climate_df.groupby([COUNTRY_COL, 'Year'], observed=True).agg({
     't2m': 'mean',
     'tp': 'sum',
     'sp': 'mean',
@@ -119,10 +111,13 @@ print(f"Años: {climate_final['Year'].min()} - {climate_final['Year'].max()}")
 print(f"\nPrimeras filas:")
 print(climate_final.head())
 
-output_file = os.path.join(PROCESSED_DATA_DIR, 'climate_annual_1990_2019.csv')
-climate_final.to_csv(output_file, index=False)
+output_file = os.path.join(PROCESSED_DATA_DIR, 'climate_annual_1990_2019')
+write_table(climate_final, 'climate_annual_1990_2019', PROCESSED_DATA_DIR)
 
 print(f"\nArchivo guardado en: {output_file}")
 
-ds1.close()
-ds2.close()
\ No newline at end of file
+monthly_file = os.path.join(PROCESSED_DATA_DIR, 'climate_monthly_1990_2019')
+write_table(climate_monthly, 'climate_monthly_1990_2019', PROCESSED_DATA_DIR)
+print(f"Datos mensuales ({len(climate_monthly)} registros) guardados en: {monthly_file}")
+
+ds.close()
\ No newline at end of file
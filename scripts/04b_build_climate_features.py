@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.climate_features import BASE_PERIOD, build_features
+from scripts.utils.countries import COUNTRY_COL, encode_countries
+from scripts.utils.storage import read_table, write_table
+
+climate_variables = ['Temperature_C', 'Precipitation_mm', 'Surface_Pressure_Pa', 'Dewpoint_K', 'Wind_Speed_ms']
+
+parser = argparse.ArgumentParser(
+    description='Anomalías mensuales, rezagos y conteos de extremos climáticos por país'
+)
+parser.add_argument('--base-period', type=int, nargs=2, default=list(BASE_PERIOD), metavar=('INICIO', 'FIN'),
+                    help='Años de la climatología de referencia')
+parser.add_argument('--upper', type=float, default=0.9,
+                    help='Percentil (0-1) por encima del cual un mes cuenta como extremo alto')
+parser.add_argument('--lower', type=float, default=0.1,
+                    help='Percentil (0-1) por debajo del cual un mes cuenta como extremo bajo')
+parser.add_argument('--window', type=int, default=3, help='Años de la media móvil')
+parser.add_argument('--lags', type=int, nargs='+', default=[1, 2], help='Rezagos en años')
+args = parser.parse_args()
+
+monthly_df = read_table('climate_monthly_1990_2019', PROCESSED_DATA_DIR)
+print(f"Datos mensuales: {len(monthly_df)} registros, {monthly_df['Country/Territory'].nunique()} países")
+print(f"Climatología de referencia: {args.base_period[0]}-{args.base_period[1]}")
+
+start = time.time()
+anomalies_df, features_df = build_features(
+    monthly_df, climate_variables, base_period=tuple(args.base_period),
+    upper=args.upper, lower=args.lower, window=args.window, lags=args.lags
+)
+print(f"Características calculadas en {time.time() - start:.2f}s")
+for table in (anomalies_df, features_df):
+    table[COUNTRY_COL] = encode_countries(table[COUNTRY_COL])
+
+print(f"\nAnomalías mensuales: {len(anomalies_df)} registros")
+print(f"Características anuales: {len(features_df)} registros, {len(features_df.columns) - 2} columnas")
+
+write_table(anomalies_df, 'climate_monthly_anomalies_1990_2019', PROCESSED_DATA_DIR)
+write_table(features_df, 'climate_features_1990_2019', PROCESSED_DATA_DIR)
+print(f"\nArchivos guardados en: {PROCESSED_DATA_DIR}")
+print("  - climate_monthly_anomalies_1990_2019")
+print("  - climate_features_1990_2019")
+
+upper_col = f"Temperature_C_Months_Above_P{round(args.upper * 100)}"
+print(f"\nMeses cálidos extremos por año (media de todos los países, {upper_col}):")
+print(features_df.groupby('Year')[upper_col].mean().tail().round(2).to_string())
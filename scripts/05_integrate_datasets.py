@@ -1,12 +1,26 @@
-import pandas as pd
+import argparse
 import os
+import sys
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
 
-deaths_df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'deaths_selected_countries.csv'))
-population_df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'population_annual_1990_2019.csv'))
-climate_df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'climate_annual_1990_2019.csv'))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.countries import COUNTRY_COL, encode_countries
+from scripts.utils.storage import read_table, write_table
+
+parser = argparse.ArgumentParser(description='Integra mortalidad, población y clima por país y año')
+parser.add_argument('--climate-features', action='store_true',
+                    help='Añade las anomalías, rezagos y conteos de extremos de 04b_build_climate_features.py')
+args = parser.parse_args()
+
+deaths_df = read_table('deaths_selected_countries', PROCESSED_DATA_DIR)
+population_df = read_table('population_annual_1990_2019', PROCESSED_DATA_DIR)
+climate_df = read_table('climate_annual_1990_2019', PROCESSED_DATA_DIR)
+
+# Mismas categorías de país en todas las tablas: los merge se hacen sobre códigos enteros
+for table in (deaths_df, population_df, climate_df):
+    table[COUNTRY_COL] = encode_countries(table[COUNTRY_COL])
 
 print(f"Mortalidad: {len(deaths_df)} registros")
 print(f"Población: {len(population_df)} registros")
@@ -16,6 +30,12 @@ print(f"Clima: {len(climate_df)} registros\n")
 merged_df = deaths_df.merge(population_df, on=['Country/Territory', 'Year'], how='inner')
 merged_df = merged_df.merge(climate_df, on=['Country/Territory', 'Year'], how='inner')
 
+if args.climate_features:
+    features_df = read_table('climate_features_1990_2019', PROCESSED_DATA_DIR)
+    features_df[COUNTRY_COL] = encode_countries(features_df[COUNTRY_COL])
+    merged_df = merged_df.merge(features_df, on=['Country/Territory', 'Year'], how='left')
+    print(f"Características climáticas añadidas: {len(features_df.columns) - 2} columnas")
+
 print(f"Registros después de integración: {len(merged_df)}\n")
 
 death_causes = [col for col in deaths_df.columns if col not in ['Country/Territory', 'Year', 'Code']]
@@ -33,8 +53,8 @@ print(f"Países: {merged_df['Country/Territory'].nunique()}")
 print(f"Años: {merged_df['Year'].min()} - {merged_df['Year'].max()}")
 print(f"Columnas totales: {len(merged_df.columns)}")
 
-output_file = os.path.join(PROCESSED_DATA_DIR, 'integrated_data_1990_2019.csv')
-merged_df.to_csv(output_file, index=False)
+output_file = os.path.join(PROCESSED_DATA_DIR, 'integrated_data_1990_2019')
+write_table(merged_df, 'integrated_data_1990_2019', PROCESSED_DATA_DIR)
 
 print(f"\nArchivo guardado en: {output_file}")
 
@@ -1,50 +1,102 @@
-import pandas as pd
-import numpy as np
+import argparse
 import os
+import sys
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
 RESULTS_DIR = os.path.join(PROJECT_DIR, 'results')
-os.makedirs(RESULTS_DIR, exist_ok=True)
 
-print("Cargando dataset integrado...")
-df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'integrated_data_1990_2019.csv'))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.countries import continents
+from scripts.utils.correlation import METHODS, correlation_matrix, stack_variables, to_long, transform
+from scripts.utils.significance import bootstrap_intervals, fdr_qvalues, permutation_pvalues
+from scripts.utils.storage import read_table, table_columns
 
-print(f"Dataset: {len(df)} registros, {len(df.columns)} columnas\n")
+STRATA = {'country': 'Country/Territory', 'continent': 'Continent'}
 
-climate_vars = ['Temperature_C', 'Precipitation_mm', 'Surface_Pressure_Pa', 'Dewpoint_K', 'Wind_Speed_ms']
-rate_cols = [col for col in df.columns if col.endswith('_Rate_per_100k')]
 
-print(f"Variables climáticas: {len(climate_vars)}")
-print(f"Causas de muerte (tasas): {len(rate_cols)}\n")
+def parse_args():
+    parser = argparse.ArgumentParser(description='Correlaciones entre variables climáticas y tasas de mortalidad')
+    parser.add_argument('--method', choices=METHODS, default='pearson',
+                        help='pearson, spearman (rangos) o partial (controlando por --controls)')
+    parser.add_argument('--controls', nargs='+', default=['Year', 'Population'],
+                        help='Variables de control para la correlación parcial')
+    parser.add_argument('--by', choices=sorted(STRATA),
+                        help='Calcula las correlaciones por separado para cada país o continente')
+    parser.add_argument('--permutations', type=int, default=1000,
+                        help='Permutaciones para los p-valores (0 para omitirlos)')
+    parser.add_argument('--bootstrap', type=int, default=1000,
+                        help='Remuestreos bootstrap para los intervalos de confianza (0 para omitirlos)')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Nivel de confianza de los intervalos bootstrap')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Semilla del generador aleatorio')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Procesos para repartir permutaciones y remuestreos')
+    return parser.parse_args()
 
 
-correlations = []
+def main():
+    args = parse_args()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
 
-for rate_col in rate_cols:
-    cause = rate_col.replace('_Rate_per_100k', '')
-    
-    for climate_var in climate_vars:
-        corr = df[rate_col].corr(df[climate_var])
-        correlations.append({
-            'Cause': cause,
-            'Climate_Variable': climate_var,
-            'Correlation': corr
-        })
+    climate_vars = ['Temperature_C', 'Precipitation_mm', 'Surface_Pressure_Pa', 'Dewpoint_K', 'Wind_Speed_ms']
+    rate_cols = [col for col in table_columns('integrated_data_1990_2019', PROCESSED_DATA_DIR)
+                 if col.endswith('_Rate_per_100k')]
 
-corr_df = pd.DataFrame(correlations)
-corr_df = corr_df.sort_values('Correlation', ascending=False, key=abs)
+    print("Cargando dataset integrado...")
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR,
+                    columns=['Country/Territory', 'Year'] + climate_vars + ['Population'] + rate_cols)
+    df['Continent'] = continents(df['Country/Territory'])
 
-output_file = os.path.join(RESULTS_DIR, 'climate_mortality_correlations.csv')
-corr_df.to_csv(output_file, index=False)
+    print(f"Dataset: {len(df)} registros, {len(df.columns)} columnas\n")
 
-print(f"Correlaciones guardadas en: {output_file}\n")
+    print(f"Variables climáticas: {len(climate_vars)}")
+    print(f"Causas de muerte (tasas): {len(rate_cols)}\n")
 
-print("Top 10 correlaciones más fuertes (positivas):")
-print(corr_df.head(10))
+    by = STRATA.get(args.by)
+    labels, X, Y, Z = stack_variables(df, rate_cols, climate_vars, args.method, args.controls, by)
+    X_t, Y_t = transform(X, Y, Z, args.method)
+    r, n = correlation_matrix(X_t, Y_t)
+    values = {'Correlation': r, 'N': n.astype(int)}
 
-print("\nTop 10 correlaciones más fuertes (negativas):")
-print(corr_df.tail(10))
+    if args.permutations > 0:
+        print(f"Test de permutación ({args.permutations} permutaciones)...")
+        p_values = permutation_pvalues(X_t, Y_t, r, args.permutations, seed=args.seed, workers=args.workers)
+        values['P_Value'] = p_values
+        values['Q_Value'] = fdr_qvalues(p_values)
 
-print("\nEstadísticas descriptivas del dataset:")
-print(df[climate_vars + ['Population']].describe())
\ No newline at end of file
+    if args.bootstrap > 0:
+        print(f"Intervalos de confianza bootstrap ({args.bootstrap} remuestreos)...")
+        values['CI_Low'], values['CI_High'] = bootstrap_intervals(
+            X, Y, Z, args.method, args.bootstrap, args.confidence, seed=args.seed, workers=args.workers
+        )
+
+    corr_df = to_long(labels, rate_cols, climate_vars, values, by=by, names=('Cause', 'Climate_Variable'))
+    corr_df['Cause'] = corr_df['Cause'].str.replace('_Rate_per_100k', '', regex=False)
+    corr_df = corr_df.sort_values('Correlation', ascending=False, key=abs)
+
+    suffix = '' if args.method == 'pearson' else f'_{args.method}'
+    if args.by:
+        suffix += f'_by_{args.by}'
+    output_file = os.path.join(RESULTS_DIR, f'climate_mortality_correlations{suffix}.csv')
+    corr_df.to_csv(output_file, index=False)
+
+    print(f"Correlaciones guardadas en: {output_file}\n")
+
+    print("Top 10 correlaciones más fuertes (positivas):")
+    print(corr_df.head(10))
+
+    print("\nTop 10 correlaciones más fuertes (negativas):")
+    print(corr_df.tail(10))
+
+    if 'Q_Value' in corr_df:
+        significant = (corr_df['Q_Value'] < 0.05).sum()
+        print(f"\nCorrelaciones significativas (q < 0.05, FDR): {significant} de {corr_df['Q_Value'].notna().sum()}")
+
+    print("\nEstadísticas descriptivas del dataset:")
+    print(df[climate_vars + ['Population']].describe())
+
+
+if __name__ == '__main__':
+    main()
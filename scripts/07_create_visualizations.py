@@ -1,82 +1,144 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
+import argparse
 import os
+import re
+import sys
+import time
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
 RESULTS_DIR = os.path.join(PROJECT_DIR, 'results')
 FIGURES_DIR = os.path.join(RESULTS_DIR, 'figures')
-os.makedirs(FIGURES_DIR, exist_ok=True)
-
-print("Cargando datos...")
-df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'integrated_data_1990_2019.csv'))
-corr_df = pd.read_csv(os.path.join(RESULTS_DIR, 'climate_mortality_correlations.csv'))
-
-sns.set_style("whitegrid")
-
-print("Creando visualización 1: Top 20 correlaciones")
-top_corr = corr_df.nlargest(20, 'Correlation', keep='all')
-
-plt.figure(figsize=(12, 8))
-plt.barh(range(len(top_corr)), top_corr['Correlation'].values)
-plt.yticks(range(len(top_corr)), 
-           [f"{row['Cause'][:30]} vs {row['Climate_Variable']}" 
-            for _, row in top_corr.iterrows()], fontsize=8)
-plt.xlabel('Correlation Coefficient')
-plt.title('Top 20 Strongest Climate-Mortality Correlations')
-plt.tight_layout()
-plt.savefig(os.path.join(FIGURES_DIR, '01_top_correlations.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-print("Creando visualización 2: Temperatura vs Neoplasms")
-plt.figure(figsize=(10, 6))
-plt.scatter(df['Temperature_C'], df['Neoplasms_Rate_per_100k'], alpha=0.3)
-plt.xlabel('Temperature (°C)')
-plt.ylabel('Neoplasms Death Rate (per 100k)')
-plt.title(f'Temperature vs Cancer Mortality (r={df["Temperature_C"].corr(df["Neoplasms_Rate_per_100k"]):.3f})')
-plt.tight_layout()
-plt.savefig(os.path.join(FIGURES_DIR, '02_temp_vs_neoplasms.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-continent_mapping = {
-    'Germany': 'Europe', 'United Kingdom': 'Europe', 'France': 'Europe', 'Italy': 'Europe',
-    'Spain': 'Europe', 'Poland': 'Europe', 'Netherlands': 'Europe', 'Belgium': 'Europe',
-    'Greece': 'Europe', 'Portugal': 'Europe',
-    'China': 'Asia', 'India': 'Asia', 'Japan': 'Asia', 'Indonesia': 'Asia',
-    'Pakistan': 'Asia', 'Bangladesh': 'Asia', 'Russia': 'Asia', 'Turkey': 'Asia',
-    'Iran': 'Asia', 'Thailand': 'Asia',
-    'United States': 'Americas', 'Brazil': 'Americas', 'Mexico': 'Americas', 'Canada': 'Americas',
-    'Argentina': 'Americas', 'Colombia': 'Americas', 'Peru': 'Americas', 'Venezuela': 'Americas',
-    'Chile': 'Americas', 'Ecuador': 'Americas',
-    'Nigeria': 'Africa', 'Ethiopia': 'Africa', 'Egypt': 'Africa', 'South Africa': 'Africa',
-    'Tanzania': 'Africa', 'Kenya': 'Africa', 'Algeria': 'Africa', 'Sudan': 'Africa',
-    'Uganda': 'Africa',
-    'Australia': 'Oceania', 'Papua New Guinea': 'Oceania', 'New Zealand': 'Oceania',
-    'Fiji': 'Oceania', 'Solomon Islands': 'Oceania', 'Samoa': 'Oceania',
-    'Vanuatu': 'Oceania', 'Kiribati': 'Oceania', 'Tonga': 'Oceania', 'Micronesia': 'Oceania'
-}
-
-df['Continent'] = df['Country/Territory'].map(continent_mapping)
-
-temp_by_continent = df.groupby(['Year', 'Continent'])['Temperature_C'].mean().reset_index()
-
-plt.figure(figsize=(12, 6))
-for continent in temp_by_continent['Continent'].unique():
-    data = temp_by_continent[temp_by_continent['Continent'] == continent]
-    plt.plot(data['Year'], data['Temperature_C'], marker='o', label=continent, linewidth=2)
-
-plt.xlabel('Year')
-plt.ylabel('Average Temperature (°C)')
-plt.title('Temperature Evolution by Continent (1990-2019)')
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(os.path.join(FIGURES_DIR, '03_temp_evolution_by_continent.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-print(f"\nVisualizaciones guardadas en: {FIGURES_DIR}")
-print("Archivos creados:")
-print("  - 01_top_correlations.png")
-print("  - 02_temp_vs_neoplasms.png")
-print("  - 03_temp_evolution_by_continent.png")
\ No newline at end of file
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.countries import continents
+from scripts.utils.figure_jobs import FORMATS, FigureJob, render_figures
+from scripts.utils.storage import read_table
+
+# Con más puntos que esto el diagrama de dispersión se agrega en celdas hexagonales
+SCATTER_MAX_POINTS = 20000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Genera las figuras del análisis')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['png'],
+                        help='Formatos de salida (png, svg, pdf)')
+    parser.add_argument('--dpi', type=int, default=300, help='Resolución de las figuras raster')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Procesos que generan figuras en paralelo')
+    parser.add_argument('--per-country', action='store_true',
+                        help='Genera además una figura por país en figures/countries/')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenera todas las figuras aunque sus datos no hayan cambiado')
+    return parser.parse_args()
+
+
+def set_style():
+    sns.set_style("whitegrid")
+
+
+def top_correlations_figure(top_corr):
+    labels = (top_corr['Cause'].str[:30] + ' vs ' + top_corr['Climate_Variable']).tolist()
+    fig = plt.figure(figsize=(12, 8))
+    plt.barh(range(len(top_corr)), top_corr['Correlation'].values)
+    plt.yticks(range(len(top_corr)), labels, fontsize=8)
+    plt.xlabel('Correlation Coefficient')
+    plt.title('Top 20 Strongest Climate-Mortality Correlations')
+    plt.tight_layout()
+    return fig
+
+
+def temperature_neoplasms_figure(data, max_points=SCATTER_MAX_POINTS):
+    fig = plt.figure(figsize=(10, 6))
+    if len(data) > max_points:
+        plt.hexbin(data['Temperature_C'], data['Neoplasms_Rate_per_100k'], gridsize=80, bins='log', mincnt=1,
+                   cmap='viridis')
+        plt.colorbar(label='Observations (log)')
+    else:
+        plt.scatter(data['Temperature_C'], data['Neoplasms_Rate_per_100k'], alpha=0.3)
+    plt.xlabel('Temperature (°C)')
+    plt.ylabel('Neoplasms Death Rate (per 100k)')
+    plt.title(f'Temperature vs Cancer Mortality (r={data["Temperature_C"].corr(data["Neoplasms_Rate_per_100k"]):.3f})')
+    plt.tight_layout()
+    return fig
+
+
+def continent_temperature_figure(temp_by_continent):
+    # temp_by_continent: años x continentes, todas las series en una sola llamada
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot(temp_by_continent.index, temp_by_continent.to_numpy(), marker='o', linewidth=2)
+    plt.xlabel('Year')
+    plt.ylabel('Average Temperature (°C)')
+    plt.title('Temperature Evolution by Continent (1990-2019)')
+    plt.legend(temp_by_continent.columns)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+
+def country_figure(data, country):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(data['Year'], data['Temperature_C'], color='tab:red', marker='o', linewidth=2)
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Temperature (°C)', color='tab:red')
+    ax_rate = ax.twinx()
+    ax_rate.plot(data['Year'], data['Neoplasms_Rate_per_100k'], color='tab:blue', marker='s', linewidth=2)
+    ax_rate.set_ylabel('Neoplasms Death Rate (per 100k)', color='tab:blue')
+    ax_rate.grid(False)
+    ax.set_title(f'{country}: Temperature and Cancer Mortality (1990-2019)')
+    fig.tight_layout()
+    return fig
+
+
+def figure_jobs(df, corr_df, per_country=False):
+    jobs = [
+        FigureJob('01_top_correlations', top_correlations_figure,
+                  corr_df.nlargest(20, 'Correlation', keep='all')[['Cause', 'Climate_Variable', 'Correlation']]),
+        FigureJob('02_temp_vs_neoplasms', temperature_neoplasms_figure,
+                  df[['Temperature_C', 'Neoplasms_Rate_per_100k']]),
+        FigureJob('03_temp_evolution_by_continent', continent_temperature_figure,
+                  df.groupby(['Year', 'Continent'], observed=True)['Temperature_C'].mean().unstack()),
+    ]
+    if per_country:
+        columns = ['Year', 'Temperature_C', 'Neoplasms_Rate_per_100k']
+        for country, data in df.groupby('Country/Territory', sort=True, observed=True):
+            name = re.sub(r'[^\w-]+', '_', country).strip('_')
+            jobs.append(FigureJob(f'countries/{name}', country_figure,
+                                  data[columns].sort_values('Year').reset_index(drop=True),
+                                  params={'country': country}))
+    return jobs
+
+
+def main():
+    args = parse_args()
+
+    print("Cargando datos...")
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR,
+                    columns=['Country/Territory', 'Year', 'Temperature_C', 'Neoplasms_Rate_per_100k'])
+    corr_df = pd.read_csv(os.path.join(RESULTS_DIR, 'climate_mortality_correlations.csv'))
+    df['Continent'] = continents(df['Country/Territory'])
+
+    jobs = figure_jobs(df, corr_df, per_country=args.per_country)
+    print(f"Generando {len(jobs)} figuras ({', '.join(args.formats)}) con {args.workers} procesos")
+    start = time.time()
+    status = render_figures(jobs, FIGURES_DIR, formats=args.formats, dpi=args.dpi, workers=args.workers,
+                            force=args.force, setup=set_style)
+    print(f"Completado en {time.time() - start:.1f}s")
+
+    failed = [name for name, result in status.items() if result == 'failed']
+    print(f"\nVisualizaciones guardadas en: {FIGURES_DIR}")
+    print("Archivos creados:")
+    for job in jobs:
+        if status[job.name] == 'rendered':
+            for fmt in args.formats:
+                print(f"  - {job.name}.{fmt}")
+    if failed:
+        sys.exit(f"Figuras con error: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
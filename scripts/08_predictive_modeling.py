@@ -3,64 +3,291 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import joblib
+import argparse
+import json
 import os
+import sys
+import time
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROCESSED_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
 MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
 RESULTS_DIR = os.path.join(PROJECT_DIR, 'results')
 os.makedirs(MODELS_DIR, exist_ok=True)
 
-df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'integrated_data_1990_2019.csv'))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.explain import explain, save_explanations
+from scripts.utils.model_registry import ModelRegistry, data_hash
+from scripts.utils.multi_target import (
+    STRATEGIES, build_multi_target_model, metrics_by_target, permutation_importance_by_target
+)
+from scripts.utils.storage import read_table, table_columns
+from scripts.utils.tuning import candidate_configs, successive_halving, tuning_store
 
 climate_features = ['Temperature_C', 'Precipitation_mm', 'Surface_Pressure_Pa', 'Dewpoint_K', 'Wind_Speed_ms']
 target = 'Neoplasms_Rate_per_100k'
+FOREST_PARAMS = {'n_estimators': 100, 'max_depth': 10, 'random_state': 42}
+TEST_SIZE = 0.2
+BEST_PARAMS_FILE = os.path.join(MODELS_DIR, 'rf_best_params.json')
 
-print(f"\nModelo: Predicción de {target}")
-print(f"Features climáticos: {climate_features}")
 
-X = df[climate_features]
-y = df[target]
+def parse_args():
+    parser = argparse.ArgumentParser(description='Modelo Random Forest de mortalidad a partir de variables climáticas')
+    parser.add_argument('--all-causes', action='store_true',
+                        help='Entrena un modelo multi-objetivo para todas las causas de muerte')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='joint',
+                        help='joint: un único bosque multi-salida; per-cause: un bosque por causa en paralelo')
+    parser.add_argument('--workers', type=int, default=-1,
+                        help='Procesos/hilos para el entrenamiento (-1 usa todos los núcleos)')
+    parser.add_argument('--tuned', action='store_true',
+                        help=f'Usa los hiperparámetros que el subcomando tune encontró para {target} '
+                             f'({os.path.basename(BEST_PARAMS_FILE)}); no aplicable con --all-causes')
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    subparsers = parser.add_subparsers(dest='command')
+    tune = subparsers.add_parser('tune', help='Busca hiperparámetros con validación cruzada agrupada por país')
+    tune.add_argument('--target', default=target, help='Columna objetivo')
+    tune.add_argument('--splits', type=int, default=5, help='Número de folds (GroupKFold por país)')
+    tune.add_argument('--min-trees', type=int, default=25, help='Árboles por bosque en la primera ronda')
+    tune.add_argument('--max-trees', type=int, default=400, help='Máximo de árboles por bosque')
+    tune.add_argument('--factor', type=int, default=3,
+                      help='Factor de successive halving (configuraciones conservadas: 1/factor por ronda)')
+    tune.add_argument('--n-candidates', type=int, help='Muestra aleatoria de configuraciones (por defecto toda la rejilla)')
+    tune.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Procesos que ajustan folds en paralelo')
+    tune.add_argument('--seed', type=int, default=42, help='Semilla')
+    tune.add_argument('--no-cache', action='store_true',
+                      help='No reutiliza resultados de búsquedas anteriores')
 
-print(f"\nDatos de entrenamiento: {len(X_train)}")
-print(f"Datos de prueba: {len(X_test)}")
+    explain_parser = subparsers.add_parser(
+        'explain', help='Precalcula TreeSHAP, curvas ICE y dependencia parcial del modelo registrado'
+    )
+    explain_parser.add_argument('--version', type=int, help='Versión de rf_neoplasms (por defecto la última)')
+    explain_parser.add_argument('--grid-size', type=int, default=20,
+                                help='Puntos de la rejilla de ICE/dependencia parcial por variable')
+    explain_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                                help='Procesos que calculan TreeSHAP en paralelo (un árbol por tarea)')
+    return parser.parse_args()
 
-print("\nEntrenando Random Forest...")
-model = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42, n_jobs=-1)
-model.fit(X_train, y_train)
 
-y_pred = model.predict(X_test)
+def load_best_params():
+    # Best configuration of every tuned target; files from before the per-target layout hold a single one
+    try:
+        with open(BEST_PARAMS_FILE, encoding='utf-8') as f:
+            best = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {best['target']: best} if 'params' in best else best
 
-mae = mean_absolute_error(y_test, y_pred)
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-r2 = r2_score(y_test, y_pred)
 
-print("\nResultados del modelo:")
-print(f"  MAE: {mae:.2f}")
-print(f"  RMSE: {rmse:.2f}")
-print(f"  R2 Score: {r2:.3f}")
+def forest_params(tuned, model_target=None):
+    # Forest parameters and the tuning summary recorded with the model (None when not tuned)
+    if not tuned:
+        return dict(FOREST_PARAMS), None
+    if model_target is None:
+        sys.exit("--tuned no se puede usar con --all-causes: tune busca hiperparámetros para un único objetivo")
+    best = load_best_params().get(model_target)
+    if best is None:
+        sys.exit(f"No hay hiperparámetros ajustados para {model_target} en {BEST_PARAMS_FILE}. "
+                 f"Ejecuta primero: 08_predictive_modeling.py tune --target {model_target}")
+    print(f"Hiperparámetros ajustados para {model_target} ({os.path.basename(BEST_PARAMS_FILE)}): {best['params']}")
+    tuning = {key: best[key] for key in ('cv', 'r2_mean', 'r2_std', 'rmse_mean')}
+    return {**best['params'], 'random_state': 42}, tuning
 
-feature_importance = pd.DataFrame({
-    'Feature': climate_features,
-    'Importance': model.feature_importances_
-}).sort_values('Importance', ascending=False)
 
-print("\nImportancia de features:")
-print(feature_importance)
+def evaluation_info(n_train, n_test, tuning):
+    # How the registered metrics were obtained, shown by the dashboard
+    return {'split': 'holdout', 'test_size': TEST_SIZE, 'random_state': 42,
+            'n_train': n_train, 'n_test': n_test, 'tuning': tuning}
 
-model_file = os.path.join(MODELS_DIR, 'rf_neoplasms_model.pkl')
-joblib.dump(model, model_file)
-print(f"\nModelo guardado en: {model_file}")
 
-results_df = pd.DataFrame({
-    'Actual': y_test,
-    'Predicted': y_pred,
-    'Error': y_test - y_pred
-})
+def tune(args):
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR,
+                    columns=['Country/Territory'] + climate_features + [args.target])
+    configs = candidate_configs(n_candidates=args.n_candidates, seed=args.seed)
 
-results_file = os.path.join(RESULTS_DIR, 'model_predictions.csv')
-results_df.to_csv(results_file, index=False)
-print(f"Predicciones guardadas en: {results_file}")
\ No newline at end of file
+    print(f"\nBúsqueda de hiperparámetros para {args.target}")
+    print(f"{len(configs)} configuraciones, GroupKFold({args.splits}) por país, "
+          f"{df['Country/Territory'].nunique()} países, {args.workers} procesos\n")
+
+    store = None if args.no_cache else tuning_store(os.path.join(MODELS_DIR, 'tuning_cache'))
+    start = time.time()
+    results = successive_halving(
+        df[climate_features], df[args.target], df['Country/Territory'], configs,
+        n_splits=args.splits, min_trees=args.min_trees, max_trees=args.max_trees,
+        factor=args.factor, workers=args.workers, store=store, seed=args.seed
+    )
+    print(f"\nBúsqueda completada en {time.time() - start:.1f}s")
+
+    results_file = os.path.join(RESULTS_DIR, 'rf_tuning_results.csv')
+    results.drop(columns='config').to_csv(results_file, index=False)
+    print(f"Resultados guardados en: {results_file}")
+
+    best = results.iloc[0]
+    best_params = {**json.loads(best['config']), 'n_estimators': int(best['n_estimators'])}
+    print("\nMejor configuración:")
+    print(f"  {best_params}")
+    print(f"  R2 (CV por país): {best['r2_mean']:.3f} ± {best['r2_std']:.3f}")
+    print(f"  RMSE (CV por país): {best['rmse_mean']:.2f}")
+
+    tuned = load_best_params()
+    tuned[args.target] = {
+        'target': args.target,
+        'params': best_params,
+        'cv': {'splits': args.splits, 'groups': 'Country/Territory'},
+        'r2_mean': best['r2_mean'],
+        'r2_std': best['r2_std'],
+        'rmse_mean': best['rmse_mean'],
+    }
+    with open(BEST_PARAMS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(tuned, f, indent=2)
+    print(f"Hiperparámetros de {args.target} guardados en: {BEST_PARAMS_FILE} (usar con --tuned)")
+
+
+def explain_model(registry, args):
+    model, metadata = registry.load('rf_neoplasms', args.version)
+    model_dir = registry.version_dir('rf_neoplasms', metadata['version'])
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR,
+                    columns=['Country/Territory', 'Year'] + metadata['features'])
+
+    print(f"\nExplicaciones de rf_neoplasms v{metadata['version']}: {len(df)} filas, "
+          f"{len(model.estimators_)} árboles, {args.workers} procesos")
+    start = time.time()
+    explanation = explain(model, df, metadata['features'], grid_size=args.grid_size, workers=args.workers)
+    print(f"Cálculo completado en {time.time() - start:.1f}s")
+
+    gap = np.abs(explanation['base'] + explanation['shap'].sum(axis=1) - explanation['prediction']).max()
+    print(f"Valor base: {float(explanation['base']):.2f} (error máximo de aditividad: {gap:.2e})")
+    mean_abs = pd.Series(np.abs(explanation['shap']).mean(axis=0), index=metadata['features'])
+    print("\nImportancia SHAP media (|valor|):")
+    print(mean_abs.sort_values(ascending=False).to_string())
+
+    path = save_explanations(model_dir, explanation, data_hash(df))
+    print(f"\nExplicaciones guardadas en: {path}")
+
+
+def train_single_target(registry, params, tuning):
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR, columns=climate_features + [target])
+
+    print(f"\nModelo: Predicción de {target}")
+    print(f"Features climáticos: {climate_features}")
+
+    X = df[climate_features]
+    y = df[target]
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=42)
+
+    print(f"\nDatos de entrenamiento: {len(X_train)}")
+    print(f"Datos de prueba: {len(X_test)}")
+
+    print("\nEntrenando Random Forest...")
+    model = RandomForestRegressor(**params, n_jobs=-1)
+    model.fit(X_train, y_train)
+
+    y_pred = model.predict(X_test)
+
+    mae = mean_absolute_error(y_test, y_pred)
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    r2 = r2_score(y_test, y_pred)
+
+    print("\nResultados del modelo:")
+    print(f"  MAE: {mae:.2f}")
+    print(f"  RMSE: {rmse:.2f}")
+    print(f"  R2 Score: {r2:.3f}")
+
+    feature_importance = pd.DataFrame({
+        'Feature': climate_features,
+        'Importance': model.feature_importances_
+    }).sort_values('Importance', ascending=False)
+
+    print("\nImportancia de features:")
+    print(feature_importance)
+
+    results_df = pd.DataFrame({
+        'Actual': y_test,
+        'Predicted': y_pred,
+        'Error': y_test - y_pred
+    })
+
+    metadata = registry.register(
+        'rf_neoplasms', model, climate_features, target, df,
+        metrics={'mae': mae, 'rmse': rmse, 'r2': r2},
+        predictions=results_df,
+        evaluation=evaluation_info(len(X_train), len(X_test), tuning)
+    )
+    print(f"\nModelo registrado: {metadata['name']} v{metadata['version']} "
+          f"(scikit-learn {metadata['sklearn_version']}) en {registry.version_dir(metadata['name'], metadata['version'])}")
+
+    results_file = os.path.join(RESULTS_DIR, 'model_predictions.csv')
+    results_df.to_csv(results_file, index=False)
+    print(f"Predicciones guardadas en: {results_file}")
+
+
+def train_all_causes(registry, strategy, workers, params, tuning):
+    rate_cols = [col for col in table_columns('integrated_data_1990_2019', PROCESSED_DATA_DIR)
+                 if col.endswith('_Rate_per_100k')]
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR, columns=climate_features + rate_cols)
+
+    print(f"\nModelo multi-objetivo ({strategy}): {len(rate_cols)} causas")
+    print(f"Features climáticos: {climate_features}")
+
+    X = df[climate_features]
+    Y = df[rate_cols]
+    X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=TEST_SIZE, random_state=42)
+
+    print(f"\nDatos de entrenamiento: {len(X_train)}")
+    print(f"Datos de prueba: {len(X_test)}")
+
+    print("\nEntrenando Random Forest multi-objetivo...")
+    start = time.time()
+    model = build_multi_target_model(strategy, workers=workers, **params)
+    model.fit(X_train, Y_train)
+    print(f"Entrenamiento completado en {time.time() - start:.1f}s")
+
+    causes = [col.replace('_Rate_per_100k', '') for col in rate_cols]
+    cause_metrics = metrics_by_target(Y_test, model.predict(X_test), causes)
+    importances = permutation_importance_by_target(model, X_test, Y_test, climate_features, causes)
+    summary = cause_metrics.merge(importances.add_prefix('Importance_'), left_on='Target', right_index=True)
+    summary = summary.rename(columns={'Target': 'Cause'}).sort_values('R2', ascending=False)
+
+    print("\nResultados por causa (R2 en test):")
+    print(summary[['Cause', 'MAE', 'RMSE', 'R2']].to_string(index=False))
+    print(f"\nR2 mediano: {summary['R2'].median():.3f}")
+
+    metadata = registry.register(
+        f"rf_all_causes_{strategy.replace('-', '_')}", model, climate_features, rate_cols, df,
+        metrics={
+            'r2_median': summary['R2'].median(),
+            'r2_mean': summary['R2'].mean(),
+            'rmse_mean': summary['RMSE'].mean(),
+        },
+        params={'strategy': strategy, **params},
+        tables={'cause_metrics': summary},
+        evaluation=evaluation_info(len(X_train), len(X_test), tuning)
+    )
+    print(f"\nModelo registrado: {metadata['name']} v{metadata['version']} "
+          f"en {registry.version_dir(metadata['name'], metadata['version'])}")
+
+    summary_file = os.path.join(RESULTS_DIR, 'model_cause_metrics.csv')
+    summary.to_csv(summary_file, index=False)
+    print(f"Métricas e importancias por causa guardadas en: {summary_file}")
+
+
+def main():
+    args = parse_args()
+    if args.command == 'tune':
+        tune(args)
+        return
+
+    registry = ModelRegistry(os.path.join(MODELS_DIR, 'registry'))
+    if args.command == 'explain':
+        explain_model(registry, args)
+        return
+
+    params, tuning = forest_params(args.tuned, None if args.all_causes else target)
+    if args.all_causes:
+        train_all_causes(registry, args.strategy, args.workers, params, tuning)
+    else:
+        train_single_target(registry, params, tuning)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,9 +3,9 @@ Temporal Prediction Model using Prophet
 Creates forecasts for mortality rates (2020-2030) based on climate trends
 """
 
+import argparse
+import functools
 import pandas as pd
-import numpy as np
-from prophet import Prophet
 import warnings
 warnings.filterwarnings('ignore')
 import os
@@ -15,7 +15,13 @@ import sys
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
-from scripts.utils.config import PROCESSED_DATA_DIR, RESULTS_DIR
+from scripts.utils.config import MODELS_DIR, PROCESSED_DATA_DIR, RESULTS_DIR
+from scripts.utils.climate_scenarios import SCENARIO_KINDS, ClimateScenarios, parse_offsets
+from scripts.utils.forecasting import (
+    ForecastTask, fit_prophet_forecast, fit_trend_forecasts, prophet_cache_key,
+    prophet_model_store, run_forecasts
+)
+from scripts.utils.storage import read_table
 
 def prepare_prophet_data(df, country, mortality_cause, climate_vars):
     """
@@ -30,118 +36,75 @@ def prepare_prophet_data(df, country, mortality_cause, climate_vars):
     Returns:
         DataFrame formatted for Prophet (ds, y, and regressors)
     """
-    country_data = df[df['Country/Territory'] == country].copy()
-    country_data = country_data.sort_values('Year')
+    country_data = df[df['Country/Territory'] == country].sort_values('Year')
     
-    # Create Prophet dataframe
-    prophet_df = pd.DataFrame({
-        'ds': pd.to_datetime(country_data['Year'], format='%Y'),
-        'y': country_data[mortality_cause]
-    })
-    
-    # Add climate variables as regressors
+    # Create Prophet dataframe with climate variables as regressors
+    columns = {
+        'ds': pd.to_datetime(country_data['Year'], format='%Y').values,
+        'y': country_data[mortality_cause].values
+    }
     for var in climate_vars:
-        prophet_df[var] = country_data[var].values
+        columns[var] = country_data[var].values
+    prophet_df = pd.DataFrame(columns)
     
     return prophet_df
 
-def train_prophet_model(train_df, climate_vars):
-    """
-    Train Prophet model with climate variables as regressors
-    
-    Args:
-        train_df: Training data formatted for Prophet
-        climate_vars: List of climate variables
-    
-    Returns:
-        Trained Prophet model
-    """
-    model = Prophet(
-        yearly_seasonality=False,
-        weekly_seasonality=False,
-        daily_seasonality=False,
-        changepoint_prior_scale=0.05,
-        seasonality_prior_scale=10
-    )
-    
-    # Add climate variables as regressors
-    for var in climate_vars:
-        model.add_regressor(var)
-    
-    model.fit(train_df)
-    return model
-
-def create_future_climate_scenarios(train_df, climate_vars, periods=11):
+def build_forecast_tasks(df, countries, causes, climate_vars, periods=11, scenarios=None):
     """
-    Create future climate scenarios for prediction
-    Uses linear trend extrapolation
+    Build one forecast task per (country, cause) pair
     
     Args:
-        train_df: Historical data
+        df: Integrated dataset
+        countries: Countries to forecast
+        causes: Mortality causes to predict
         climate_vars: Climate variables
         periods: Number of years to forecast
+        scenarios: Optional ClimateScenarios shared by every task of a country
     
     Returns:
-        DataFrame with future dates and climate projections
+        List of ForecastTask
     """
-    future = pd.DataFrame({
-        'ds': pd.date_range(start='2020', periods=periods, freq='YS')
-    })
-    
-    # Project climate variables using linear trend
-    for var in climate_vars:
-        # Fit linear trend to historical data
-        x = np.arange(len(train_df))
-        y = train_df[var].values
-        coeffs = np.polyfit(x, y, 1)
-        
-        # Extrapolate
-        future_x = np.arange(len(train_df), len(train_df) + periods)
-        future[var] = np.polyval(coeffs, future_x)
-    
-    return future
+    tasks = []
+    by_country = dict(tuple(df[df['Country/Territory'].isin(countries)].groupby('Country/Territory', observed=True)))
+    for country in countries:
+        country_df = by_country.get(country, df.iloc[:0])
+        future_df = scenarios.future_frame(country) if scenarios is not None else None
+        for cause in causes:
+            train_df = prepare_prophet_data(country_df, country, cause, climate_vars)
+            tasks.append(ForecastTask(country, cause, train_df, climate_vars, periods, future_df))
+    return tasks
 
-def generate_predictions_for_country(df, country, top_causes, climate_vars):
-    """
-    Generate predictions for a specific country
-    
-    Args:
-        df: Integrated dataset
-        country: Country name
-        top_causes: List of top mortality causes to predict
-        climate_vars: Climate variables
-    
-    Returns:
-        Dictionary with predictions for each cause
-    """
-    predictions = {}
-    
-    for cause in top_causes:
-        try:
-            # Prepare data
-            train_df = prepare_prophet_data(df, country, cause, climate_vars)
-            
-            # Train model
-            model = train_prophet_model(train_df, climate_vars)
-            
-            # Create future scenarios
-            future = create_future_climate_scenarios(train_df, climate_vars, periods=11)
-            
-            # Make predictions
-            forecast = model.predict(future)
-            
-            predictions[cause] = {
-                'forecast': forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']],
-                'model': model
-            }
-            
-        except Exception as e:
-            print(f"Error predicting {cause} for {country}: {str(e)}")
-            continue
-    
-    return predictions
+def parse_args():
+    parser = argparse.ArgumentParser(description='Forecast mortality 2020-2030 with Prophet')
+    parser.add_argument('--backend', choices=['prophet', 'fast'], default='prophet',
+                        help='prophet fits one Stan model per series; fast fits a batched '
+                             'piecewise-linear trend with climate regressors for all series at once')
+    parser.add_argument('--intervals', choices=['analytic', 'bootstrap'], default='analytic',
+                        help='Prediction interval method for the fast backend')
+    parser.add_argument('--scenario', choices=SCENARIO_KINDS, default='linear',
+                        help='Future climate scenario: linear trend or damped trend')
+    parser.add_argument('--damping', type=float, default=0.8,
+                        help='Yearly slope damping factor for the damped scenario')
+    parser.add_argument('--offset', action='append', default=[], metavar='VAR=DELTA',
+                        help='Constant shift added to a projected climate variable, '
+                             'e.g. Temperature_C=+1.5 (repeatable)')
+    parser.add_argument('--model-cache', default=os.path.join(MODELS_DIR, 'prophet_cache'),
+                        help='Directory of fitted Prophet models reused when inputs are unchanged')
+    parser.add_argument('--no-model-cache', action='store_true',
+                        help='Refit every Prophet model and leave the cache untouched')
+    parser.add_argument('--cache-max-mb', type=float, default=500,
+                        help='Size limit of the model cache; least recently used models are evicted')
+    parser.add_argument('--all', action='store_true',
+                        help='Forecast every country and every cause instead of the default selection')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes for the model fits (1 runs serially)')
+    parser.add_argument('--timeout', type=float, default=300,
+                        help='Seconds allowed per (country, cause) fit before it is abandoned')
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     print("=" * 80)
     print("TEMPORAL PREDICTION MODEL - MORTALITY FORECASTING")
     print("=" * 80)
@@ -149,7 +112,7 @@ def main():
     
     # Load integrated data
     print("Loading integrated data...")
-    df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'integrated_data_1990_2019.csv'))
+    df = read_table('integrated_data_1990_2019', PROCESSED_DATA_DIR)
     print(f"Loaded {len(df)} records")
     print()
     
@@ -165,10 +128,12 @@ def main():
         if original_col in df.columns:
             top_causes.append((original_col, df[original_col].sum()))
     
-    top_causes = sorted(top_causes, key=lambda x: x[1], reverse=True)[:10]
+    top_causes = sorted(top_causes, key=lambda x: x[1], reverse=True)
+    if not args.all:
+        top_causes = top_causes[:10]
     top_cause_names = [cause[0] for cause in top_causes]
     
-    print("Top 10 mortality causes selected for prediction:")
+    print(f"Top {len(top_causes)} mortality causes selected for prediction:")
     for i, (cause, total) in enumerate(top_causes, 1):
         print(f"{i}. {cause}: {total:,.0f} total deaths")
     print()
@@ -178,33 +143,60 @@ def main():
         'United States', 'Germany', 'China', 'Brazil', 
         'India', 'Nigeria', 'Australia', 'Japan'
     ]
-    
-    print(f"Generating predictions for {len(selected_countries)} countries...")
-    print()
-    
-    all_predictions = {}
-    
-    for country in selected_countries:
-        print(f"Processing {country}...")
-        predictions = generate_predictions_for_country(
-            df, country, top_cause_names, climate_vars
+    if args.all:
+        selected_countries = sorted(df['Country/Territory'].unique())
+    
+    scenarios = ClimateScenarios(df, climate_vars, start_year=2020, periods=11, kind=args.scenario,
+                                 damping=args.damping, offsets=parse_offsets(args.offset))
+    tasks = build_forecast_tasks(df, selected_countries, top_cause_names, climate_vars,
+                                 scenarios=scenarios)
+    
+    if args.backend == 'fast':
+        print(f"Generating predictions for {len(selected_countries)} countries "
+              f"({len(tasks)} series, batched trend backend)...")
+        results, failures = fit_trend_forecasts(tasks, intervals=args.intervals)
+        for key, error in failures.items():
+            print(f"  {key[0]} - {key[1]}: FAILED ({error})")
+    else:
+        store = None
+        if not args.no_model_cache:
+            store = prophet_model_store(args.model_cache, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+            cached = sum(prophet_cache_key(task) in store for task in tasks)
+            print(f"Model cache: {cached}/{len(tasks)} models unchanged in {args.model_cache}")
+        
+        print(f"Generating predictions for {len(selected_countries)} countries "
+              f"({len(tasks)} models, {args.workers} workers)...")
+        print()
+        
+        def report(task, forecast, error):
+            status = 'ok' if error is None else f'FAILED ({error})'
+            print(f"  {task.country} - {task.cause}: {status}")
+        
+        results, failures = run_forecasts(
+            tasks, fit_fn=functools.partial(fit_prophet_forecast, store=store),
+            max_workers=args.workers, timeout=args.timeout, on_result=report
         )
-        all_predictions[country] = predictions
-        print(f"  Generated {len(predictions)} predictions")
+        if store is not None:
+            evicted = store.evict()
+            if evicted:
+                print(f"Model cache: evicted {evicted} least recently used models")
     
     print()
+    print(f"Generated {len(results)} predictions, {len(failures)} failed")
+    print()
     
     # Save predictions
     predictions_file = os.path.join(RESULTS_DIR, 'temporal_predictions.csv')
     
     all_forecasts = []
-    for country, country_preds in all_predictions.items():
-        for cause, pred_data in country_preds.items():
-            forecast_df = pred_data['forecast'].copy()
-            forecast_df['Country'] = country
-            forecast_df['Cause'] = cause
-            forecast_df['Year'] = forecast_df['ds'].dt.year
-            all_forecasts.append(forecast_df)
+    for task in tasks:
+        if task.key not in results:
+            continue
+        forecast_df = results[task.key].copy()
+        forecast_df['Country'] = task.country
+        forecast_df['Cause'] = task.cause
+        forecast_df['Year'] = forecast_df['ds'].dt.year
+        all_forecasts.append(forecast_df)
     
     if all_forecasts:
         final_df = pd.concat(all_forecasts, ignore_index=True)
@@ -219,10 +211,13 @@ def main():
     print("PREDICTION COMPLETE")
     print("=" * 80)
     print("Summary:")
+    print(f"- Backend: {args.backend}")
     print(f"- Countries analyzed: {len(selected_countries)}")
     print(f"- Mortality causes: {len(top_cause_names)}")
     print(f"- Forecast period: 2020-2030 (11 years)")
     print(f"- Climate regressors: {', '.join(climate_vars)}")
+    print(f"- Climate scenario: {args.scenario}"
+          + (f" with offsets {scenarios.offsets}" if scenarios.offsets else ""))
 
 if __name__ == '__main__':
     main()
@@ -1,29 +1,71 @@
+import argparse
 import zipfile
 import os
+import sys
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 EXTERNAL_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'external')
+CHUNKS_DIR = os.path.join(EXTERNAL_DATA_DIR, 'era5_chunks')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.cds_download import MANIFEST_FILE
+from scripts.utils.era5_index import Era5Index
+
+parser = argparse.ArgumentParser(description='Extrae la descarga única de ERA5 o exporta los bloques de 02')
+parser.add_argument('--export', metavar='ARCHIVO',
+                    help='Con bloques de 02: escribe todos los bloques en un único NetCDF (opcional, '
+                         'el paso 4 no lo necesita)')
+args = parser.parse_args()
 
 zip_file = os.path.join(EXTERNAL_DATA_DIR, 'era5_climate_data_1990_2019.nc')
+manifest_file = os.path.join(CHUNKS_DIR, MANIFEST_FILE)
 extract_dir = EXTERNAL_DATA_DIR
 
-print(f"Descomprimiendo archivo: {zip_file}")
-print(f"Tamaño del archivo: {os.path.getsize(zip_file) / (1024*1024):.2f} MB\n")
-
-with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-    file_list = zip_ref.namelist()
-    print(f"Archivos en el ZIP:")
-    for file in file_list:
-        print(f"  - {file}")
-    
-    print(f"\nExtrayendo archivos a: {extract_dir}")
-    zip_ref.extractall(extract_dir)
-
-print("\nExtracción completada.")
-print(f"Archivos extraídos en: {extract_dir}")
-
-extracted_files = [f for f in os.listdir(extract_dir) if f.endswith(('.nc', '.grib'))]
-print(f"\nArchivos NetCDF/GRIB encontrados:")
-for file in extracted_files:
-    file_path = os.path.join(extract_dir, file)
-    print(f"  - {file} ({os.path.getsize(file_path) / (1024*1024):.2f} MB)")
\ No newline at end of file
+
+def extract_legacy_zip():
+    print(f"Descomprimiendo archivo: {zip_file}")
+    print(f"Tamaño del archivo: {os.path.getsize(zip_file) / (1024*1024):.2f} MB\n")
+
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        file_list = zip_ref.namelist()
+        print(f"Archivos en el ZIP:")
+        for file in file_list:
+            print(f"  - {file}")
+
+        print(f"\nExtrayendo archivos a: {extract_dir}")
+        zip_ref.extractall(extract_dir)
+
+
+def export_chunks(output):
+    # Exporta los bloques de 02 a un único NetCDF, leyéndolos desde los ZIP sin extraerlos
+    index = Era5Index(CHUNKS_DIR)
+    print(f"Exportando {len(index.entries)} archivos NetCDF de {CHUNKS_DIR}")
+    ds = index.open()
+    try:
+        ds.to_netcdf(output)
+    finally:
+        ds.close()
+    print(f"  - {output} ({os.path.getsize(output) / (1024*1024):.2f} MB)")
+
+
+def list_extracted():
+    print("\nExtracción completada.")
+    print(f"Archivos extraídos en: {extract_dir}")
+
+    extracted_files = [f for f in os.listdir(extract_dir) if f.endswith(('.nc', '.grib'))]
+    print(f"\nArchivos NetCDF/GRIB encontrados:")
+    for file in extracted_files:
+        file_path = os.path.join(extract_dir, file)
+        print(f"  - {file} ({os.path.getsize(file_path) / (1024*1024):.2f} MB)")
+
+
+if not os.path.exists(manifest_file):
+    if args.export is not None:
+        parser.error(f"--export necesita los bloques de 02 ({manifest_file} no existe)")
+    extract_legacy_zip()
+    list_extracted()
+elif args.export is not None:
+    export_chunks(args.export)
+else:
+    print(f"Los bloques de {CHUNKS_DIR} se leen directamente en el paso 4 (también dentro de los ZIP);")
+    print("no hace falta extraerlos. Usa --export ARCHIVO para escribir una copia en un único NetCDF.")
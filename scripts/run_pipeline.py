@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.utils.config import (
+    PROJECT_DIR, RAW_DATA_DIR, PROCESSED_DATA_DIR, EXTERNAL_DATA_DIR,
+    RESULTS_DIR, FIGURES_DIR, MODELS_DIR
+)
+from scripts.utils.pipeline import Pipeline, Stage
+
+SCRIPTS_DIR = os.path.join(PROJECT_DIR, 'scripts')
+STATE_FILE = os.path.join(PROJECT_DIR, '.pipeline_state.json')
+
+
+def processed(name):
+    # Every processed table is stored as csv + parquet + arrow
+    return os.path.join(PROCESSED_DATA_DIR, f'{name}.*')
+
+
+RAW_DEATHS = os.path.join(RAW_DATA_DIR, 'cause_of_deaths.csv')
+DEATHS = processed('deaths_selected_countries')
+POPULATION = processed('population_annual_1990_2019')
+CLIMATE = processed('climate_annual_1990_2019')
+CLIMATE_MONTHLY = processed('climate_monthly_1990_2019')
+CLIMATE_ANOMALIES = processed('climate_monthly_anomalies_1990_2019')
+CLIMATE_FEATURES = processed('climate_features_1990_2019')
+INTEGRATED = processed('integrated_data_1990_2019')
+COUNTRIES = os.path.join(PROCESSED_DATA_DIR, 'selected_countries.txt')
+ERA5_MANIFEST = os.path.join(EXTERNAL_DATA_DIR, 'era5_chunks', 'manifest.json')
+# Read by 04 when there is no chunk manifest (single-request download)
+ERA5_LEGACY = [os.path.join(EXTERNAL_DATA_DIR, name) for name in (
+    'data_stream-moda_stepType-avgua.nc',
+    'data_stream-moda_stepType-avgad.nc',
+    'era5_climate_data_1990_2019.nc',
+)]
+CORRELATIONS = os.path.join(RESULTS_DIR, 'climate_mortality_correlations.csv')
+
+STAGES = [
+    Stage('01_select_countries', '01_select_countries.py',
+          inputs=[RAW_DEATHS], outputs=[DEATHS, COUNTRIES]),
+    Stage('02_download_climate_data', '02_download_climate_data.py',
+          outputs=[ERA5_MANIFEST]),
+    # 03 rewrites its inputs in place
+    Stage('03_process_population_data', '03_process_population_data.py',
+          inputs=[DEATHS, POPULATION], outputs=[DEATHS, POPULATION, COUNTRIES]),
+    Stage('04_process_climate_data', '04_process_climate_data.py',
+          inputs=[ERA5_MANIFEST] + ERA5_LEGACY, outputs=[CLIMATE, CLIMATE_MONTHLY]),
+    Stage('04b_build_climate_features', '04b_build_climate_features.py',
+          inputs=[CLIMATE_MONTHLY], outputs=[CLIMATE_ANOMALIES, CLIMATE_FEATURES]),
+    Stage('05_integrate_datasets', '05_integrate_datasets.py',
+          inputs=[DEATHS, POPULATION, CLIMATE, CLIMATE_FEATURES], outputs=[INTEGRATED],
+          args=['--climate-features']),
+    Stage('06_exploratory_analysis', '06_exploratory_analysis.py',
+          inputs=[INTEGRATED], outputs=[CORRELATIONS]),
+    Stage('07_create_visualizations', '07_create_visualizations.py',
+          inputs=[INTEGRATED, CORRELATIONS],
+          outputs=[os.path.join(FIGURES_DIR, f) for f in (
+              '01_top_correlations.png', '02_temp_vs_neoplasms.png', '03_temp_evolution_by_continent.png'
+          )]),
+    Stage('08_predictive_modeling', '08_predictive_modeling.py',
+          inputs=[INTEGRATED],
+          outputs=[os.path.join(MODELS_DIR, 'registry', 'rf_neoplasms', '*', 'metadata.json'),
+                   os.path.join(RESULTS_DIR, 'model_predictions.csv')]),
+    Stage('09_temporal_prediction_model', '09_temporal_prediction_model.py',
+          inputs=[INTEGRATED], outputs=[os.path.join(RESULTS_DIR, 'temporal_predictions.csv')]),
+]
+for stage in STAGES:
+    stage.script = os.path.join(SCRIPTS_DIR, stage.script)
+
+
+def parse_args():
+    stage_names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(
+        description='Ejecuta solo las etapas del pipeline cuyos scripts o entradas han cambiado'
+    )
+    parser.add_argument('targets', nargs='*', metavar='ETAPA',
+                        help=f"Etapas a actualizar junto con sus dependencias (por defecto todas): {', '.join(stage_names)}")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Número máximo de etapas independientes ejecutadas en paralelo')
+    parser.add_argument('--force', action='store_true',
+                        help='Ejecuta las etapas seleccionadas aunque estén actualizadas')
+    parser.add_argument('--only', action='store_true',
+                        help='Ejecuta solo las etapas indicadas, sin sus dependencias')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Muestra qué etapas se ejecutarían sin ejecutarlas')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    pipeline = Pipeline(STAGES, STATE_FILE)
+
+    try:
+        status = pipeline.run(args.targets, jobs=args.jobs, force=args.force,
+                              dry_run=args.dry_run, with_upstream=not args.only)
+    except KeyError as e:
+        print(e.args[0])
+        sys.exit(2)
+
+    if args.dry_run:
+        return
+
+    counts = {key: sum(1 for value in status.values() if value == key)
+              for key in ('ran', 'skipped', 'failed', 'blocked')}
+    print(f"\nEjecutadas: {counts['ran']}, actualizadas: {counts['skipped']}, "
+          f"fallidas: {counts['failed']}, bloqueadas: {counts['blocked']}")
+    if counts['failed'] or counts['blocked']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Chunked, parallel and resumable downloads from the Copernicus Climate Data Store
+The ERA5 request is split into per-year (optionally per-year x variable)
+chunks fetched by a bounded pool of concurrent requests. Every chunk is
+verified before it is accepted and recorded in a manifest, so a re-run only
+fetches chunks that are missing, failed or whose request changed
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import xarray as xr
+
+DATASET = 'reanalysis-era5-single-levels-monthly-means'
+VARIABLES = [
+    '2m_temperature',
+    'total_precipitation',
+    'surface_pressure',
+    '2m_dewpoint_temperature',
+    '10m_u_component_of_wind',
+    '10m_v_component_of_wind'
+]
+BASE_REQUEST = {
+    'product_type': 'monthly_averaged_reanalysis',
+    'month': [f'{month:02d}' for month in range(1, 13)],
+    'time': '00:00',
+    'format': 'netcdf'
+}
+MANIFEST_FILE = 'manifest.json'
+
+# Leading bytes of the accepted chunk formats
+_SIGNATURES = {
+    b'PK\x03\x04': 'zip',
+    b'CDF\x01': 'netcdf3',
+    b'CDF\x02': 'netcdf3',
+    b'\x89HDF': 'netcdf4',
+}
+# xarray engine able to read each NetCDF format (the temporary file has no .nc extension)
+_ENGINES = {'netcdf3': 'scipy', 'netcdf4': 'h5netcdf'}
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """
+    One CDS request
+
+    Attributes:
+        year: Year of the data
+        variables: Variables requested
+        key: Chunk identifier, also the file stem
+    """
+    year: int
+    variables: tuple
+    key: str
+
+    def request(self, base=None):
+        return {**(base or BASE_REQUEST), 'variable': list(self.variables), 'year': [str(self.year)]}
+
+
+def plan_chunks(years, variables=VARIABLES, by_variable=False):
+    """
+    Split a download into one chunk per year (or per year and variable)
+
+    Returns:
+        List of Chunk
+    """
+    if by_variable:
+        return [Chunk(year, (variable,), f'era5_{year}_{variable}') for year in years for variable in variables]
+    return [Chunk(year, tuple(variables), f'era5_{year}') for year in years]
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_chunk(path):
+    """
+    Check that a downloaded chunk is a complete NetCDF file or ZIP of NetCDF files
+
+    Returns:
+        Detected format ('zip', 'netcdf3' or 'netcdf4')
+
+    Raises:
+        ValueError: If the file is empty, of an unknown format or corrupt
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError("empty file")
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    fmt = _SIGNATURES.get(head)
+    if fmt is None:
+        raise ValueError(f"unknown file signature {head!r}")
+    if fmt == 'zip':
+        with zipfile.ZipFile(path) as archive:
+            bad = archive.testzip()
+            if bad is not None:
+                raise ValueError(f"corrupt member {bad}")
+            members = [name for name in archive.namelist() if name.endswith('.nc')]
+            if not members:
+                raise ValueError("archive contains no NetCDF files")
+    else:
+        # A truncated transfer still starts with a valid signature: read every
+        # variable so the file is only accepted when all its data is there
+        try:
+            with xr.open_dataset(path, engine=_ENGINES[fmt]) as ds:
+                ds.load()
+        except Exception as e:
+            raise ValueError(f"unreadable NetCDF file: {e}") from e
+    return fmt
+
+
+class ChunkManifest:
+    """
+    JSON record of verified chunks, safe to update from several threads
+
+    Each entry stores the chunk file, its size and SHA-256 and the exact
+    request, so a chunk counts as complete only while the file is intact and
+    the request is unchanged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_complete(self, chunk, request, directory, check_hash=False):
+        entry = self.entries.get(chunk.key)
+        if entry is None or entry.get('request') != request:
+            return False
+        path = os.path.join(directory, entry['file'])
+        if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+            return False
+        return not check_hash or file_sha256(path) == entry['sha256']
+
+    def record(self, chunk, request, path, fmt):
+        entry = {
+            'file': os.path.basename(path),
+            'format': fmt,
+            'size': os.path.getsize(path),
+            'sha256': file_sha256(path),
+            'year': chunk.year,
+            'variables': list(chunk.variables),
+            'request': request,
+            'completed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with self._lock:
+            self.entries[chunk.key] = entry
+            self._save()
+
+    def files(self, directory, chunks=None):
+        """
+        Paths of the recorded files of the given chunks (default: all), in year order
+        """
+        keys = self.entries if chunks is None else [chunk.key for chunk in chunks if chunk.key in self.entries]
+        entries = sorted((self.entries[key] for key in keys), key=lambda e: (e['year'], e['file']))
+        return [os.path.join(directory, e['file']) for e in entries]
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def _fetch(client_factory, dataset, chunk, request, directory, verify, retries, backoff):
+    suffix = '.download'
+    last_error = None
+    for attempt in range(1, retries + 1):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'{chunk.key}.', suffix=suffix)
+        os.close(fd)
+        try:
+            client_factory().retrieve(dataset, request, tmp_path)
+            fmt = verify(tmp_path)
+            extension = 'zip' if fmt == 'zip' else 'nc'
+            path = os.path.join(directory, f'{chunk.key}.{extension}')
+            os.replace(tmp_path, path)
+            return path, fmt
+        except Exception as e:
+            last_error = e
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if attempt < retries:
+                time.sleep(backoff * 2 ** (attempt - 1))
+    raise RuntimeError(f"{chunk.key}: {last_error}") from last_error
+
+
+def download_chunks(client_factory, chunks, directory, manifest=None, dataset=DATASET, base_request=None,
+                    workers=4, retries=3, backoff=5.0, verify=verify_chunk, check_hash=False, log=print):
+    """
+    Fetch the chunks that are not yet complete
+
+    Args:
+        client_factory: Callable returning a client with
+            retrieve(dataset, request, target) (e.g. cdsapi.Client); it is
+            called once per request so each thread uses its own client
+        chunks: List of Chunk
+        directory: Directory of the chunk files
+        manifest: ChunkManifest (default: manifest.json in directory)
+        dataset: CDS dataset name
+        base_request: Request fields shared by all chunks (default BASE_REQUEST)
+        workers: Concurrent requests
+        retries: Attempts per chunk
+        backoff: Seconds before the first retry, doubled on every retry
+        verify: Callable raising on an invalid file and returning its format
+        check_hash: Re-hash existing chunk files instead of trusting their size
+        log: Callable used for progress messages
+
+    Returns:
+        Dictionary mapping chunk key to 'downloaded', 'cached' or an error message
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = manifest or ChunkManifest(os.path.join(directory, MANIFEST_FILE))
+
+    status = {}
+    pending = []
+    for chunk in chunks:
+        request = chunk.request(base_request)
+        if manifest.is_complete(chunk, request, directory, check_hash):
+            status[chunk.key] = 'cached'
+        else:
+            pending.append((chunk, request))
+    log(f"{len(pending)} bloques por descargar, {len(chunks) - len(pending)} ya completos")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(_fetch, client_factory, dataset, chunk, request, directory, verify, retries, backoff):
+                (chunk, request)
+            for chunk, request in pending
+        }
+        for future in as_completed(futures):
+            chunk, request = futures[future]
+            try:
+                path, fmt = future.result()
+            except Exception as e:
+                status[chunk.key] = str(e)
+                log(f"  {chunk.key} FALLÓ: {e}")
+                continue
+            manifest.record(chunk, request, path, fmt)
+            status[chunk.key] = 'downloaded'
+            log(f"  {chunk.key} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+    return status
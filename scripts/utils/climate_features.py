@@ -0,0 +1,192 @@
+"""
+Vectorized climate features over the whole country panel
+Sub-annual values are placed in one dense (country, year, period, variable)
+array (period = month, or day of year for daily data), so anomalies against
+a base-period climatology, percentile thresholds, extreme-event counts,
+rolling windows and lags are NumPy reductions and shifts along an axis
+instead of per-country loops
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BASE_PERIOD = (1990, 2019)
+
+
+def to_panel(df, variables, country_col='Country/Territory', year_col='Year', period_col='Month'):
+    """
+    Dense panel of a long table with one row per (country, year, period)
+
+    Args:
+        df: Long DataFrame
+        variables: Value columns
+        country_col: Country column
+        year_col: Year column
+        period_col: Sub-annual period column (month or day of year)
+
+    Returns:
+        Tuple (countries, years, periods, values (C, Y, P, V)); missing
+        combinations are NaN
+    """
+    country_codes, countries = pd.factorize(df[country_col], sort=True)
+    years = np.arange(df[year_col].min(), df[year_col].max() + 1)
+    periods = np.sort(df[period_col].unique())
+    year_codes = df[year_col].to_numpy() - years[0]
+    period_codes = np.searchsorted(periods, df[period_col].to_numpy())
+
+    values = np.full((len(countries), len(years), len(periods), len(variables)), np.nan)
+    values[country_codes, year_codes, period_codes] = df[list(variables)].to_numpy(dtype=float)
+    return list(countries), years, periods, values
+
+
+def _base_mask(years, base_period):
+    mask = (years >= base_period[0]) & (years <= base_period[1])
+    if not mask.any():
+        raise ValueError(f"Base period {base_period} does not overlap the data ({years[0]}-{years[-1]})")
+    return mask
+
+
+def anomalies(values, years, base_period=BASE_PERIOD):
+    """
+    Departures from each country's base-period mean of the same period
+
+    Returns:
+        Tuple (anomalies shaped like values, climatology (C, P, V))
+    """
+    climatology = np.nanmean(values[:, _base_mask(years, base_period)], axis=1)
+    return values - climatology[:, np.newaxis], climatology
+
+
+def _sorted_quantiles(values, quantiles, axis):
+    # Linear-interpolated nanquantile from a single sort (NaNs sort last);
+    # np.nanquantile falls back to a Python loop over every slice
+    ordered = np.moveaxis(np.sort(values, axis=axis), axis, 0)
+    n = np.isfinite(ordered).sum(axis=0)
+    result = []
+    for q in quantiles:
+        position = q * np.maximum(n - 1, 0)
+        low = np.floor(position).astype(np.intp)
+        high = np.minimum(low + 1, np.maximum(n - 1, 0))
+        below = np.take_along_axis(ordered, low[np.newaxis], axis=0)[0]
+        above = np.take_along_axis(ordered, high[np.newaxis], axis=0)[0]
+        result.append(np.where(n > 0, below + (above - below) * (position - low), np.nan))
+    return result
+
+
+def exceedance_counts(values, years, base_period=BASE_PERIOD, upper=0.9, lower=0.1):
+    """
+    Periods per year above / below each country's base-period percentiles
+
+    Thresholds are taken per country, calendar period and variable, so a hot
+    month means hot for that month of the year in that country.
+
+    Returns:
+        Tuple (above (C, Y, V), below (C, Y, V)); NaN for years without data
+    """
+    base = values[:, _base_mask(years, base_period)]
+    high, low = (threshold[:, np.newaxis] for threshold in _sorted_quantiles(base, (upper, lower), axis=1))
+    observed = np.isfinite(values).any(axis=2)
+    above = np.where(observed, (values > high).sum(axis=2), np.nan)
+    below = np.where(observed, (values < low).sum(axis=2), np.nan)
+    return above, below
+
+
+def rolling_mean(annual, window):
+    """
+    Trailing mean over `window` years along axis 1 (NaN until the window is full)
+    """
+    filled = np.nan_to_num(annual)
+    valid = np.isfinite(annual).astype(float)
+    pad = [(0, 0)] * annual.ndim
+    pad[1] = (1, 0)
+    sums = np.cumsum(np.pad(filled, pad), axis=1)
+    counts = np.cumsum(np.pad(valid, pad), axis=1)
+    total = sums[:, window:] - sums[:, :-window]
+    n = counts[:, window:] - counts[:, :-window]
+    result = np.full(annual.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result[:, window - 1:] = np.where(n == window, total / window, np.nan)
+    return result
+
+
+def lag(annual, k):
+    """
+    Values k years earlier along axis 1 (NaN for the first k years)
+
+    Raises:
+        ValueError: If k is smaller than 1
+    """
+    if k < 1:
+        raise ValueError(f"lag must be at least 1 year, got {k}")
+    result = np.full(annual.shape, np.nan)
+    result[:, k:] = annual[:, :-k]
+    return result
+
+
+def build_features(df, variables, base_period=BASE_PERIOD, upper=0.9, lower=0.1, window=3, lags=(1, 2),
+                   country_col='Country/Territory', year_col='Year', period_col='Month', period_label='Months'):
+    """
+    Sub-annual anomalies and annual lagged / extreme-event features
+
+    Args:
+        df: Long table with one row per (country, year, period)
+        variables: Climate variables
+        base_period: (first, last) year of the climatology
+        upper: Quantile defining high extremes
+        lower: Quantile defining low extremes
+        window: Years of the trailing rolling mean
+        lags: Year lags of the annual features
+        country_col: Country column
+        year_col: Year column
+        period_col: Sub-annual period column
+        period_label: Name of the period in count columns ('Months', 'Days')
+
+    Returns:
+        Tuple (period_anomalies, annual_features) DataFrames. period_anomalies
+        has one {variable}_Anomaly column per variable; annual_features has,
+        per variable, the mean and max anomaly, the count of periods above
+        the upper and below the lower percentile, and the rolling mean and
+        lags of the mean anomaly and of the upper-extreme count
+    """
+    countries, years, periods, values = to_panel(df, variables, country_col, year_col, period_col)
+    anomaly, _ = anomalies(values, years, base_period)
+    above, below = exceedance_counts(values, years, base_period, upper, lower)
+
+    mask = np.isfinite(values).any(axis=3)
+    c, y, p = np.nonzero(mask)
+    period_anomalies = pd.DataFrame({country_col: np.asarray(countries, dtype=object)[c],
+                                     year_col: years[y], period_col: periods[p]})
+    for j, variable in enumerate(variables):
+        period_anomalies[f'{variable}_Anomaly'] = anomaly[c, y, p, j]
+
+    with warnings.catch_warnings():
+        # All-NaN years (no data for a country) stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        annual_anomaly = np.nanmean(anomaly, axis=2)
+        annual_max = np.nanmax(anomaly, axis=2)
+
+    upper_name = f'Above_P{round(upper * 100)}'
+    lower_name = f'Below_P{round(lower * 100)}'
+    features = {}
+    for j, variable in enumerate(variables):
+        lagged = {
+            'Anomaly': annual_anomaly[..., j],
+            f'{period_label}_{upper_name}': above[..., j],
+        }
+        features[f'{variable}_Anomaly'] = lagged['Anomaly']
+        features[f'{variable}_Anomaly_Max'] = annual_max[..., j]
+        features[f'{variable}_{period_label}_{upper_name}'] = above[..., j]
+        features[f'{variable}_{period_label}_{lower_name}'] = below[..., j]
+        for name, series in lagged.items():
+            features[f'{variable}_{name}_Mean{window}y'] = rolling_mean(series, window)
+            for k in lags:
+                features[f'{variable}_{name}_Lag{k}'] = lag(series, k)
+
+    observed = mask.any(axis=2)
+    c, y = np.nonzero(observed)
+    annual_features = pd.DataFrame({country_col: np.asarray(countries, dtype=object)[c], year_col: years[y]})
+    for name, array in features.items():
+        annual_features[name] = array[c, y]
+    return period_anomalies, annual_features
@@ -0,0 +1,168 @@
+"""
+Future climate scenarios for the forecasting stage
+Fits every climate trend of every country in one batched least-squares solve
+and caches the projected frames per country
+"""
+
+import numpy as np
+import pandas as pd
+
+SCENARIO_KINDS = ('linear', 'damped')
+
+
+def fit_linear_trends(x, Y):
+    """
+    Fit y = intercept + slope * x for every column of Y at once
+
+    Solves the normal equations in closed form with a 0/1 weight per cell,
+    so columns with missing years (NaN) are fitted on the years they have.
+
+    Args:
+        x: Array (T,) of time values
+        Y: Array (T, N) of series, NaN marks a missing observation
+
+    Returns:
+        Tuple (slope, intercept), arrays of shape (N,)
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    w = ~np.isnan(Y)
+    Yw = np.where(w, Y, 0.0)
+    xw = np.where(w, x[:, None], 0.0)
+
+    n = w.sum(axis=0)
+    sx = xw.sum(axis=0)
+    sy = Yw.sum(axis=0)
+    sxx = (xw * xw).sum(axis=0)
+    sxy = (xw * Yw).sum(axis=0)
+
+    denom = n * sxx - sx ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(denom > 0, (n * sxy - sx * sy) / denom, 0.0)
+        intercept = np.where(n > 0, (sy - slope * sx) / n, np.nan)
+    return slope, intercept
+
+
+def project_trends(slope, intercept, x_last, future_x, kind='linear', damping=0.8):
+    """
+    Extrapolate fitted trends over a future horizon
+
+    'linear' keeps the fitted slope; 'damped' starts from the fitted value at
+    x_last and multiplies the slope by `damping` every step (Holt's damped
+    trend), so projections level off instead of growing without bound.
+
+    Args:
+        slope: Array (N,) of slopes
+        intercept: Array (N,) of intercepts
+        x_last: Last observed time value
+        future_x: Array (H,) of future time values
+        kind: One of SCENARIO_KINDS
+        damping: Damping factor per step for the 'damped' kind
+
+    Returns:
+        Array (H, N) of projected values
+    """
+    future_x = np.asarray(future_x, dtype=float)
+    if kind == 'linear':
+        return intercept + np.outer(future_x, slope)
+    if kind == 'damped':
+        steps = future_x - x_last
+        if damping == 1:
+            growth = steps
+        else:
+            growth = damping * (1 - damping ** steps) / (1 - damping)
+        return intercept + slope * x_last + np.outer(growth, slope)
+    raise ValueError(f"Unknown scenario kind: {kind}")
+
+
+def parse_offsets(specs):
+    """
+    Parse user offsets of the form 'Temperature_C=+1.5'
+
+    Args:
+        specs: Iterable of 'VARIABLE=DELTA' strings
+
+    Returns:
+        Dictionary mapping variable to offset
+    """
+    offsets = {}
+    for spec in specs or []:
+        var, sep, delta = spec.partition('=')
+        if not sep:
+            raise ValueError(f"Offset must look like VARIABLE=DELTA, got: {spec}")
+        offsets[var.strip()] = offsets.get(var.strip(), 0.0) + float(delta)
+    return offsets
+
+
+class ClimateScenarios:
+    """
+    Projected climate for every country, computed once and reused by all fits
+
+    Args:
+        df: Dataset with country, year and climate columns
+        climate_vars: Climate variables to project
+        start_year: First forecast year
+        periods: Number of years to forecast
+        kind: Scenario kind, 'linear' or 'damped'
+        damping: Damping factor for the 'damped' kind
+        offsets: Optional dictionary of constant shifts per variable,
+            e.g. {'Temperature_C': 1.5} for a +1.5 °C scenario
+    """
+
+    def __init__(self, df, climate_vars, start_year=2020, periods=11, kind='linear',
+                 damping=0.8, offsets=None, country_col='Country/Territory', year_col='Year'):
+        if kind not in SCENARIO_KINDS:
+            raise ValueError(f"Unknown scenario kind: {kind}")
+        unknown = set(offsets or {}) - set(climate_vars)
+        if unknown:
+            raise ValueError(f"Offsets for unknown climate variables: {sorted(unknown)}")
+
+        self.climate_vars = list(climate_vars)
+        self.kind = kind
+        self.damping = damping
+        self.offsets = dict(offsets or {})
+        self.future_years = np.arange(start_year, start_year + periods)
+        self.future_dates = pd.to_datetime(self.future_years.astype(str), format='%Y')
+
+        # Country-year panel as one (year, country x variable) matrix
+        panel = df.pivot_table(index=year_col, columns=country_col,
+                               values=self.climate_vars, aggfunc='mean', observed=True)
+        years = panel.index.to_numpy(dtype=float)
+        slope, intercept = fit_linear_trends(years, panel.to_numpy(dtype=float))
+        projected = project_trends(slope, intercept, years[-1], self.future_years,
+                                   kind=kind, damping=damping)
+
+        shift = np.array([self.offsets.get(var, 0.0) for var in panel.columns.get_level_values(0)])
+        projected = projected + shift
+
+        self.countries = list(panel.columns.get_level_values(1).unique())
+        self._projected = pd.DataFrame(projected, columns=panel.columns)
+        self._frames = {}
+
+    def future_frame(self, country):
+        """
+        Projected climate for one country, formatted for Prophet
+
+        Args:
+            country: Country name
+
+        Returns:
+            DataFrame with ds and one column per climate variable
+        """
+        if country not in self._frames:
+            if country not in self.countries:
+                raise KeyError(f"No climate history for {country}")
+            frame = pd.DataFrame({'ds': self.future_dates})
+            for var in self.climate_vars:
+                frame[var] = self._projected[(var, country)].to_numpy()
+            self._frames[country] = frame
+        return self._frames[country].copy()
+
+    def to_long(self):
+        """
+        All projections as a long table (Country/Territory, Year, variables)
+        """
+        long = self._projected.copy()
+        long.index = self.future_years
+        long = long.stack(level=1, future_stack=True).rename_axis(['Year', 'Country/Territory'])
+        return long[self.climate_vars].reset_index()[['Country/Territory', 'Year'] + self.climate_vars]
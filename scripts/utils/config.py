@@ -22,14 +22,6 @@ CDS_API_KEY = os.getenv('CDS_API_KEY')
 YEAR_START = 1990
 YEAR_END = 2019
 
-CONTINENTS = {
-    'Europe': ['Germany', 'United Kingdom', 'France', 'Italy', 'Spain', 'Poland', 'Netherlands', 'Belgium', 'Greece', 'Portugal'],
-    'Asia': ['China', 'India', 'Japan', 'Indonesia', 'Pakistan', 'Bangladesh', 'Russia', 'Turkey', 'Iran', 'Thailand'],
-    'Americas': ['United States', 'Brazil', 'Mexico', 'Canada', 'Argentina', 'Colombia', 'Peru', 'Venezuela', 'Chile', 'Ecuador'],
-    'Africa': ['Nigeria', 'Ethiopia', 'Egypt', 'Democratic Republic of Congo', 'South Africa', 'Tanzania', 'Kenya', 'Algeria', 'Sudan', 'Uganda'],
-    'Oceania': ['Australia', 'Papua New Guinea', 'New Zealand', 'Fiji', 'Solomon Islands', 'Samoa', 'Vanuatu', 'Kiribati', 'Tonga', 'Micronesia']
-}
-
 RESPIRATORY_DISEASES = [
     'Lower Respiratory Infections',
     'Chronic Respiratory Diseases',
@@ -0,0 +1,212 @@
+"""
+Vectorized correlation engine
+Computes every row-variable x column-variable coefficient with one batched
+matrix product, optionally on ranks (Spearman), on residuals after removing
+control variables (partial) and separately for each stratum (country,
+continent) in a single padded (group, observation, variable) array
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+METHODS = ('pearson', 'spearman', 'partial')
+
+
+def stack_groups(df, columns, by=None):
+    """
+    Pack the columns of each group into one NaN-padded 3-D array
+
+    Args:
+        df: Source DataFrame
+        columns: Columns to pack
+        by: Optional grouping column; None packs everything as one group
+
+    Returns:
+        Tuple (labels, array of shape (n_groups, max_group_size, n_columns))
+    """
+    values = df[columns].to_numpy(dtype=float)
+    if by is None:
+        return [None], values[np.newaxis]
+
+    codes, labels = pd.factorize(df[by], sort=True)
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes, minlength=len(labels))
+    position = np.arange(len(codes)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+    stacked = np.full((len(labels), sizes.max(), len(columns)), np.nan)
+    stacked[codes[order], position] = values[order]
+    return list(labels), stacked
+
+
+def rank_columns(X):
+    """
+    Average ranks along the observation axis of a (group, obs, var) array, NaN kept
+    """
+    return rankdata(X, axis=1, nan_policy='omit')
+
+
+def residualize(X, controls):
+    """
+    Residuals of every column of X after a per-group least squares fit on controls
+
+    Each column is fitted on its own available rows (those where it and all
+    controls are observed), with an intercept, so all groups and columns are
+    solved at once from batched normal equations.
+
+    Args:
+        X: Array (group, obs, var)
+        controls: Array (group, obs, n_controls)
+
+    Returns:
+        Array like X with NaN where X or any control is missing
+    """
+    n_groups, n_obs, _ = X.shape
+    design = np.concatenate([np.ones((n_groups, n_obs, 1)), controls], axis=2)
+    mask = ~np.isnan(X) & ~np.isnan(design).any(axis=2, keepdims=True)
+    design = np.nan_to_num(design)
+    target = np.where(mask, X, 0.0)
+    weights = mask.astype(float)
+
+    # Controls are standardised per group to keep the normal equations well conditioned
+    scale = np.abs(design).max(axis=1, keepdims=True)
+    design = design / np.where(scale > 0, scale, 1.0)
+
+    gram = np.einsum('gnk,gnv,gnl->gvkl', design, weights, design, optimize=True)
+    rhs = np.einsum('gnk,gnv->gvk', design, target)
+    ridge = 1e-10 * np.eye(design.shape[2])
+    beta = np.linalg.solve(gram + ridge, rhs[..., np.newaxis])[..., 0]
+    fitted = np.einsum('gnk,gvk->gnv', design, beta)
+    return np.where(mask, X - fitted, np.nan)
+
+
+def correlation_matrix(X, Y):
+    """
+    Pearson correlation of every column of X with every column of Y, per group
+
+    Without missing values the columns are standardised and multiplied once.
+    With missing values each pair uses its pairwise-complete observations,
+    still through matrix products of the value and mask arrays.
+
+    Args:
+        X: Array (group, obs, p)
+        Y: Array (group, obs, q)
+
+    Returns:
+        Tuple (r, n) of arrays (group, p, q): coefficients (NaN where undefined)
+        and number of observations used
+    """
+    mx, my = ~np.isnan(X), ~np.isnan(Y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if mx.all() and my.all():
+            Xc = X - X.mean(axis=1, keepdims=True)
+            Yc = Y - Y.mean(axis=1, keepdims=True)
+            Xz = Xc / np.linalg.norm(Xc, axis=1, keepdims=True)
+            Yz = Yc / np.linalg.norm(Yc, axis=1, keepdims=True)
+            r = np.einsum('gnp,gnq->gpq', Xz, Yz)
+            n = np.full(r.shape, float(X.shape[1]))
+        else:
+            wx, wy = mx.astype(float), my.astype(float)
+            # Centring by column means first keeps the sums of squares small
+            Xc = np.where(mx, X - np.nanmean(X, axis=1, keepdims=True), 0.0)
+            Yc = np.where(my, Y - np.nanmean(Y, axis=1, keepdims=True), 0.0)
+            n = np.einsum('gnp,gnq->gpq', wx, wy)
+            sx = np.einsum('gnp,gnq->gpq', Xc, wy)
+            sy = np.einsum('gnp,gnq->gpq', wx, Yc)
+            sxx = np.einsum('gnp,gnq->gpq', Xc ** 2, wy)
+            syy = np.einsum('gnp,gnq->gpq', wx, Yc ** 2)
+            sxy = np.einsum('gnp,gnq->gpq', Xc, Yc)
+            cov = n * sxy - sx * sy
+            r = cov / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+    r = np.clip(r, -1.0, 1.0)
+    r[~np.isfinite(r) | (n < 3)] = np.nan
+    return r, n
+
+
+def transform(X, Y, Z=None, method='pearson'):
+    """
+    Apply the method-specific transform before Pearson correlation
+
+    Args:
+        X, Y: Arrays (group, obs, var)
+        Z: Control variables (group, obs, n_controls), required for 'partial'
+        method: 'pearson', 'spearman' or 'partial'
+
+    Returns:
+        Tuple (X, Y) of ranks, residuals or the untouched inputs
+    """
+    if method == 'spearman':
+        return rank_columns(X), rank_columns(Y)
+    if method == 'partial':
+        return residualize(X, Z), residualize(Y, Z)
+    return X, Y
+
+
+def stack_variables(df, rows, columns, method='pearson', controls=None, by=None):
+    """
+    Stack the raw row, column and control variables of every group
+
+    Returns:
+        Tuple (labels, X, Y, Z) with X (group, obs, len(rows)), Y (group, obs,
+        len(columns)) and Z the controls, or None when not needed
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+    controls = list(controls or []) if method == 'partial' else []
+    if method == 'partial' and not controls:
+        raise ValueError("Partial correlation needs at least one control variable")
+
+    labels, stacked = stack_groups(df, list(rows) + list(columns) + controls, by)
+    X = stacked[..., :len(rows)]
+    Y = stacked[..., len(rows):len(rows) + len(columns)]
+    Z = stacked[..., len(rows) + len(columns):] if controls else None
+    return labels, X, Y, Z
+
+
+def to_long(labels, rows, columns, values, by=None, names=('Row', 'Column')):
+    """
+    Flatten (group, row, column) arrays into a long DataFrame
+
+    Args:
+        labels: Group labels from stack_groups
+        rows: Row variable names
+        columns: Column variable names
+        values: Dictionary mapping output column name to (group, p, q) array
+        by: Name of the group column, or None
+        names: Output names of the row and column variable columns
+
+    Returns:
+        DataFrame with one row per (group, row variable, column variable)
+    """
+    n_groups = len(labels)
+    data = {}
+    if by is not None:
+        data[by] = np.repeat(labels, len(rows) * len(columns))
+    data[names[0]] = np.tile(np.repeat(rows, len(columns)), n_groups)
+    data[names[1]] = np.tile(columns, n_groups * len(rows))
+    for name, array in values.items():
+        data[name] = np.asarray(array).reshape(-1)
+    return pd.DataFrame(data)
+
+
+def correlate(df, rows, columns, method='pearson', controls=None, by=None, names=('Row', 'Column')):
+    """
+    Correlation of every row variable with every column variable
+
+    Args:
+        df: DataFrame holding all variables
+        rows: Variables on the first axis (e.g. mortality rates)
+        columns: Variables on the second axis (e.g. climate variables)
+        method: 'pearson', 'spearman' or 'partial'
+        controls: Variables partialled out when method is 'partial'
+            (e.g. ['Year', 'Population'])
+        by: Optional column to stratify by (e.g. 'Country/Territory', 'Continent')
+        names: Output names of the row and column variable columns
+
+    Returns:
+        Long DataFrame with [by,] names[0], names[1], Correlation and N
+    """
+    labels, X, Y, Z = stack_variables(df, rows, columns, method, controls, by)
+    r, n = correlation_matrix(*transform(X, Y, Z, method))
+    return to_long(labels, list(rows), list(columns),
+                   {'Correlation': r, 'N': n.astype(int)}, by=by, names=names)
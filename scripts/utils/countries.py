@@ -0,0 +1,142 @@
+"""
+Country registry, the single source of truth for country metadata
+One compact table (ISO 3166 alpha-3 code, project name, continent, centroid
+and Natural Earth polygon name) from which every stage takes its country
+lists. Country and continent columns are encoded as pandas Categoricals with
+the registry's fixed categories, so all tables share the same integer codes:
+joins and groupbys run on those codes and country -> continent is an array
+lookup instead of a string .map()
+"""
+
+import numpy as np
+import pandas as pd
+
+COUNTRY_COL = 'Country/Territory'
+CONTINENT_COL = 'Continent'
+
+# (ISO3, name, continent, centroid latitude, centroid longitude, Natural Earth name if different)
+_RECORDS = [
+    ('DEU', 'Germany', 'Europe', 51.1657, 10.4515, None),
+    ('GBR', 'United Kingdom', 'Europe', 55.3781, -3.4360, None),
+    ('FRA', 'France', 'Europe', 46.2276, 2.2137, None),
+    ('ITA', 'Italy', 'Europe', 41.8719, 12.5674, None),
+    ('ESP', 'Spain', 'Europe', 40.4637, -3.7492, None),
+    ('POL', 'Poland', 'Europe', 51.9194, 19.1451, None),
+    ('NLD', 'Netherlands', 'Europe', 52.1326, 5.2913, None),
+    ('BEL', 'Belgium', 'Europe', 50.5039, 4.4699, None),
+    ('GRC', 'Greece', 'Europe', 39.0742, 21.8243, None),
+    ('PRT', 'Portugal', 'Europe', 39.3999, -8.2245, None),
+    ('CHN', 'China', 'Asia', 35.8617, 104.1954, None),
+    ('IND', 'India', 'Asia', 20.5937, 78.9629, None),
+    ('JPN', 'Japan', 'Asia', 36.2048, 138.2529, None),
+    ('IDN', 'Indonesia', 'Asia', -0.7893, 113.9213, None),
+    ('PAK', 'Pakistan', 'Asia', 30.3753, 69.3451, None),
+    ('BGD', 'Bangladesh', 'Asia', 23.6850, 90.3563, None),
+    ('RUS', 'Russia', 'Asia', 61.5240, 105.3188, None),
+    ('TUR', 'Turkey', 'Asia', 38.9637, 35.2433, None),
+    ('IRN', 'Iran', 'Asia', 32.4279, 53.6880, None),
+    ('THA', 'Thailand', 'Asia', 15.8700, 100.9925, None),
+    ('USA', 'United States', 'Americas', 37.0902, -95.7129, 'United States of America'),
+    ('BRA', 'Brazil', 'Americas', -14.2350, -51.9253, None),
+    ('MEX', 'Mexico', 'Americas', 23.6345, -102.5528, None),
+    ('CAN', 'Canada', 'Americas', 56.1304, -106.3468, None),
+    ('ARG', 'Argentina', 'Americas', -38.4161, -63.6167, None),
+    ('COL', 'Colombia', 'Americas', 4.5709, -74.2973, None),
+    ('PER', 'Peru', 'Americas', -9.1900, -75.0152, None),
+    ('VEN', 'Venezuela', 'Americas', 6.4238, -66.5897, None),
+    ('CHL', 'Chile', 'Americas', -35.6751, -71.5430, None),
+    ('ECU', 'Ecuador', 'Americas', -1.8312, -78.1834, None),
+    ('NGA', 'Nigeria', 'Africa', 9.0820, 8.6753, None),
+    ('ETH', 'Ethiopia', 'Africa', 9.1450, 40.4897, None),
+    ('EGY', 'Egypt', 'Africa', 26.8206, 30.8025, None),
+    ('COD', 'Democratic Republic of Congo', 'Africa', None, None, 'Dem. Rep. Congo'),
+    ('ZAF', 'South Africa', 'Africa', -30.5595, 22.9375, None),
+    ('TZA', 'Tanzania', 'Africa', -6.3690, 34.8888, None),
+    ('KEN', 'Kenya', 'Africa', -0.0236, 37.9062, None),
+    ('DZA', 'Algeria', 'Africa', 28.0339, 1.6596, None),
+    ('SDN', 'Sudan', 'Africa', 12.8628, 30.2176, None),
+    ('UGA', 'Uganda', 'Africa', 1.3733, 32.2903, None),
+    ('AUS', 'Australia', 'Oceania', -25.2744, 133.7751, None),
+    ('PNG', 'Papua New Guinea', 'Oceania', -6.3150, 143.9555, None),
+    ('NZL', 'New Zealand', 'Oceania', -40.9006, 174.8860, None),
+    ('FJI', 'Fiji', 'Oceania', -17.7134, 178.0650, None),
+    ('SLB', 'Solomon Islands', 'Oceania', -9.6457, 160.1562, 'Solomon Is.'),
+    ('WSM', 'Samoa', 'Oceania', -13.7590, -172.1046, None),
+    ('VUT', 'Vanuatu', 'Oceania', -15.3767, 166.9592, None),
+    ('KIR', 'Kiribati', 'Oceania', -3.3704, -168.7340, None),
+    ('TON', 'Tonga', 'Oceania', -21.1790, -175.1982, None),
+    ('FSM', 'Micronesia', 'Oceania', 7.4256, 150.5508, None),
+]
+
+# Candidate countries per continent, in selection order
+CONTINENTS = {}
+for _, _name, _continent, *_ in _RECORDS:
+    CONTINENTS.setdefault(_continent, []).append(_name)
+
+# One row per country sorted by name: the row position is the country code
+REGISTRY = pd.DataFrame(
+    _RECORDS, columns=['ISO3', 'Country', 'Continent', 'Latitude', 'Longitude', 'Polygon']
+).sort_values('Country', ignore_index=True)
+REGISTRY['Polygon'] = REGISTRY['Polygon'].fillna(REGISTRY['Country'])
+
+COUNTRY_DTYPE = pd.CategoricalDtype(REGISTRY['Country'])
+CONTINENT_DTYPE = pd.CategoricalDtype(sorted(CONTINENTS))
+REGISTRY['Continent'] = REGISTRY['Continent'].astype(CONTINENT_DTYPE)
+
+# Continent code of every country code
+_CONTINENT_CODES = REGISTRY['Continent'].cat.codes.to_numpy()
+_POSITION = {name: i for i, name in enumerate(REGISTRY['Country'])}
+
+
+def encode_countries(values, errors='raise'):
+    """
+    Country names as a Categorical with the registry categories
+
+    Args:
+        values: Series of country names (strings or any Categorical)
+        errors: 'raise' for names missing from the registry, 'coerce' to
+            turn them into NaN
+
+    Returns:
+        Series with dtype COUNTRY_DTYPE
+
+    Raises:
+        KeyError: If errors='raise' and a name is not in the registry
+    """
+    values = pd.Series(values)
+    encoded = values.astype(COUNTRY_DTYPE)
+    if errors == 'raise':
+        unknown = values[values.notna() & encoded.isna()].unique()
+        if len(unknown):
+            raise KeyError(f"Countries not in the registry: {sorted(map(str, unknown))}")
+    return encoded
+
+
+def continents(countries):
+    """
+    Continent of every country, looked up by category code
+
+    Returns:
+        Series with dtype CONTINENT_DTYPE aligned with `countries`
+    """
+    codes = encode_countries(countries).cat.codes.to_numpy()
+    continent_codes = np.where(codes >= 0, _CONTINENT_CODES[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(continent_codes, dtype=CONTINENT_DTYPE),
+                     index=getattr(countries, 'index', None), name=CONTINENT_COL)
+
+
+def coordinates(countries=None):
+    """
+    Centroid (lat, lon) of the given countries (default: all with a centroid)
+    """
+    table = REGISTRY.dropna(subset=['Latitude', 'Longitude'])
+    if countries is not None:
+        table = table[table['Country'].isin(countries)]
+    return {row.Country: (row.Latitude, row.Longitude) for row in table.itertuples()}
+
+
+def polygon_name(country):
+    """
+    Name of the country in Natural Earth admin-0 polygons
+    """
+    return REGISTRY['Polygon'].iat[_POSITION[country]]
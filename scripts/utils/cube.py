@@ -0,0 +1,169 @@
+"""
+Precomputed country x year x metric aggregate cube for the dashboard
+Built once from the integrated dataset; filters on countries and years become
+integer index slices into NumPy arrays, and range means come from prefix sums,
+so interactive queries cost the same whatever the size of the source table
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class AggregateCube:
+    """
+    Dense country x year x metric array of country-year means
+
+    Attributes:
+        countries: Sorted country labels (first axis)
+        years: Consecutive years (second axis)
+        metrics: Metric names (third axis)
+        values: Array (country, year, metric), NaN where no data
+        rows: Array (country, year) with the position of one source row, -1 if none
+        groups: Dictionary mapping group (continent) to country positions
+        group_values: Array (group, year, metric) of unweighted country means
+    """
+
+    def __init__(self, countries, years, metrics, values, rows, groups=None,
+                 country_col='Country/Territory', year_col='Year', group_col='Continent'):
+        self.countries = list(countries)
+        self.years = np.asarray(years)
+        self.metrics = list(metrics)
+        self.values = values
+        self.rows = rows
+        self.country_col = country_col
+        self.year_col = year_col
+        self.group_col = group_col
+        self._country_pos = {country: i for i, country in enumerate(self.countries)}
+        self._metric_pos = {metric: i for i, metric in enumerate(self.metrics)}
+
+        # Prefix sums over years: the mean over any year range is two lookups
+        observed = ~np.isnan(values)
+        zeros = np.zeros((len(self.countries), 1, len(self.metrics)))
+        self._sums = np.concatenate([zeros, np.cumsum(np.where(observed, values, 0.0), axis=1)], axis=1)
+        self._counts = np.concatenate([zeros, np.cumsum(observed, axis=1)], axis=1)
+
+        self.groups = {}
+        self.group_values = np.empty((0, len(self.years), len(self.metrics)))
+        if groups:
+            self.groups = {name: np.asarray(positions) for name, positions in groups.items()}
+            with np.errstate(invalid='ignore'):
+                self.group_values = np.stack([
+                    self._nanmean(values[positions], axis=0) for positions in self.groups.values()
+                ])
+
+    @staticmethod
+    def _nanmean(values, axis):
+        observed = ~np.isnan(values)
+        total = np.where(observed, values, 0.0).sum(axis=axis)
+        count = observed.sum(axis=axis)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+
+    @classmethod
+    def from_frame(cls, df, country_col='Country/Territory', year_col='Year',
+                   group_col='Continent', metrics=None):
+        """
+        Build the cube from a long table with one or more rows per country-year
+
+        Args:
+            df: Source DataFrame
+            country_col: Country column
+            year_col: Year column
+            group_col: Optional column grouping countries (continent rollups)
+            metrics: Numeric columns to aggregate (default: all numeric but the year)
+
+        Returns:
+            AggregateCube
+        """
+        if metrics is None:
+            metrics = [col for col in df.select_dtypes('number').columns if col != year_col]
+
+        country_codes, countries = pd.factorize(df[country_col], sort=True)
+        years = df[year_col].to_numpy(dtype=int)
+        year_values = np.arange(years.min(), years.max() + 1)
+        year_codes = years - year_values[0]
+        shape = (len(countries), len(year_values))
+
+        data = df[metrics].to_numpy(dtype=float)
+        observed = ~np.isnan(data)
+        sums = np.zeros(shape + (len(metrics),))
+        counts = np.zeros(shape + (len(metrics),))
+        np.add.at(sums, (country_codes, year_codes), np.where(observed, data, 0.0))
+        np.add.at(counts, (country_codes, year_codes), observed)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(counts > 0, sums / counts, np.nan)
+
+        rows = np.full(shape, -1, dtype=np.int64)
+        rows[country_codes[::-1], year_codes[::-1]] = np.arange(len(df))[::-1]
+
+        groups = None
+        if group_col and group_col in df.columns:
+            group_of = df.groupby(country_codes)[group_col].first()
+            groups = {
+                name: np.asarray(positions)
+                for name, positions in group_of.groupby(group_of, observed=True).groups.items()
+            }
+
+        return cls(countries, year_values, metrics, values, rows, groups,
+                   country_col=country_col, year_col=year_col, group_col=group_col)
+
+    def country_index(self, countries):
+        """
+        Positions of the given countries, unknown names ignored
+        """
+        return np.array([self._country_pos[c] for c in countries if c in self._country_pos], dtype=np.intp)
+
+    def year_slice(self, start, end):
+        """
+        Slice of the year axis covering start..end inclusive
+        """
+        first = int(np.clip(start - self.years[0], 0, len(self.years)))
+        last = int(np.clip(end - self.years[0] + 1, 0, len(self.years)))
+        return slice(first, last)
+
+    def _long(self, labels, label_col, years, block, metric):
+        data = pd.DataFrame({
+            label_col: np.repeat(labels, len(years)),
+            self.year_col: np.tile(years, len(labels)),
+            metric: block.ravel()
+        })
+        return data[data[metric].notna()].reset_index(drop=True)
+
+    def series(self, countries, start, end, metric):
+        """
+        Country-year means of one metric as a long DataFrame for plotting
+        """
+        index = self.country_index(countries)
+        years = self.year_slice(start, end)
+        block = self.values[index, years, self._metric_pos[metric]]
+        labels = [self.countries[i] for i in index]
+        return self._long(labels, self.country_col, self.years[years], block, metric)
+
+    def mean_by_country(self, countries, start, end, metric):
+        """
+        Mean of a metric over the year range for each country, from prefix sums
+        """
+        index = self.country_index(countries)
+        years = self.year_slice(start, end)
+        m = self._metric_pos[metric]
+        total = self._sums[index, years.stop, m] - self._sums[index, years.start, m]
+        count = self._counts[index, years.stop, m] - self._counts[index, years.start, m]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(count > 0, total / count, np.nan)
+        return pd.Series(means, index=pd.Index([self.countries[i] for i in index], name=self.country_col),
+                         name=metric)
+
+    def group_series(self, start, end, metric):
+        """
+        Continent-year means (each country weighted equally) as a long DataFrame
+        """
+        years = self.year_slice(start, end)
+        block = self.group_values[:, years, self._metric_pos[metric]]
+        return self._long(list(self.groups), self.group_col, self.years[years], block, metric)
+
+    def row_positions(self, countries, start, end):
+        """
+        Positions of source rows for the selection, in country then year order
+        """
+        rows = self.rows[self.country_index(countries), self.year_slice(start, end)].ravel()
+        return rows[rows >= 0]
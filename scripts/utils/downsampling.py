@@ -0,0 +1,127 @@
+"""
+Point reduction for plotting large series and scatters
+Line charts keep their visual shape with LTTB or min-max decimation, and
+scatters are aggregated server side into a 2-D raster of counts and means,
+so the browser receives a bounded number of points whatever the data size
+"""
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line
+
+    Args:
+        x: Sorted x values
+        y: y values
+        n_out: Number of points to keep (first and last are always kept)
+
+    Returns:
+        Array of selected indices, ascending
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    bounds = np.append(edges, n)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        next_lo, next_hi = bounds[i + 1], bounds[i + 2]
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def min_max(x, y, n_out):
+    """
+    Min-max decimation: the lowest and highest point of n_out / 2 equal-width x bins
+
+    Returns:
+        Array of selected indices, ascending
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    n_bins = n_out // 2
+    bins = np.minimum(((x - x[0]) / (x[-1] - x[0] or 1) * n_bins).astype(np.intp), n_bins - 1)
+    order = np.lexsort((y, bins))
+    starts = np.flatnonzero(np.r_[True, np.diff(bins[order]) != 0])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def downsample(x, y, n_out, method='lttb'):
+    """
+    Indices of at most n_out points of a line, using one of METHODS
+    """
+    if method == 'lttb':
+        return lttb(x, y, n_out)
+    if method == 'minmax':
+        return min_max(x, y, n_out)
+    raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+
+
+def downsample_groups(df, x, y, by, max_points, method='lttb'):
+    """
+    Downsample every line of a long DataFrame to at most max_points points
+
+    Args:
+        df: Long DataFrame with one row per point
+        x: Column of the x axis
+        y: Column of the y axis
+        by: Column identifying each line (e.g. country)
+        max_points: Maximum points per line
+        method: One of METHODS
+
+    Returns:
+        DataFrame with the selected rows (df itself when no line is too long)
+    """
+    if df.empty or df.groupby(by, sort=False, observed=True).size().max() <= max_points:
+        return df
+    keep = []
+    data = df.sort_values([by, x], kind='stable').reset_index(drop=True)
+    for positions in data.groupby(by, sort=False, observed=True).indices.values():
+        selected = downsample(data[x].to_numpy()[positions], data[y].to_numpy()[positions], max_points, method)
+        keep.append(positions[selected])
+    return data.iloc[np.sort(np.concatenate(keep))]
+
+
+def bin2d(x, y, bins=200, values=None):
+    """
+    Server-side 2-D aggregation of a scatter (datashader-style raster)
+
+    Args:
+        x: x values
+        y: y values
+        bins: Number of bins per axis
+        values: Optional values averaged within each bin (e.g. absolute error)
+
+    Returns:
+        Tuple (x bin centers, y bin centers, counts (ny, nx), means (ny, nx) or
+        None); empty bins are NaN so they are not drawn
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    means = None
+    if values is not None:
+        totals, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=np.asarray(values, dtype=float))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, totals / counts, np.nan).T
+    counts = np.where(counts > 0, counts, np.nan).T
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts, means
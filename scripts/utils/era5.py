@@ -0,0 +1,67 @@
+"""
+Lazy, chunked access to the ERA5 monthly NetCDF files
+Extracts every country point in one vectorized selection computed in parallel
+"""
+
+import xarray as xr
+
+TIME_DIM = 'valid_time'
+
+try:
+    import dask
+except ImportError:
+    dask = None
+
+
+def open_era5(paths, chunk_size=12):
+    """
+    Open and merge ERA5 NetCDF files
+
+    With dask installed the files are opened lazily in chunks of `chunk_size`
+    time steps (whole lat/lon planes), so memory is bounded by a few chunks
+    rather than by the size of the download.
+
+    Args:
+        paths: List of NetCDF file paths
+        chunk_size: Time steps per chunk; None opens the files eagerly
+
+    Returns:
+        Merged xarray Dataset
+    """
+    chunks = None
+    if chunk_size and dask is not None:
+        chunks = {TIME_DIM: chunk_size, 'latitude': -1, 'longitude': -1}
+    datasets = [xr.open_dataset(path, chunks=chunks) for path in paths]
+    return xr.merge(datasets, join='outer', compat='override')
+
+
+def extract_points(ds, coordinates, workers=None):
+    """
+    Nearest-grid-cell time series for many points in a single pass
+
+    All points are selected with one pointwise (vectorized) indexer, so each
+    time chunk is read once for every country instead of once per country.
+
+    Args:
+        ds: ERA5 Dataset with latitude/longitude dimensions
+        coordinates: Dictionary mapping country to (lat, lon)
+        workers: Number of dask threads used to compute the selection
+
+    Returns:
+        DataFrame with one row per country and time step, including
+        'Country/Territory' and the ERA5 variables
+    """
+    countries = list(coordinates)
+    lats = xr.DataArray([coordinates[c][0] for c in countries], dims='country')
+    lons = xr.DataArray([coordinates[c][1] for c in countries], dims='country')
+
+    points = ds.sel(latitude=lats, longitude=lons, method='nearest')
+    points = points.assign_coords(country=('country', countries))
+
+    if dask is not None:
+        with dask.config.set(scheduler='threads', num_workers=workers):
+            points = points.compute()
+    else:
+        points = points.load()
+
+    return points.to_dataframe().reset_index().rename(columns={'country': 'Country/Territory'})
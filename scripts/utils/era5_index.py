@@ -0,0 +1,312 @@
+"""
+Index of ERA5 NetCDF files and lazy multi-file assembly
+Records which variables and time range every NetCDF file (or NetCDF member
+of a CDS ZIP chunk) holds, so a query opens only the files it needs, all at
+once with open_mfdataset. Uncompressed ZIP members are read in place through
+a byte window over the archive; deflated members are extracted once to a
+cache next to the index
+"""
+
+import io
+import json
+import os
+import struct
+import threading
+import zipfile
+from collections import defaultdict
+
+import pandas as pd
+import xarray as xr
+
+from scripts.utils.cds_download import MANIFEST_FILE, ChunkManifest
+from scripts.utils.era5 import TIME_DIM
+
+try:
+    import dask
+except ImportError:
+    dask = None
+
+INDEX_FILE = 'era5_index.json'
+MEMBER_CACHE = '.members'
+
+_ENGINES = {b'\x89HDF': 'h5netcdf', b'CDF\x01': 'scipy', b'CDF\x02': 'scipy'}
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+# os.pread is Unix-only; elsewhere reads seek and read the shared handle under a lock
+_HAS_PREAD = hasattr(os, 'pread')
+
+
+class ZipMember(io.RawIOBase):
+    """
+    Read-only, seekable view of an uncompressed ZIP member
+
+    Reads are positional (os.pread) on the archive, so several views can be
+    read from different threads without sharing a file position; where
+    os.pread is missing (Windows) a lock serializes seek + read instead. The
+    archive handle is closed by release(), not on close(): dask tokenizes
+    copies of the views, and a copy being closed must not invalidate the
+    original.
+    """
+
+    def __init__(self, path, info):
+        super().__init__()
+        self._archive = open(path, 'rb')
+        self._fd = self._archive.fileno()
+        self._lock = threading.Lock()
+        header = self._read_at(info.header_offset, _LOCAL_HEADER.size)
+        name_length, extra_length = _LOCAL_HEADER.unpack(header)[-2:]
+        self._start = info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+        self._size = info.file_size
+        self._position = 0
+
+    def _read_at(self, offset, n):
+        if _HAS_PREAD:
+            return os.pread(self._fd, n, offset)
+        with self._lock:
+            self._archive.seek(offset)
+            return self._archive.read(n)
+
+    def release(self):
+        """
+        Close the archive handle shared by this view and its copies
+        """
+        self._archive.close()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def readinto(self, buffer):
+        n = max(0, min(len(buffer), self._size - self._position))
+        data = self._read_at(self._start + self._position, n) if n else b''
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def _engine(head):
+    engine = _ENGINES.get(head[:4])
+    if engine is None:
+        raise ValueError(f"not a NetCDF file (signature {head[:4]!r})")
+    return engine
+
+
+def _members(path):
+    """
+    NetCDF members of a file: the file itself or every .nc member of a ZIP
+
+    Returns:
+        List of (member name or None, engine, stored uncompressed)
+    """
+    if not zipfile.is_zipfile(path):
+        with open(path, 'rb') as f:
+            return [(None, _engine(f.read(4)), True)]
+    members = []
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.filename.endswith('.nc'):
+                with archive.open(info) as f:
+                    engine = _engine(f.read(4))
+                members.append((info.filename, engine, info.compress_type == zipfile.ZIP_STORED))
+    return members
+
+
+class Era5Index:
+    """
+    Variables and time coverage of a set of ERA5 files, persisted as JSON
+
+    Entries are rescanned only when their file's size or modification time
+    changes, so refreshing after a new chunk download reads one header.
+
+    Args:
+        directory: Directory of the files, the index and the member cache
+        paths: Files to index (default: the chunks of the download manifest
+            in `directory`, else every .zip/.nc file in it)
+    """
+
+    def __init__(self, directory, paths=None):
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_FILE)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = []
+        self.refresh(self._default_paths() if paths is None else paths)
+
+    def _default_paths(self):
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            return ChunkManifest(manifest_path).files(self.directory)
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.endswith(('.zip', '.nc')))
+
+    def refresh(self, paths):
+        """
+        Rescan new or modified files and drop entries of files no longer listed
+        """
+        previous = defaultdict(list)
+        for entry in self.entries:
+            previous[entry['file']].append(entry)
+
+        entries = []
+        changed = False
+        for path in paths:
+            stat = os.stat(path)
+            name = os.path.relpath(path, self.directory)
+            cached = previous.pop(name, [])
+            if cached and all(e['size'] == stat.st_size and e['mtime_ns'] == stat.st_mtime_ns for e in cached):
+                entries.extend(cached)
+                continue
+            changed = True
+            for member, engine, stored in _members(path):
+                source = self._source(path, member, stored)
+                try:
+                    with xr.open_dataset(source, engine=engine) as ds:
+                        times = pd.to_datetime(ds[TIME_DIM].values)
+                        variables = sorted(ds.data_vars)
+                finally:
+                    if isinstance(source, ZipMember):
+                        source.release()
+                entries.append({
+                    'file': name,
+                    'member': member,
+                    'engine': engine,
+                    'stored': stored,
+                    'variables': variables,
+                    'start': times.min().isoformat(),
+                    'end': times.max().isoformat(),
+                    'steps': len(times),
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                })
+        if changed or previous:
+            self.entries = entries
+            self._save()
+        return self
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _source(self, path, member, stored):
+        # Path or file object from which xarray reads one indexed NetCDF
+        if member is None:
+            return path
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo(member)
+            if stored:
+                return ZipMember(path, info)
+            cache_dir = os.path.join(self.directory, MEMBER_CACHE, os.path.splitext(os.path.basename(path))[0])
+            target = os.path.join(cache_dir, member)
+            if not os.path.exists(target) or os.path.getsize(target) != info.file_size:
+                archive.extract(info, cache_dir)
+            return target
+
+    def select(self, variables=None, start=None, end=None):
+        """
+        Entries holding any of `variables` with data between `start` and `end`
+
+        Args:
+            variables: ERA5 short names (default: all)
+            start: First date (anything pd.Timestamp accepts, default: unbounded)
+            end: Last date (default: unbounded)
+
+        Returns:
+            List of index entries
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        selected = []
+        for entry in self.entries:
+            if variables is not None and not set(variables) & set(entry['variables']):
+                continue
+            if start is not None and pd.Timestamp(entry['end']) < start:
+                continue
+            if end is not None and pd.Timestamp(entry['start']) > end:
+                continue
+            selected.append(entry)
+        return selected
+
+    def open(self, variables=None, start=None, end=None, chunk_size=12, parallel=True):
+        """
+        Lazily open only the files a query needs as one Dataset
+
+        Files holding the same variables (one CDS stream / step type, whatever
+        the file is called) are concatenated along time with open_mfdataset,
+        opening them in parallel when dask is installed; groups are then
+        merged variable-wise, and a variable present in several groups must
+        agree wherever both have data.
+
+        Args:
+            variables: ERA5 short names to keep (default: all)
+            start: First date
+            end: Last date
+            chunk_size: Time steps per dask chunk; None opens eagerly
+            parallel: Open the files concurrently
+
+        Returns:
+            xarray Dataset; closing it closes every underlying file
+
+        Raises:
+            ValueError: If no indexed file matches the query
+            xarray.MergeError: If two groups hold conflicting values of a variable
+        """
+        entries = self.select(variables, start, end)
+        if not entries:
+            raise ValueError(f"No indexed ERA5 file holds {variables or 'any variable'} "
+                             f"between {start} and {end}")
+
+        chunks = None
+        if chunk_size and dask is not None:
+            chunks = {TIME_DIM: chunk_size, 'latitude': -1, 'longitude': -1}
+        keep = None if variables is None else list(variables)
+
+        def preprocess(ds):
+            return ds if keep is None else ds[[v for v in keep if v in ds.data_vars]]
+
+        groups = defaultdict(list)
+        for entry in sorted(entries, key=lambda e: e['start']):
+            groups[(tuple(entry['variables']), entry['engine'])].append(entry)
+
+        datasets = []
+        views = []
+
+        def close():
+            for part in datasets:
+                part.close()
+            for view in views:
+                view.release()
+
+        try:
+            for (_, engine), group in sorted(groups.items()):
+                sources = [self._source(os.path.join(self.directory, e['file']), e['member'], e['stored'])
+                           for e in group]
+                views.extend(source for source in sources if isinstance(source, ZipMember))
+                datasets.append(xr.open_mfdataset(
+                    sources, engine=engine, chunks=chunks, combine='by_coords', preprocess=preprocess,
+                    data_vars='minimal', coords='minimal', compat='override', combine_attrs='override',
+                    parallel=parallel and dask is not None
+                ))
+            ds = xr.merge(datasets, join='outer', compat='no_conflicts', combine_attrs='override')
+        except Exception:
+            close()
+            raise
+
+        if start is not None or end is not None:
+            ds = ds.sel({TIME_DIM: slice(start, end)})
+
+        ds.set_close(close)
+        return ds
+
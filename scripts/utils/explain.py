@@ -0,0 +1,214 @@
+"""
+Explanations for tree-ensemble regressors: exact path-dependent TreeSHAP
+attributions, ICE curves and partial dependence for every row of a dataset
+Computed once per model version and stored next to the registered model so
+the dashboard only reads arrays at render time
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import factorial
+
+import numpy as np
+
+EXPLANATIONS_FILE = 'explanations.npz'
+
+_rows = {}
+
+
+def _leaf_factors(tree, n_features):
+    """
+    Per-leaf path bounds and cover fractions of a fitted sklearn tree
+
+    Returns:
+        Tuple (values (L,), lower (L, d), upper (L, d), cover (L, d)) where a
+        row follows the leaf's path on feature j when lower < x_j <= upper, and
+        cover is the product of the cover fractions of the path splits on j
+        (1 for features the path does not split on)
+    """
+    left, right = tree.children_left, tree.children_right
+    feature, threshold = tree.feature, tree.threshold
+    weight = tree.weighted_n_node_samples
+
+    values, lowers, uppers, covers = [], [], [], []
+    stack = [(0, np.full(n_features, -np.inf), np.full(n_features, np.inf), np.ones(n_features))]
+    while stack:
+        node, lower, upper, cover = stack.pop()
+        if left[node] == -1:
+            values.append(tree.value[node].ravel()[0])
+            lowers.append(lower)
+            uppers.append(upper)
+            covers.append(cover)
+            continue
+        j = feature[node]
+        for child, is_left in ((left[node], True), (right[node], False)):
+            child_lower, child_upper, child_cover = lower.copy(), upper.copy(), cover.copy()
+            if is_left:
+                child_upper[j] = min(upper[j], threshold[node])
+            else:
+                child_lower[j] = max(lower[j], threshold[node])
+            child_cover[j] *= weight[child] / weight[node]
+            stack.append((child, child_lower, child_upper, child_cover))
+    return np.array(values), np.array(lowers), np.array(uppers), np.array(covers)
+
+
+def _tree_shap(tree):
+    """
+    Exact path-dependent TreeSHAP values of one tree for all rows in _rows['X']
+
+    Within a leaf the path-dependent value function is a product game,
+    v(S) = value * prod_{j in S} a_j * prod_{j not in S} b_j, with a_j the
+    indicator that x follows the path on j and b_j its cover fraction, so
+    every Shapley value is a weighted sum of the coefficients of
+    prod_{k != j} (b_k + a_k t) and all leaves and rows are handled at once.
+
+    Returns:
+        Tuple (phi (n_rows, d), expected value of the tree)
+    """
+    X = _rows['X']
+    n_rows, d = X.shape
+    values, lower, upper, cover = _leaf_factors(tree, d)
+    a = ((X[np.newaxis] > lower[:, np.newaxis]) & (X[np.newaxis] <= upper[:, np.newaxis])).astype(float)
+    b = np.broadcast_to(cover[:, np.newaxis], a.shape)
+    shapley_weights = np.array([factorial(s) * factorial(d - s - 1) / factorial(d) for s in range(d)])
+
+    phi = np.zeros((n_rows, d))
+    for j in range(d):
+        poly = [np.ones(a.shape[:2])]
+        for k in range(d):
+            if k == j:
+                continue
+            grown = [poly[0] * b[..., k]]
+            for s in range(1, len(poly)):
+                grown.append(poly[s] * b[..., k] + poly[s - 1] * a[..., k])
+            grown.append(poly[-1] * a[..., k])
+            poly = grown
+        weighted = sum(w * p for w, p in zip(shapley_weights, poly))
+        phi[:, j] = values @ ((a[..., j] - b[..., j]) * weighted)
+
+    expected = float(values @ cover.prod(axis=1))
+    return phi, expected
+
+
+def _init_worker(X):
+    _rows['X'] = X
+
+
+def tree_shap(forest, X, workers=1):
+    """
+    Exact path-dependent TreeSHAP attributions of a random forest regressor
+
+    Args:
+        forest: Fitted RandomForestRegressor (single output)
+        X: Feature array (n_rows, n_features)
+        workers: Processes sharing the trees
+
+    Returns:
+        Tuple (phi (n_rows, n_features), base value) with
+        base + phi.sum(axis=1) equal to forest.predict(X)
+    """
+    # sklearn compares float32 features against the split thresholds
+    X = np.asarray(X, dtype=np.float32).astype(float)
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X,)) as executor:
+            results = list(executor.map(_tree_shap, trees))
+    else:
+        _init_worker(X)
+        results = [_tree_shap(tree) for tree in trees]
+
+    phi = sum(r[0] for r in results) / len(results)
+    base = sum(r[1] for r in results) / len(results)
+    return phi, base
+
+
+def ice_curves(model, X, features, grid_size=20):
+    """
+    Individual conditional expectation curves of every row for every feature
+
+    Each feature's curves come from a single batched predict call over all
+    rows and grid points.
+
+    Args:
+        model: Fitted estimator taking a DataFrame of `features`
+        X: DataFrame of rows to explain
+        features: Feature names
+        grid_size: Grid points per feature (quantiles of the data)
+
+    Returns:
+        Tuple (grids (d, grid_size), ice (d, n_rows, grid_size))
+    """
+    import pandas as pd
+
+    n_rows = len(X)
+    grids, ice = [], []
+    for feature in features:
+        grid = np.quantile(X[feature].to_numpy(dtype=float), np.linspace(0, 1, grid_size))
+        repeated = pd.DataFrame(np.repeat(X[features].to_numpy(dtype=float), grid_size, axis=0), columns=features)
+        repeated[feature] = np.tile(grid, n_rows)
+        grids.append(grid)
+        ice.append(np.asarray(model.predict(repeated)).reshape(n_rows, grid_size))
+    return np.array(grids), np.array(ice)
+
+
+def explain(model, df, features, keys=('Country/Territory', 'Year'), grid_size=20, workers=1):
+    """
+    All explanations of a model for every row of df
+
+    Returns:
+        Dictionary of arrays: features, keys, shap, base, prediction, grids, ice, pdp
+    """
+    X = df[features]
+    phi, base = tree_shap(model, X.to_numpy(dtype=float), workers=workers)
+    grids, ice = ice_curves(model, X, features, grid_size)
+    explanation = {
+        'features': np.array(features),
+        'shap': phi,
+        'base': np.array(base),
+        'prediction': np.asarray(model.predict(X)),
+        'grids': grids,
+        'ice': ice,
+        'pdp': ice.mean(axis=1),
+    }
+    for key in keys:
+        values = df[key].to_numpy()
+        # Text keys (e.g. a categorical country) as fixed-width unicode, so the file loads without pickle
+        explanation[f'key_{key}'] = values.astype(str) if values.dtype == object else values
+    return explanation
+
+
+def save_explanations(directory, explanation, data_hash):
+    """
+    Store explanations in a model version directory
+
+    Args:
+        directory: Registry directory of the explained model version
+        explanation: Dictionary returned by explain
+        data_hash: Hash of the explained rows (see model_registry.data_hash)
+
+    Returns:
+        Path of the written file
+    """
+    path = os.path.join(directory, EXPLANATIONS_FILE)
+    np.savez_compressed(path, data_hash=np.array(data_hash), **explanation)
+    return path
+
+
+def load_explanations(directory):
+    """
+    Stored explanations of a model version, or None
+
+    Files written before the keys were stored as unicode hold object arrays,
+    which would need pickle to load; they count as missing.
+
+    Returns:
+        Dictionary of arrays (keys as returned by explain, plus data_hash)
+    """
+    path = os.path.join(directory, EXPLANATIONS_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        try:
+            return {name: data[name] for name in data.files}
+        except ValueError:
+            return None
@@ -0,0 +1,92 @@
+"""
+Bounded LRU cache of rendered Plotly figures keyed by normalized filter state
+Figures are stored as their themed JSON, so a repeated view is served by
+parsing the JSON instead of rebuilding traces and re-applying the layout.
+The JSON comes from a figure that was validated when it was built, so it is
+turned back into a Figure without running plotly's property validation again
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+
+def filter_key(name, countries=None, year_range=None, **params):
+    """
+    Hashable, order-independent key of a figure and the filters it depends on
+
+    Args:
+        name: Figure name
+        countries: Selected countries (order and duplicates are ignored)
+        year_range: (start, end) years
+        **params: Any other filter values (variable, cause, ...)
+
+    Returns:
+        Tuple (name, countries, years, sorted params)
+    """
+    countries = tuple(sorted(set(countries))) if countries is not None else None
+    years = tuple(int(y) for y in year_range) if year_range is not None else None
+    return (name, countries, years, tuple(sorted(params.items())))
+
+
+class FigureCache:
+    """
+    Thread-safe LRU cache of figure JSON shared by all sessions
+
+    Attributes:
+        maxsize: Maximum number of stored figures
+        hits: Number of figures served from the cache
+        misses: Number of figures built
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._figures)
+
+    def __contains__(self, key):
+        return key in self._figures
+
+    def _payload(self, key, build):
+        with self._lock:
+            payload = self._figures.get(key)
+            if payload is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return payload
+        payload = build().to_json()
+        with self._lock:
+            self.misses += 1
+            self._figures[key] = payload
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return payload
+
+    def get(self, key, build):
+        """
+        Figure for key, built with build() on a miss
+
+        Args:
+            key: Key from filter_key
+            build: Callable returning a themed plotly Figure
+
+        Returns:
+            A new plotly Figure (safe to modify, the cached JSON is not affected)
+        """
+        # pio.from_json re-validates every property (~5x slower). A dict is no
+        # faster either: st.plotly_chart validates dict input itself
+        return go.Figure(json.loads(self._payload(key, build)), skip_invalid=True, _validate=False)
+
+    def warm(self, key, build):
+        """
+        Build and store a figure ahead of its first request
+        """
+        self._payload(key, build)
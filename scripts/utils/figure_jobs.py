@@ -0,0 +1,164 @@
+"""
+Figure generation as independent, cacheable jobs
+Each figure is a render function plus the data it plots; jobs run in a
+process pool on the non-interactive Agg backend, are saved in every
+requested format, and are skipped when the hash of their data, parameters
+and render code matches the last successful render
+"""
+
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from scripts.utils.model_store import fingerprint
+
+FORMATS = ('png', 'svg', 'pdf')
+STATE_FILE = '.figures_state.json'
+
+
+@dataclass
+class FigureJob:
+    """
+    One figure to render
+
+    Attributes:
+        name: Output path stem relative to the output directory, e.g.
+            '01_top_correlations' or 'countries/Japan'
+        render: Module-level function render(data, **params) returning a
+            matplotlib Figure (it must be picklable for the process pool)
+        data: DataFrame (or tuple of DataFrames) plotted by the figure
+        params: Extra keyword arguments of render
+    """
+    name: str
+    render: object
+    data: object = None
+    params: dict = field(default_factory=dict)
+
+    def key(self, dpi):
+        """
+        Hash of everything the rendered files depend on
+        """
+        try:
+            source = inspect.getsource(self.render)
+        except (OSError, TypeError):
+            source = getattr(self.render, '__qualname__', repr(self.render))
+        data = self.data if isinstance(self.data, tuple) else (self.data,)
+        data = [part if isinstance(part, pd.DataFrame) else repr(part) for part in data]
+        return fingerprint(self.name, source, *data, self.params, dpi)
+
+    def paths(self, output_dir, formats):
+        return [os.path.join(output_dir, f'{self.name}.{fmt}') for fmt in formats]
+
+
+def _init_worker(setup=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    if setup is not None:
+        setup()
+
+
+def _render(job, output_dir, formats, dpi):
+    import matplotlib.pyplot as plt
+
+    start = time.time()
+    fig = job.render(job.data, **job.params)
+    try:
+        for path in job.paths(output_dir, formats):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return time.time() - start
+
+
+def _load_state(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def render_figures(jobs, output_dir, formats=('png',), dpi=300, workers=1, force=False, setup=None, log=print):
+    """
+    Render the jobs whose inputs changed since their last successful render
+
+    Args:
+        jobs: List of FigureJob
+        output_dir: Directory of the figure files (and of the state file)
+        formats: Output formats, a subset of FORMATS
+        dpi: Resolution of raster output (and of raster elements in vector files)
+        workers: Processes rendering in parallel (1 renders in this process)
+        force: Render every job even if it is up to date
+        setup: Optional module-level function run once per worker before
+            rendering (e.g. to set a plotting style)
+        log: Callable used for progress messages
+
+    Returns:
+        Dictionary mapping job name to 'rendered', 'up to date' or 'failed'
+
+    Raises:
+        ValueError: If a format is not in FORMATS or job names are repeated
+    """
+    unknown = sorted(set(formats) - set(FORMATS))
+    if unknown:
+        raise ValueError(f"Unknown formats {unknown}, expected a subset of {FORMATS}")
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Figure job names must be unique")
+
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, STATE_FILE)
+    state = _load_state(state_path)
+
+    status = {}
+    keys = {}
+    pending = []
+    for job in jobs:
+        keys[job.name] = job.key(dpi)
+        rendered = state.get(job.name, {})
+        up_to_date = all(rendered.get(fmt) == keys[job.name] for fmt in formats) and \
+            all(os.path.exists(path) for path in job.paths(output_dir, formats))
+        if up_to_date and not force:
+            status[job.name] = 'up to date'
+        else:
+            pending.append(job)
+    log(f"{len(pending)} figuras por generar, {len(jobs) - len(pending)} sin cambios")
+
+    def finished(job, elapsed=None, error=None):
+        if error is None:
+            status[job.name] = 'rendered'
+            state.setdefault(job.name, {}).update({fmt: keys[job.name] for fmt in formats})
+            log(f"  {job.name} ({elapsed:.1f}s)")
+        else:
+            status[job.name] = 'failed'
+            for fmt in formats:
+                state.get(job.name, {}).pop(fmt, None)
+            log(f"  {job.name} FALLÓ: {error}")
+
+    if workers and workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(setup,)) as executor:
+            futures = {executor.submit(_render, job, output_dir, formats, dpi): job for job in pending}
+            for future in as_completed(futures):
+                try:
+                    finished(futures[future], future.result())
+                except Exception as e:
+                    finished(futures[future], error=e)
+    else:
+        _init_worker(setup)
+        for job in pending:
+            try:
+                finished(job, _render(job, output_dir, formats, dpi))
+            except Exception as e:
+                finished(job, error=e)
+
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, state_path)
+    return status
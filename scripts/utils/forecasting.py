@@ -0,0 +1,473 @@
+"""
+Forecasting engine for the temporal prediction stage
+Runs independent (country, cause) Prophet fits over a process pool, or fits
+every series at once with the batched trend backend
+"""
+
+import logging
+import os
+import time
+import warnings
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.climate_scenarios import fit_linear_trends, project_trends
+from scripts.utils.model_store import ModelStore, fingerprint
+
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+PROPHET_PARAMS = {
+    'yearly_seasonality': False,
+    'weekly_seasonality': False,
+    'daily_seasonality': False,
+    'changepoint_prior_scale': 0.05,
+    'seasonality_prior_scale': 10
+}
+
+
+@dataclass
+class ForecastTask:
+    """
+    One independent forecast job
+
+    Attributes:
+        country: Country name
+        cause: Mortality cause column name
+        train_df: Training data formatted for Prophet (ds, y, and regressors)
+        climate_vars: List of climate variables used as regressors
+        periods: Number of years to forecast
+        future_df: Optional projected climate (ds and regressors) for the
+            forecast years; when missing it is extrapolated from train_df
+    """
+    country: str
+    cause: str
+    train_df: pd.DataFrame
+    climate_vars: list
+    periods: int = 11
+    future_df: pd.DataFrame = None
+
+    @property
+    def key(self):
+        return (self.country, self.cause)
+
+
+def train_prophet_model(train_df, climate_vars):
+    """
+    Train Prophet model with climate variables as regressors
+
+    Args:
+        train_df: Training data formatted for Prophet
+        climate_vars: List of climate variables
+
+    Returns:
+        Trained Prophet model
+    """
+    from prophet import Prophet
+
+    model = Prophet(**PROPHET_PARAMS)
+
+    # Add climate variables as regressors
+    for var in climate_vars:
+        model.add_regressor(var)
+
+    model.fit(train_df)
+    return model
+
+
+def create_future_climate_scenarios(train_df, climate_vars, periods=11):
+    """
+    Create future climate scenarios for prediction
+    Uses linear trend extrapolation
+
+    Args:
+        train_df: Historical data
+        climate_vars: Climate variables
+        periods: Number of years to forecast
+
+    Returns:
+        DataFrame with future dates and climate projections
+    """
+    future = pd.DataFrame({
+        'ds': pd.date_range(start='2020', periods=periods, freq='YS')
+    })
+
+    # Project all climate variables using one batched linear trend fit
+    x = np.arange(len(train_df))
+    slope, intercept = fit_linear_trends(x, train_df[climate_vars].to_numpy(dtype=float))
+    future_x = np.arange(len(train_df), len(train_df) + periods)
+    projected = project_trends(slope, intercept, x[-1], future_x)
+    for i, var in enumerate(climate_vars):
+        future[var] = projected[:, i]
+
+    return future
+
+
+def _prophet_to_json(model):
+    from prophet.serialize import model_to_json
+    return model_to_json(model)
+
+
+def _prophet_from_json(text):
+    from prophet.serialize import model_from_json
+    return model_from_json(text)
+
+
+def prophet_model_store(root, max_bytes=None, max_entries=None):
+    """
+    Model store holding fitted Prophet models as JSON
+
+    Args:
+        root: Cache directory
+        max_bytes: Optional total size limit
+        max_entries: Optional entry count limit
+
+    Returns:
+        ModelStore
+    """
+    return ModelStore(root, _prophet_to_json, _prophet_from_json,
+                      max_bytes=max_bytes, max_entries=max_entries)
+
+
+def prophet_cache_key(task):
+    """
+    Fingerprint of everything that determines a task's fitted Prophet model
+
+    Args:
+        task: ForecastTask
+
+    Returns:
+        Hex digest string
+    """
+    import prophet
+    return fingerprint(
+        task.train_df[['ds', 'y'] + list(task.climate_vars)],
+        list(task.climate_vars),
+        PROPHET_PARAMS,
+        prophet.__version__
+    )
+
+
+def fit_prophet_forecast(task, store=None):
+    """
+    Fit one Prophet model and forecast its future climate scenario
+
+    Args:
+        task: ForecastTask to run
+        store: Optional ModelStore; a model fitted on identical inputs is
+            loaded from it instead of being refitted
+
+    Returns:
+        DataFrame with ds, yhat, yhat_lower and yhat_upper
+    """
+    model = None
+    if store is not None:
+        key = prophet_cache_key(task)
+        model = store.get(key)
+    if model is None:
+        model = train_prophet_model(task.train_df, task.climate_vars)
+        if store is not None:
+            store.put(key, model)
+    future = task.future_df
+    if future is None:
+        future = create_future_climate_scenarios(task.train_df, task.climate_vars, periods=task.periods)
+    forecast = model.predict(future)
+    return forecast[FORECAST_COLUMNS]
+
+
+def _init_worker():
+    """Silence Stan/Prophet chatter inside pool workers"""
+    warnings.filterwarnings('ignore')
+    try:
+        from cmdstanpy.utils import get_logger
+    except ImportError:
+        return
+    # get_logger() installs cmdstanpy's handler at DEBUG on first use
+    get_logger().setLevel(logging.WARNING)
+
+
+def _terminate_workers(executor):
+    """Kill the worker processes of an executor that has hung tasks"""
+    terminate = getattr(executor, 'terminate_workers', None)
+    if terminate is not None:
+        terminate()
+        return
+    for process in list((getattr(executor, '_processes', None) or {}).values()):
+        if process.is_alive():
+            process.terminate()
+
+
+def _describe_error(error):
+    return f"{type(error).__name__}: {error}"
+
+
+def run_forecasts(tasks, fit_fn=fit_prophet_forecast, max_workers=None, timeout=None,
+                  on_result=None):
+    """
+    Run forecast tasks over a process pool, collecting results as they finish
+
+    A task that raises, kills its worker or exceeds the timeout is recorded
+    as a failure without affecting the rest of the run. Tasks caught in a
+    worker crash are re-run one at a time so only the culprit fails. Hung
+    workers are killed and the pool is recycled once no healthy task is in
+    flight.
+
+    Args:
+        tasks: Iterable of ForecastTask
+        fit_fn: Picklable callable taking a task and returning a forecast DataFrame
+        max_workers: Number of worker processes (1 runs in-process, None uses all cores)
+        timeout: Per-task wall-clock limit in seconds (ignored when running in-process)
+        on_result: Optional callback(task, forecast, error) called as each task completes
+
+    Returns:
+        Tuple (results, failures): results maps task key to forecast DataFrame,
+        failures maps task key to an error message
+    """
+    tasks = list(tasks)
+    results = {}
+    failures = {}
+
+    def record(task, forecast=None, error=None):
+        if error is None:
+            results[task.key] = forecast
+        else:
+            failures[task.key] = error
+        if on_result is not None:
+            on_result(task, forecast, error)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                record(task, forecast=fit_fn(task))
+            except Exception as e:
+                record(task, error=_describe_error(e))
+        return results, failures
+
+    max_workers = min(max_workers, len(tasks))
+    pending = deque(tasks)
+    suspects = deque()
+    in_flight = {}
+    stalled = 0
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+
+    def submit(task, isolated=False):
+        in_flight[executor.submit(fit_fn, task)] = (task, time.monotonic(), isolated)
+
+    def recycle():
+        nonlocal executor, stalled
+        executor.shutdown(wait=False, cancel_futures=True)
+        _terminate_workers(executor)
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+        stalled = 0
+
+    try:
+        while pending or suspects or in_flight:
+            if (pending or suspects) and not in_flight and stalled:
+                recycle()
+
+            # Keep at most one task per free worker in flight so the submit
+            # time is also the start time used for the timeout
+            if suspects:
+                if not in_flight:
+                    submit(suspects.popleft(), isolated=True)
+            else:
+                while pending and len(in_flight) < max_workers - stalled:
+                    submit(pending.popleft())
+
+            wait_for = None
+            if timeout:
+                oldest = min(started for _, started, _ in in_flight.values())
+                wait_for = max(0.0, oldest + timeout - time.monotonic())
+            done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            broken = False
+            for future in done:
+                task, _, isolated = in_flight.pop(future)
+                try:
+                    record(task, forecast=future.result())
+                except BrokenProcessPool as e:
+                    broken = True
+                    if isolated:
+                        record(task, error=_describe_error(e))
+                    else:
+                        suspects.append(task)
+                except Exception as e:
+                    record(task, error=_describe_error(e))
+
+            if timeout:
+                now = time.monotonic()
+                for future, (task, started, _) in list(in_flight.items()):
+                    if now - started >= timeout:
+                        del in_flight[future]
+                        future.cancel()
+                        stalled += 1
+                        record(task, error=f"TimeoutError: exceeded {timeout}s")
+
+            if broken:
+                suspects.extend(task for task, _, _ in in_flight.values())
+                in_flight.clear()
+                recycle()
+    finally:
+        executor.shutdown(wait=not stalled, cancel_futures=True)
+        if stalled:
+            _terminate_workers(executor)
+
+    return results, failures
+
+
+def _trend_design(t, changepoints):
+    """
+    Piecewise-linear trend basis: intercept, slope and one hinge per changepoint
+
+    Args:
+        t: Array (..., T) of scaled times
+        changepoints: Array (K,) of changepoint locations on the same scale
+
+    Returns:
+        Array (..., T, 2 + K)
+    """
+    hinges = np.maximum(t[..., None] - changepoints, 0.0)
+    return np.concatenate([np.ones_like(t)[..., None], t[..., None], hinges], axis=-1)
+
+
+def fit_trend_forecasts(tasks, n_changepoints=5, changepoint_range=0.8,
+                        changepoint_penalty=0.01, interval_width=0.80,
+                        intervals='analytic', n_bootstrap=500, seed=42):
+    """
+    Fast alternative to Prophet: piecewise-linear trend plus linear climate
+    regressors, fitted for every series at once with batched least squares
+
+    Series of equal length are stacked into a (series, time, feature) array
+    and solved in a single ridge system, penalising only the changepoint
+    hinges the way Prophet's sparse changepoint prior does. Future regressors
+    come from each task's future_df, or the same linear climate extrapolation
+    used by Prophet when it has none.
+
+    Args:
+        tasks: Iterable of ForecastTask
+        n_changepoints: Number of potential trend changepoints
+        changepoint_range: Fraction of the history where changepoints are placed
+        changepoint_penalty: Ridge penalty on changepoint slope changes
+        interval_width: Width of the prediction interval (Prophet default 0.80)
+        intervals: 'analytic' (normal approximation) or 'bootstrap' (residual bootstrap)
+        n_bootstrap: Number of bootstrap replicates
+        seed: Seed for the bootstrap RNG
+
+    Returns:
+        Tuple (results, failures) with the same layout as run_forecasts
+    """
+    if intervals not in ('analytic', 'bootstrap'):
+        raise ValueError(f"Unknown interval method: {intervals}")
+
+    results = {}
+    failures = {}
+    rng = np.random.default_rng(seed)
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+
+    # Group series that can share one batched solve
+    groups = {}
+    for task in tasks:
+        values = task.train_df[['y'] + list(task.climate_vars)].to_numpy(dtype=float)
+        if np.isnan(values).any():
+            failures[task.key] = "ValueError: series contains missing values"
+            continue
+        ds = task.train_df['ds'].to_numpy().astype('datetime64[D]').astype(float)
+        if task.future_df is not None:
+            future_values = task.future_df[list(task.climate_vars)].to_numpy(dtype=float)
+            start = task.future_df['ds'].iloc[0]
+        else:
+            future_values = None
+            start = pd.Timestamp('2020')
+        key = (len(values), task.periods, tuple(task.climate_vars), start)
+        groups.setdefault(key, []).append((task, ds, values, future_values))
+
+    for (n_obs, periods, climate_vars, start), members in groups.items():
+        group = [task for task, _, _, _ in members]
+        n_vars = len(climate_vars)
+        ds = np.stack([member[1] for member in members])
+        values = np.stack([member[2] for member in members])
+        y, regressors = values[..., 0], values[..., 1:]
+
+        # Future climate: precomputed scenario when the task has one,
+        # otherwise a linear trend per series and variable in one batched fit
+        x = np.arange(n_obs)
+        future_x = np.arange(n_obs, n_obs + periods)
+        slope, intercept = fit_linear_trends(x, regressors.transpose(1, 0, 2).reshape(n_obs, -1))
+        future_regressors = project_trends(slope, intercept, x[-1], future_x)
+        future_regressors = future_regressors.reshape(periods, len(group), n_vars).transpose(1, 0, 2)
+        for i, member in enumerate(members):
+            if member[3] is not None:
+                future_regressors[i] = member[3]
+        future_dates = pd.date_range(start=start, periods=periods, freq='YS')
+        future_ds = future_dates.values.astype('datetime64[D]').astype(float)[None, :]
+
+        # Scale time to [0, 1] and y by its max, as Prophet does
+        t0 = ds[:, :1]
+        span = ds[:, -1:] - t0
+        t = (ds - t0) / span
+        future_t = (future_ds - t0) / span
+        y_scale = np.abs(y).max(axis=1, keepdims=True)
+        y_scale[y_scale == 0] = 1.0
+        y_scaled = y / y_scale
+
+        mu = regressors.mean(axis=1, keepdims=True)
+        sigma = regressors.std(axis=1, keepdims=True)
+        sigma[sigma == 0] = 1.0
+
+        n_hinges = min(n_changepoints, max(int(np.ceil(changepoint_range * n_obs)) - 1, 0))
+        changepoints = np.linspace(0, changepoint_range, n_hinges + 1)[1:] if n_hinges else np.empty(0)
+
+        X = np.concatenate([_trend_design(t, changepoints), (regressors - mu) / sigma], axis=-1)
+        X_future = np.concatenate(
+            [_trend_design(future_t, changepoints), (future_regressors - mu) / sigma], axis=-1
+        )
+        n_features = X.shape[-1]
+
+        penalty = np.full(n_features, 1e-8)
+        penalty[2:2 + n_hinges] = changepoint_penalty
+        A = X.transpose(0, 2, 1) @ X + np.diag(penalty)
+        try:
+            A_inv = np.linalg.inv(A)
+        except np.linalg.LinAlgError:
+            A_inv = np.linalg.pinv(A)
+        hat = A_inv @ X.transpose(0, 2, 1)
+        beta = hat @ y_scaled[..., None]
+
+        fitted = (X @ beta)[..., 0]
+        residuals = y_scaled - fitted
+        dof = max(n_obs - n_features, 1)
+        noise_var = (residuals ** 2).sum(axis=1, keepdims=True) / dof
+        yhat = (X_future @ beta)[..., 0]
+
+        if intervals == 'analytic':
+            leverage = np.einsum('shp,spq,shq->sh', X_future, A_inv, X_future)
+            half_width = z * np.sqrt(noise_var * (1.0 + leverage))
+            lower, upper = yhat - half_width, yhat + half_width
+        else:
+            # Refitting on resampled residuals only shifts beta by hat @ e*,
+            # so every replicate of every series is a single batched matmul
+            draws = rng.integers(0, n_obs, size=(len(group), n_obs, n_bootstrap))
+            boot_resid = np.take_along_axis(residuals[..., None], draws, axis=1)
+            boot_beta = beta + hat @ boot_resid
+            noise_draws = rng.integers(0, n_obs, size=(len(group), periods, n_bootstrap))
+            boot_noise = np.take_along_axis(residuals[..., None], noise_draws, axis=1)
+            boot_pred = X_future @ boot_beta + boot_noise
+            alpha = (1 - interval_width) / 2
+            lower, upper = np.quantile(boot_pred, [alpha, 1 - alpha], axis=-1)
+
+        yhat, lower, upper = yhat * y_scale, lower * y_scale, upper * y_scale
+        for i, task in enumerate(group):
+            results[task.key] = pd.DataFrame({
+                'ds': future_dates,
+                'yhat': yhat[i],
+                'yhat_lower': lower[i],
+                'yhat_upper': upper[i]
+            })
+
+    return results, failures
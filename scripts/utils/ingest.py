@@ -0,0 +1,83 @@
+"""
+Streaming ingestion of the raw cause-of-death extract
+The CSV is parsed block by block with an explicit schema (dictionary-encoded
+country, int16 year, int32 death counts) and the year and country filters are
+applied to every block as it is read, so memory grows with the selected rows
+rather than with the size of the extract
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from scripts.utils.countries import COUNTRY_COL
+
+CODE_COL = 'Code'
+YEAR_COL = 'Year'
+
+DEATHS_KEY_TYPES = {
+    COUNTRY_COL: pa.dictionary(pa.int32(), pa.string()),
+    CODE_COL: pa.dictionary(pa.int32(), pa.string()),
+    YEAR_COL: pa.int16(),
+}
+COUNT_TYPE = pa.int32()
+
+
+def deaths_schema(columns):
+    """
+    Column types of a cause-of-death table: key columns from DEATHS_KEY_TYPES,
+    every other column is a death count
+    """
+    return {column: DEATHS_KEY_TYPES.get(column, COUNT_TYPE) for column in columns}
+
+
+def read_deaths(path, years=None, countries=None, block_size=16 << 20):
+    """
+    Read the raw cause-of-death CSV keeping only the requested years and countries
+
+    Args:
+        path: CSV file
+        years: Optional (first, last) year, inclusive
+        countries: Optional iterable of country names
+        block_size: Bytes parsed per block
+
+    Returns:
+        Tuple (DataFrame with a categorical country column, summary dict
+        with the rows read and the year range of the whole file)
+    """
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(column_types=deaths_schema(columns)),
+    )
+    value_set = pa.array(sorted(set(countries)), pa.string()) if countries is not None else None
+
+    batches = []
+    rows = 0
+    year_min = year_max = None
+    for batch in reader:
+        rows += batch.num_rows
+        if batch.num_rows == 0:
+            continue
+        low, high = pc.min_max(batch[YEAR_COL]).values()
+        year_min = low.as_py() if year_min is None else min(year_min, low.as_py())
+        year_max = high.as_py() if year_max is None else max(year_max, high.as_py())
+
+        mask = None
+        if years is not None:
+            mask = pc.and_(pc.greater_equal(batch[YEAR_COL], years[0]), pc.less_equal(batch[YEAR_COL], years[1]))
+        if value_set is not None:
+            in_countries = pc.is_in(batch[COUNTRY_COL], value_set=value_set)
+            mask = in_countries if mask is None else pc.and_(mask, in_countries)
+        batches.append(batch if mask is None else batch.filter(mask))
+
+    table = pa.Table.from_batches(batches, schema=reader.schema).unify_dictionaries().combine_chunks()
+    df = table.to_pandas()
+    for column in (COUNTRY_COL, CODE_COL):
+        if column in df.columns:
+            df[column] = df[column].cat.remove_unused_categories()
+
+    summary = {'rows': rows, 'year_min': year_min, 'year_max': year_max}
+    return df, summary
@@ -0,0 +1,195 @@
+"""
+Versioned registry of trained scikit-learn models
+Each version is a directory holding the joblib artifact and a JSON metadata
+sidecar with the features, library versions, training data hash and
+evaluation metrics
+"""
+
+import json
+import os
+import platform
+import re
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from scripts.utils.model_store import fingerprint
+
+MODEL_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+
+
+class IncompatibleModelError(RuntimeError):
+    """Raised when a stored model was trained with another scikit-learn minor version"""
+
+
+def _minor_version(version):
+    return tuple(str(version).split('.')[:2])
+
+
+def data_hash(df):
+    """
+    Hash of the training data (column names and values)
+    """
+    return fingerprint(df)
+
+
+class ModelRegistry:
+    """
+    Directory of versioned models: <root>/<name>/v0001/{model.joblib, metadata.json}
+
+    Args:
+        root: Registry directory
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def versions(self, name):
+        """
+        Registered version numbers of a model, ascending
+        """
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return []
+        found = [re.fullmatch(r'v(\d+)', entry) for entry in os.listdir(directory)]
+        return sorted(int(match.group(1)) for match in found
+                      if match and os.path.exists(os.path.join(directory, match.group(0), METADATA_FILE)))
+
+    def version_dir(self, name, version):
+        return os.path.join(self.root, name, f'v{version:04d}')
+
+    def register(self, name, model, features, target, train_data, metrics, params=None, predictions=None,
+                 tables=None, evaluation=None):
+        """
+        Store a trained model as a new version
+
+        Args:
+            name: Model name, e.g. 'rf_neoplasms'
+            model: Fitted estimator
+            features: Feature column names, in training order
+            target: Target column name (or list of names)
+            train_data: DataFrame the model was trained and evaluated on (hashed)
+            metrics: Dictionary of evaluation metrics
+            params: Optional training parameters to record
+            predictions: Optional DataFrame of test-set predictions
+            tables: Optional dictionary of extra DataFrames stored with the model
+                (e.g. per-target metrics and importances)
+            evaluation: Optional description of how the metrics were obtained
+                (split, tuning cross-validation)
+
+        Returns:
+            Metadata dictionary of the new version, or of the latest version
+            when it was trained on the same data with the same parameters
+        """
+        params = params if params is not None else model.get_params()
+        latest = self.metadata(name)
+        if latest is not None and latest['data_hash'] == data_hash(train_data) \
+                and latest['features'] == list(features) and latest['target'] == target \
+                and latest['params'] == json.loads(json.dumps(params, default=str)) \
+                and self.is_compatible(latest):
+            # Same data, features and parameters: keep the existing version
+            return latest
+
+        version = (self.versions(name) or [0])[-1] + 1
+        directory = self.version_dir(name, version)
+        os.makedirs(directory)
+
+        joblib.dump(model, os.path.join(directory, MODEL_FILE))
+        tables = dict(tables or {})
+        if predictions is not None:
+            tables['predictions'] = predictions
+        for table_name, table in tables.items():
+            table.to_csv(os.path.join(directory, f'{table_name}.csv'), index=False)
+
+        metadata = {
+            'name': name,
+            'version': version,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'estimator': type(model).__name__,
+            'features': list(features),
+            'target': target,
+            'params': params,
+            'tables': sorted(tables),
+            'metrics': {key: float(value) for key, value in metrics.items()},
+            'evaluation': evaluation,
+            'data_hash': data_hash(train_data),
+            'n_rows': len(train_data),
+            'sklearn_version': sklearn.__version__,
+            'numpy_version': np.__version__,
+            'python_version': platform.python_version(),
+        }
+        # The sidecar is written last: a version without it is ignored
+        with open(os.path.join(directory, METADATA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, default=str)
+        return metadata
+
+    def metadata(self, name, version=None):
+        """
+        Metadata of a version (default: latest), or None if nothing is registered
+        """
+        versions = self.versions(name)
+        if not versions:
+            return None
+        version = versions[-1] if version is None else version
+        with open(os.path.join(self.version_dir(name, version), METADATA_FILE), encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def is_compatible(metadata):
+        """
+        Whether a stored model can be unpickled safely by this environment
+
+        scikit-learn keeps its pickles loadable across patch releases, so only
+        the major.minor version has to match.
+        """
+        return _minor_version(metadata.get('sklearn_version')) == _minor_version(sklearn.__version__)
+
+    def load(self, name, version=None):
+        """
+        Load a registered model
+
+        Args:
+            name: Model name
+            version: Version number (default: latest)
+
+        Returns:
+            Tuple (model, metadata)
+
+        Raises:
+            FileNotFoundError: If no version is registered
+            IncompatibleModelError: If the model was trained with another scikit-learn
+                minor version (a patch-level mismatch only warns)
+        """
+        metadata = self.metadata(name, version)
+        if metadata is None:
+            raise FileNotFoundError(f"No registered versions of '{name}' in {self.root}")
+        if not self.is_compatible(metadata):
+            raise IncompatibleModelError(
+                f"{name} v{metadata['version']} was trained with scikit-learn "
+                f"{metadata['sklearn_version']}, running {sklearn.__version__}"
+            )
+        if metadata['sklearn_version'] != sklearn.__version__:
+            warnings.warn(
+                f"{name} v{metadata['version']} was trained with scikit-learn "
+                f"{metadata['sklearn_version']}, loading it with {sklearn.__version__}"
+            )
+        path = os.path.join(self.version_dir(name, metadata['version']), MODEL_FILE)
+        return joblib.load(path), metadata
+
+    def table(self, name, version, table_name):
+        """
+        A table stored with a version, or None
+        """
+        path = os.path.join(self.version_dir(name, version), f'{table_name}.csv')
+        return pd.read_csv(path) if os.path.exists(path) else None
+
+    def predictions(self, name, version):
+        """
+        Stored test-set predictions of a version, or None
+        """
+        return self.table(name, version, 'predictions')
@@ -0,0 +1,142 @@
+"""
+Persistent on-disk store for fitted models
+Each model is keyed by a fingerprint of its inputs and hyperparameters, so a
+re-run only refits series whose inputs changed
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+
+def fingerprint(*parts):
+    """
+    Stable hash of model inputs
+
+    DataFrames are hashed by column names and cell values; anything else is
+    hashed through its sorted JSON representation.
+
+    Args:
+        *parts: DataFrames, dictionaries, lists or scalars
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(json.dumps(list(map(str, part.columns))).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ModelStore:
+    """
+    Directory of serialized models with least-recently-used eviction
+
+    Every entry is one gzip file named after its key. Reads refresh the
+    file's modification time, which is the LRU clock, so several worker
+    processes can share a store without a common index file.
+
+    Args:
+        root: Directory holding the entries
+        serialize: Callable turning a model into a string
+        deserialize: Callable turning that string back into a model
+        max_bytes: Optional total size limit enforced by evict()
+        max_entries: Optional entry count limit enforced by evict()
+    """
+
+    suffix = '.json.gz'
+
+    def __init__(self, root, serialize, deserialize, max_bytes=None, max_entries=None):
+        self.root = root
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, f'{key}{self.suffix}')
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        """
+        Load a model, or None if the key is missing or the entry is unreadable
+        """
+        path = self.path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                model = self.deserialize(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt or incompatible entry: drop it and refit
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return model
+
+    def put(self, key, model):
+        """
+        Save a model atomically so concurrent readers never see partial files
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+                f.write(self.serialize(model))
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def entries(self):
+        """
+        List (path, size, last_used) for every entry, oldest first
+        """
+        entries = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self):
+        """
+        Remove least-recently-used entries until the store fits its limits
+
+        Returns:
+            Number of entries removed
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            over_count = self.max_entries is not None and len(entries) - removed > self.max_entries
+            if not (over_bytes or over_count):
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
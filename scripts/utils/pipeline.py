@@ -0,0 +1,246 @@
+"""
+Incremental, dependency-aware runner for the numbered pipeline scripts
+Stages declare the artifacts they read and write; a stage only re-runs when
+its script or the content of one of its inputs changed since its last run
+"""
+
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step
+
+    Attributes:
+        name: Stage identifier, e.g. '05_integrate_datasets'
+        script: Path of the script to execute
+        inputs: Artifact paths or glob patterns the stage reads
+        outputs: Artifact paths or glob patterns the stage writes
+        args: Extra command-line arguments for the script
+    """
+    name: str
+    script: str
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    args: list = field(default_factory=list)
+
+
+class Pipeline:
+    """
+    Make-like DAG over stages, with content hashes persisted between runs
+
+    A stage depends on the closest earlier stage that writes each of its
+    inputs, so a stage that rewrites its own input in place (03) still
+    orders correctly after the stage that first produced it.
+
+    Args:
+        stages: Stages in their canonical execution order
+        state_file: JSON file storing hashes of the last successful runs
+    """
+
+    def __init__(self, stages, state_file):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = [stage.name for stage in stages]
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+        self.upstream = self._resolve_dependencies()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'stages': {}, 'files': {}}
+
+    def _save_state(self):
+        tmp_path = f'{self.state_file}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_file)
+
+    def _resolve_dependencies(self):
+        upstream = {}
+        for position, name in enumerate(self.order):
+            deps = set()
+            for artifact in self.stages[name].inputs:
+                for earlier in reversed(self.order[:position]):
+                    if artifact in self.stages[earlier].outputs:
+                        deps.add(earlier)
+                        break
+            upstream[name] = deps
+        return upstream
+
+    def _file_hash(self, path):
+        """
+        Content hash of a file, reusing the stored hash while size and mtime match
+        """
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            cached = self.state['files'].get(path)
+        if cached and cached['signature'] == signature:
+            return cached['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        with self._lock:
+            self.state['files'][path] = {'signature': signature, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def artifact_hash(self, pattern):
+        """
+        Combined hash of every file matching an artifact pattern, None if none exist
+        """
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            return None
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(os.path.basename(path).encode())
+            digest.update(self._file_hash(path).encode())
+        return digest.hexdigest()
+
+    def _stage_signature(self, stage):
+        digest = hashlib.sha256(self._file_hash(stage.script).encode())
+        digest.update(json.dumps(stage.args).encode())
+        return digest.hexdigest()
+
+    def why_stale(self, name):
+        """
+        Reason a stage must run, or None when it is up to date
+        """
+        stage = self.stages[name]
+        record = self.state['stages'].get(name)
+        if record is None:
+            return 'never run'
+        if record['signature'] != self._stage_signature(stage):
+            return 'script or arguments changed'
+        for artifact in stage.inputs:
+            if self.artifact_hash(artifact) != record['inputs'].get(artifact):
+                return f'input changed: {os.path.basename(artifact)}'
+        for artifact in stage.outputs:
+            if self.artifact_hash(artifact) is None:
+                return f'output missing: {os.path.basename(artifact)}'
+        return None
+
+    def _record(self, stage):
+        # Hashed after the run so stages that rewrite their inputs in place
+        # are not considered stale on the next invocation
+        record = {
+            'signature': self._stage_signature(stage),
+            'inputs': {artifact: self.artifact_hash(artifact) for artifact in stage.inputs},
+            'outputs': {artifact: self.artifact_hash(artifact) for artifact in stage.outputs},
+            'finished': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with self._lock:
+            self.state['stages'][stage.name] = record
+            self._save_state()
+
+    def select(self, targets=None, with_upstream=True):
+        """
+        Stages needed for the targets (all stages by default), in canonical order
+        """
+        if not targets:
+            return list(self.order)
+        unknown = [t for t in targets if t not in self.stages]
+        if unknown:
+            raise KeyError(f"Unknown stages: {', '.join(unknown)}")
+        if not with_upstream:
+            return [name for name in self.order if name in targets]
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.upstream[name])
+        return [name for name in self.order if name in needed]
+
+    def _execute(self, stage):
+        started = time.monotonic()
+        completed = subprocess.run(
+            [sys.executable, stage.script] + list(stage.args),
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(stage.script))),
+            capture_output=True, text=True
+        )
+        return completed, time.monotonic() - started
+
+    def run(self, targets=None, jobs=1, force=False, dry_run=False, with_upstream=True, log=print):
+        """
+        Run stale stages, executing independent branches concurrently
+
+        Args:
+            targets: Stage names to bring up to date (default: all)
+            jobs: Maximum number of stages running at once
+            force: Run every selected stage even if up to date
+            dry_run: Only report what would run
+            with_upstream: Also bring the targets' upstream stages up to date
+            log: Callable used for progress messages
+
+        Returns:
+            Dictionary mapping stage name to 'ran', 'skipped', 'failed' or 'blocked'
+        """
+        selected = self.select(targets, with_upstream)
+        status = {}
+
+        if dry_run:
+            for name in selected:
+                reason = 'forced' if force else self.why_stale(name)
+                if reason is None and any(status.get(dep) == 'would run' for dep in self.upstream[name]):
+                    reason = 'upstream will run'
+                status[name] = 'would run' if reason else 'up to date'
+                log(f"[{name}] {status[name]}" + (f" ({reason})" if reason else ""))
+            return status
+
+        remaining = list(selected)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            while remaining or running:
+                for name in list(remaining):
+                    deps = self.upstream[name] & set(selected)
+                    if any(status.get(dep) in ('failed', 'blocked') for dep in deps):
+                        status[name] = 'blocked'
+                        remaining.remove(name)
+                        log(f"[{name}] blocked by failed upstream stage")
+                        continue
+                    if not all(dep in status for dep in deps) or len(running) >= jobs:
+                        continue
+                    remaining.remove(name)
+                    reason = 'forced' if force else self.why_stale(name)
+                    if reason is None:
+                        status[name] = 'skipped'
+                        log(f"[{name}] up to date")
+                        continue
+                    log(f"[{name}] running ({reason})")
+                    running[executor.submit(self._execute, self.stages[name])] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    completed, elapsed = future.result()
+                    output = (completed.stdout + completed.stderr).rstrip()
+                    if completed.returncode == 0:
+                        self._record(self.stages[name])
+                        status[name] = 'ran'
+                        log(f"[{name}] done in {elapsed:.1f}s")
+                    else:
+                        status[name] = 'failed'
+                        log(f"[{name}] FAILED (exit {completed.returncode}) after {elapsed:.1f}s")
+                    if output:
+                        log('\n'.join(f"    {line}" for line in output.splitlines()))
+        return status
@@ -0,0 +1,132 @@
+"""
+Precomputed model response surface over a regular feature grid
+The model is evaluated once on every grid node in a single batched predict
+call; afterwards any point inside the grid is answered by multilinear
+interpolation and partial-dependence curves are averages over grid axes.
+Only grid nodes are exact: between nodes the interpolated value can differ
+substantially from the model, so callers that need the model's value must
+evaluate the model itself
+"""
+
+import hashlib
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class ResponseSurface:
+    """
+    Model predictions on the nodes of a regular grid
+
+    Attributes:
+        features: Feature names, one per grid axis
+        axes: List of 1-D arrays of node coordinates (ascending)
+        values: Array with one dimension per axis holding the predictions
+    """
+
+    def __init__(self, features, axes, values):
+        self.features = list(features)
+        self.axes = [np.asarray(axis, dtype=float) for axis in axes]
+        self.values = np.asarray(values, dtype=float)
+        self._corners = np.array(list(itertools.product((0, 1), repeat=len(self.axes))))
+
+    @classmethod
+    def from_model(cls, model, features, axes):
+        """
+        Evaluate a fitted model on every node of the grid
+
+        Args:
+            model: Estimator with predict() taking a DataFrame of `features`
+            features: Feature names, in the model's column order
+            axes: List of 1-D node arrays, one per feature
+
+        Returns:
+            ResponseSurface
+        """
+        mesh = np.meshgrid(*axes, indexing='ij')
+        grid = pd.DataFrame({feature: m.ravel() for feature, m in zip(features, mesh)})
+        values = np.asarray(model.predict(grid)).reshape(mesh[0].shape)
+        return cls(features, axes, values)
+
+    @staticmethod
+    def axes_key(features, axes):
+        digest = hashlib.sha256('\0'.join(features).encode())
+        for axis in axes:
+            digest.update(np.asarray(axis, dtype=float).tobytes())
+        return digest.hexdigest()[:16]
+
+    def save(self, path):
+        np.savez(path, features=np.array(self.features), values=self.values,
+                 **{f'axis_{i}': axis for i, axis in enumerate(self.axes)})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            features = [str(f) for f in data['features']]
+            axes = [data[f'axis_{i}'] for i in range(len(features))]
+            return cls(features, axes, data['values'])
+
+    @classmethod
+    def cached(cls, cache_dir, model, features, axes):
+        """
+        Load the surface for this grid from cache_dir, or build and store it
+
+        cache_dir should be specific to the model version (e.g. its registry
+        directory); the file name is a hash of the features and grid nodes.
+        """
+        path = os.path.join(cache_dir, f'response_surface_{cls.axes_key(features, axes)}.npz')
+        if os.path.exists(path):
+            return cls.load(path)
+        surface = cls.from_model(model, features, axes)
+        try:
+            surface.save(path)
+        except OSError:
+            # Read-only deployments keep the surface in memory only
+            pass
+        return surface
+
+    def _locate(self, point):
+        index, weight = [], []
+        for axis, x in zip(self.axes, point):
+            x = min(max(float(x), axis[0]), axis[-1])
+            i = min(int(np.searchsorted(axis, x, side='right')) - 1, len(axis) - 2)
+            index.append(i)
+            weight.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+        return np.array(index), np.array(weight)
+
+    def predict(self, point):
+        """
+        Multilinear interpolation at one point (values clipped to the grid)
+
+        Args:
+            point: Sequence of feature values in `features` order, or a dict
+
+        Returns:
+            Interpolated prediction
+        """
+        if isinstance(point, dict):
+            point = [point[feature] for feature in self.features]
+        index, weight = self._locate(point)
+        corners = self._corners
+        corner_values = self.values[tuple((index + corners).T)]
+        corner_weights = np.prod(np.where(corners == 1, weight, 1 - weight), axis=1)
+        return float(corner_values @ corner_weights)
+
+    def partial_dependence(self, *features):
+        """
+        Average prediction over all other grid axes
+
+        Args:
+            *features: One or two feature names
+
+        Returns:
+            Tuple (axes of the requested features, array of averaged predictions)
+        """
+        positions = [self.features.index(feature) for feature in features]
+        others = tuple(i for i in range(len(self.axes)) if i not in positions)
+        averaged = self.values.mean(axis=others)
+        if positions != sorted(positions):
+            averaged = averaged.T
+        return [self.axes[i] for i in positions], averaged
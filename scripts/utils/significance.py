@@ -0,0 +1,185 @@
+"""
+Vectorized significance testing for correlation matrices
+Permutation p-values, Benjamini-Hochberg q-values and bootstrap confidence
+intervals for every pair at once: each permutation or resample is a single
+row index applied to all columns simultaneously, and whole batches of them
+are evaluated with one batched matrix product
+"""
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scripts.utils.correlation import correlation_matrix, transform
+
+
+def _group_sizes(X, Y):
+    # stack_groups puts every group's observations first and pads with NaN
+    observed = ~(np.isnan(X).all(axis=2) & np.isnan(Y).all(axis=2))
+    last = observed.shape[1] - np.argmax(observed[:, ::-1], axis=1)
+    return np.where(observed.any(axis=1), last, 0)
+
+
+def _random_indices(rng, n_draws, sizes, n_obs, replace):
+    """
+    Row indices (draw, group, obs) that shuffle or resample each group's
+    observed rows while keeping the padding rows in place
+    """
+    positions = np.arange(n_obs)
+    padding = positions >= sizes[:, np.newaxis]
+    if replace:
+        index = (rng.random((n_draws, len(sizes), n_obs)) * sizes[:, np.newaxis]).astype(np.intp)
+    else:
+        keys = rng.random((n_draws, len(sizes), n_obs))
+        keys[:, padding] = np.inf
+        index = np.argsort(keys, axis=2)
+    return np.where(padding, positions, index)
+
+
+def _batched_r(X, Y, index):
+    """
+    Correlations of X with Y re-indexed by every draw, shape (draw, group, p, q)
+    """
+    n_draws, n_groups = index.shape[:2]
+    Y_draw = np.take_along_axis(Y[np.newaxis], index[..., np.newaxis], axis=2)
+    X_draw = np.broadcast_to(X, (n_draws,) + X.shape)
+    r, _ = correlation_matrix(X_draw.reshape((-1,) + X.shape[1:]), Y_draw.reshape((-1,) + Y.shape[1:]))
+    return r.reshape(n_draws, n_groups, X.shape[2], Y.shape[2])
+
+
+def _permutation_counts(X, Y, r_obs, n_permutations, seed, batch_size):
+    rng = np.random.default_rng(seed)
+    sizes = _group_sizes(X, Y)
+    exceed = np.zeros(r_obs.shape)
+    valid = np.zeros(r_obs.shape)
+    threshold = np.abs(r_obs) - 1e-12
+    for start in range(0, n_permutations, batch_size):
+        n_draws = min(batch_size, n_permutations - start)
+        r = _batched_r(X, Y, _random_indices(rng, n_draws, sizes, X.shape[1], replace=False))
+        finite = np.isfinite(r)
+        exceed += (finite & (np.abs(r) >= threshold)).sum(axis=0)
+        valid += finite.sum(axis=0)
+    return exceed, valid
+
+
+def _split_seeds(seed, n_total, chunks):
+    sizes = [len(part) for part in np.array_split(np.arange(n_total), chunks) if len(part)]
+    return list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+
+def permutation_pvalues(X, Y, r_obs=None, n_permutations=1000, seed=42, workers=1, batch_size=100):
+    """
+    Two-sided permutation p-values for every pair of columns
+
+    Each permutation shuffles the observations of Y within each group and is
+    applied to all Y columns at once, so one batch of permutations costs one
+    batched matrix product for the whole (group, p, q) matrix.
+
+    Args:
+        X: Transformed array (group, obs, p), e.g. from correlation.transform
+        Y: Transformed array (group, obs, q)
+        r_obs: Observed coefficients (computed when omitted)
+        n_permutations: Number of permutations
+        seed: Seed of the random generator
+        workers: Processes sharing the permutations (1 runs in this process)
+        batch_size: Permutations evaluated per matrix product
+
+    Returns:
+        Array (group, p, q) of p-values, (1 + #|r_perm| >= |r_obs|) / (1 + #permutations)
+    """
+    if r_obs is None:
+        r_obs, _ = correlation_matrix(X, Y)
+
+    if workers and workers > 1:
+        jobs = _split_seeds(seed, n_permutations, workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_permutation_counts, X, Y, r_obs, size, child, batch_size)
+                       for child, size in jobs]
+            counts = [future.result() for future in futures]
+        exceed = sum(c[0] for c in counts)
+        valid = sum(c[1] for c in counts)
+    else:
+        exceed, valid = _permutation_counts(X, Y, r_obs, n_permutations, seed, batch_size)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = (exceed + 1) / (valid + 1)
+    p[~np.isfinite(r_obs)] = np.nan
+    return p
+
+
+def fdr_qvalues(p):
+    """
+    Benjamini-Hochberg adjusted q-values over all finite p-values of an array
+    """
+    p = np.asarray(p, dtype=float)
+    q = np.full(p.shape, np.nan)
+    finite = np.isfinite(p)
+    values = p[finite]
+    if values.size == 0:
+        return q
+    order = np.argsort(values)
+    ranked = values[order] * values.size / np.arange(1, values.size + 1)
+    adjusted = np.minimum.accumulate(ranked[::-1])[::-1]
+    out = np.empty_like(values)
+    out[order] = np.minimum(adjusted, 1.0)
+    q[finite] = out
+    return q
+
+
+def _bootstrap_r(X, Y, Z, method, n_resamples, seed, batch_size):
+    rng = np.random.default_rng(seed)
+    sizes = _group_sizes(X, Y)
+
+    def take(A, index):
+        # Rows of every resample, stacked along the group axis
+        return np.take_along_axis(A[np.newaxis], index, axis=2).reshape((-1,) + A.shape[1:])
+
+    draws = []
+    for start in range(0, n_resamples, batch_size):
+        n_draws = min(batch_size, n_resamples - start)
+        index = _random_indices(rng, n_draws, sizes, X.shape[1], replace=True)[..., np.newaxis]
+        Xb, Yb = transform(take(X, index), take(Y, index), take(Z, index) if Z is not None else None, method)
+        r, _ = correlation_matrix(Xb, Yb)
+        draws.append(r.reshape((n_draws, len(sizes)) + r.shape[1:]))
+    return np.concatenate(draws)
+
+
+def bootstrap_intervals(X, Y, Z=None, method='pearson', n_resamples=1000, confidence=0.95,
+                        seed=42, workers=1, batch_size=100):
+    """
+    Percentile bootstrap confidence intervals for every pair of columns
+
+    Rows are resampled with replacement within each group, one index per
+    resample shared by all columns. The method transform (ranks, residuals)
+    is re-applied to every resample.
+
+    Args:
+        X: Raw array (group, obs, p), e.g. from correlation.stack_variables
+        Y: Raw array (group, obs, q)
+        Z: Raw control variables for method 'partial'
+        method: 'pearson', 'spearman' or 'partial'
+        n_resamples: Number of bootstrap resamples
+        confidence: Coverage of the interval
+        seed: Seed of the random generator
+        workers: Processes sharing the resamples
+        batch_size: Resamples evaluated per matrix product
+
+    Returns:
+        Tuple (low, high) of arrays (group, p, q)
+    """
+    if workers and workers > 1:
+        jobs = _split_seeds(seed, n_resamples, workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_bootstrap_r, X, Y, Z, method, size, child, batch_size)
+                       for child, size in jobs]
+            r = np.concatenate([future.result() for future in futures])
+    else:
+        r = _bootstrap_r(X, Y, Z, method, n_resamples, seed, batch_size)
+
+    alpha = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        # Pairs undefined in every resample (constant series) stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanquantile(r, [alpha, 1 - alpha], axis=0)
+    return low, high
@@ -0,0 +1,139 @@
+"""
+Columnar storage for the processed datasets
+Each table is written as Parquet (projection and predicate pushdown), as an
+uncompressed Arrow IPC file (memory-mapped, zero-copy reads) and as CSV for
+humans. Readers fall back to the CSV when no columnar copy exists yet.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+FORMATS = ('parquet', 'arrow', 'csv')
+
+# Narrow integer types for key columns; everything else keeps pandas' dtype
+COLUMN_TYPES = {
+    'Year': pa.int16(),
+}
+
+
+def table_path(directory, name, fmt):
+    return os.path.join(directory, f'{name}.{fmt}')
+
+
+def _to_arrow(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for column, dtype in COLUMN_TYPES.items():
+        if column in table.column_names:
+            index = table.schema.get_field_index(column)
+            table = table.set_column(index, column, pc.cast(table[column], dtype))
+    return table
+
+
+def write_table(df, name, directory, formats=FORMATS):
+    """
+    Write a processed dataset in every requested format
+
+    Args:
+        df: DataFrame to store
+        name: Dataset name without extension (e.g. 'integrated_data_1990_2019')
+        directory: Target directory
+        formats: Subset of FORMATS to write
+
+    Returns:
+        List of written paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    table = _to_arrow(df)
+    paths = []
+    for fmt in formats:
+        path = table_path(directory, name, fmt)
+        if fmt == 'parquet':
+            pq.write_table(table, path, compression='zstd')
+        elif fmt == 'arrow':
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        elif fmt == 'csv':
+            df.to_csv(path, index=False)
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+        paths.append(path)
+    return paths
+
+
+def table_columns(name, directory):
+    """
+    Column names of a stored dataset, read from metadata only
+    """
+    arrow_path = table_path(directory, name, 'arrow')
+    parquet_path = table_path(directory, name, 'parquet')
+    if os.path.exists(arrow_path):
+        with pa.memory_map(arrow_path) as source:
+            return pa.ipc.open_file(source).schema.names
+    if os.path.exists(parquet_path):
+        return pq.read_schema(parquet_path).names
+    return list(pd.read_csv(table_path(directory, name, 'csv'), nrows=0).columns)
+
+
+def read_table(name, directory, columns=None, filters=None, memory_map=False):
+    """
+    Read a processed dataset, loading only the requested columns and rows
+
+    Args:
+        name: Dataset name without extension
+        directory: Directory holding the dataset
+        columns: Optional list of columns to load
+        filters: Optional pyarrow filters in DNF form, e.g.
+            [('Year', '>=', 2000), ('Country/Territory', 'in', ['Spain'])]
+        memory_map: Prefer the memory-mapped Arrow IPC copy (fastest cold
+            start for long-running readers such as the dashboard)
+
+    Returns:
+        DataFrame
+    """
+    arrow_path = table_path(directory, name, 'arrow')
+    parquet_path = table_path(directory, name, 'parquet')
+    expression = pq.filters_to_expression(filters) if filters else None
+
+    if memory_map and os.path.exists(arrow_path):
+        with pa.memory_map(arrow_path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        if expression is not None:
+            table = table.filter(expression)
+    elif os.path.exists(parquet_path):
+        table = pq.read_table(parquet_path, columns=columns, filters=filters, memory_map=True)
+    else:
+        csv_path = table_path(directory, name, 'csv')
+        convert = pa_csv.ConvertOptions(include_columns=columns)
+        table = pa_csv.read_csv(csv_path, convert_options=convert)
+        if expression is not None:
+            table = table.filter(expression)
+
+    return table.to_pandas()
+
+
+def convert_csv(name, directory, formats=('parquet', 'arrow')):
+    """
+    Create the columnar copies of an existing CSV dataset
+    """
+    df = pd.read_csv(table_path(directory, name, 'csv'))
+    return write_table(df, name, directory, formats=formats)
+
+
+if __name__ == '__main__':
+    import sys
+
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.append(BASE_DIR)
+    from scripts.utils.config import PROCESSED_DATA_DIR
+
+    for filename in sorted(os.listdir(PROCESSED_DATA_DIR)):
+        if filename.endswith('.csv'):
+            for path in convert_csv(filename[:-4], PROCESSED_DATA_DIR):
+                print(f"Guardado: {path}")
@@ -0,0 +1,175 @@
+"""
+Random forest hyperparameter search with country-grouped cross-validation
+Configurations are evaluated with successive halving (the number of trees is
+the budget that grows between rungs), every (configuration, fold) fit runs in
+a process pool, and each configuration's fold scores are cached on disk so an
+interrupted search resumes where it stopped
+"""
+
+import itertools
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import GroupKFold
+
+from scripts.utils.model_store import ModelStore, fingerprint
+
+SEARCH_SPACE = {
+    'max_depth': [5, 10, 20, None],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': [1.0, 0.6, 'sqrt'],
+}
+
+_data = {}
+
+
+def candidate_configs(space=SEARCH_SPACE, n_candidates=None, seed=42):
+    """
+    Grid of configurations, optionally a random subset of n_candidates
+    """
+    names = sorted(space)
+    configs = [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    if n_candidates is not None and n_candidates < len(configs):
+        rng = np.random.default_rng(seed)
+        configs = [configs[i] for i in sorted(rng.choice(len(configs), n_candidates, replace=False))]
+    return configs
+
+
+def halving_schedule(n_configs, min_trees, max_trees, factor):
+    """
+    List of (n_configs, n_estimators) per rung
+
+    The number of trees is multiplied and the number of surviving
+    configurations divided by `factor` until one configuration is left or
+    the maximum number of trees is reached.
+    """
+    rungs = []
+    trees = min_trees
+    while True:
+        rungs.append((n_configs, trees))
+        if n_configs <= 1 or trees >= max_trees:
+            return rungs
+        n_configs = max(1, math.ceil(n_configs / factor))
+        trees = min(max_trees, trees * factor)
+
+
+def _init_worker(X, y, folds):
+    _data.update(X=X, y=y, folds=folds)
+
+
+def _fit_fold(config, n_estimators, fold, seed):
+    train_idx, test_idx = _data['folds'][fold]
+    X, y = _data['X'], _data['y']
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=seed, n_jobs=1, **config)
+    model.fit(X[train_idx], y[train_idx])
+    pred = model.predict(X[test_idx])
+    return r2_score(y[test_idx], pred), float(np.sqrt(mean_squared_error(y[test_idx], pred)))
+
+
+def tuning_store(root):
+    """
+    ModelStore holding the fold scores of each evaluated configuration
+    """
+    return ModelStore(root, json.dumps, json.loads)
+
+
+def successive_halving(X, y, groups, configs=None, n_splits=5, min_trees=25, max_trees=400,
+                       factor=3, workers=1, store=None, seed=42, log=print):
+    """
+    Successive-halving search over random forest configurations
+
+    Args:
+        X: Feature array (n_samples, n_features)
+        y: Target array (n_samples,)
+        groups: Group label per sample (country); a group never spans folds
+        configs: List of RandomForestRegressor parameter dicts (default: full grid)
+        n_splits: Number of GroupKFold folds
+        min_trees: Trees per forest in the first rung
+        max_trees: Maximum trees per forest
+        factor: Halving factor
+        workers: Processes fitting folds in parallel
+        store: Optional tuning_store for resumable results
+        seed: Random state of the forests
+        log: Callable used for progress messages
+
+    Returns:
+        DataFrame with one row per evaluated (configuration, rung), best first
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    configs = list(configs or candidate_configs())
+    folds = list(GroupKFold(n_splits=n_splits).split(X, y, groups))
+    data_key = fingerprint(pd.DataFrame(X), pd.Series(y).to_frame(), list(map(str, groups)), n_splits, seed)
+
+    executor = None
+    if workers and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, folds))
+    else:
+        _init_worker(X, y, folds)
+
+    rows = []
+    survivors = configs
+    try:
+        for rung, (_, n_estimators) in enumerate(halving_schedule(len(configs), min_trees, max_trees, factor)):
+            scores = {}
+            pending = []
+            for i, config in enumerate(survivors):
+                key = fingerprint(data_key, config, n_estimators)
+                cached = store.get(key) if store is not None else None
+                if cached is not None:
+                    scores[i] = cached
+                else:
+                    pending.append((i, key))
+
+            log(f"Ronda {rung + 1}: {len(survivors)} configuraciones x {n_estimators} árboles "
+                f"({len(survivors) - len(pending)} en caché)")
+
+            # Each configuration is stored as soon as its last fold finishes, so an
+            # interrupted rung keeps every configuration already completed
+            keys = dict(pending)
+            fold_scores = {i: [None] * n_splits for i in keys}
+            remaining = {i: n_splits for i in keys}
+
+            def record(i, fold, result):
+                fold_scores[i][fold] = result
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    scores[i] = {'r2': [s[0] for s in fold_scores[i]], 'rmse': [s[1] for s in fold_scores[i]]}
+                    if store is not None:
+                        store.put(keys[i], scores[i])
+
+            tasks = [(i, fold) for i in keys for fold in range(n_splits)]
+            if executor is not None:
+                futures = {executor.submit(_fit_fold, survivors[i], n_estimators, fold, seed): (i, fold)
+                           for i, fold in tasks}
+                for future in as_completed(futures):
+                    record(*futures[future], future.result())
+            else:
+                for i, fold in tasks:
+                    record(i, fold, _fit_fold(survivors[i], n_estimators, fold, seed))
+
+            for i, config in enumerate(survivors):
+                rows.append({
+                    'rung': rung + 1,
+                    'n_estimators': n_estimators,
+                    **{name: config.get(name) for name in sorted(config)},
+                    'r2_mean': float(np.mean(scores[i]['r2'])),
+                    'r2_std': float(np.std(scores[i]['r2'])),
+                    'rmse_mean': float(np.mean(scores[i]['rmse'])),
+                    'config': json.dumps(config, sort_keys=True),
+                })
+
+            ranked = sorted(range(len(survivors)), key=lambda i: -np.mean(scores[i]['r2']))
+            keep = max(1, math.ceil(len(survivors) / factor))
+            survivors = [survivors[i] for i in ranked[:keep]]
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    results = pd.DataFrame(rows)
+    return results.sort_values(['rung', 'r2_mean'], ascending=[False, False]).reset_index(drop=True)
@@ -0,0 +1,186 @@
+"""
+Area-weighted country aggregation of gridded ERA5 fields
+A sparse country x grid-cell weight matrix is built once and cached, then
+every variable and time step is reduced with one sparse matrix product
+"""
+
+import contextlib
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from scripts.utils.countries import polygon_name
+
+TIME_DIM = 'valid_time'
+
+try:
+    import dask
+except ImportError:
+    dask = None
+
+
+def load_country_polygons(path, countries, name_columns=('NAME', 'NAME_LONG', 'ADMIN')):
+    """
+    Read country polygons (e.g. Natural Earth admin-0) for the given countries
+
+    Args:
+        path: Any file geopandas can read (shapefile, zip, GeoPackage, GeoJSON)
+        countries: Country names as used in the project
+        name_columns: Attribute columns searched for each name
+
+    Returns:
+        Dictionary mapping country to shapely geometry in lon/lat degrees
+    """
+    import geopandas as gpd
+
+    gdf = gpd.read_file(path).to_crs(epsg=4326)
+    columns = [col for col in name_columns if col in gdf.columns]
+    polygons = {}
+    for country in countries:
+        names = {country, polygon_name(country)}
+        match = gdf[gdf[columns].isin(names).any(axis=1)]
+        if match.empty:
+            raise KeyError(f"No polygon found for {country} in {os.path.basename(path)}")
+        polygons[country] = match.geometry.union_all()
+    return polygons
+
+
+def build_weight_matrix(geometries, lats, lons):
+    """
+    Sparse matrix of normalised cos(latitude) weights of the cells inside each geometry
+
+    A cell belongs to a geometry when its centre does. Geometries too small
+    to contain any cell centre (small islands) fall back to the cell nearest
+    to an interior point.
+
+    Args:
+        geometries: List of shapely geometries in lon/lat degrees
+        lats: Array (n_lat,) of grid latitudes
+        lons: Array (n_lon,) of grid longitudes, 0..360 or -180..180
+
+    Returns:
+        CSR matrix (n_geometries, n_lat * n_lon) whose rows sum to 1, with
+        cells flattened in (latitude, longitude) order
+    """
+    import shapely
+
+    lats = np.asarray(lats, dtype=float)
+    lon180 = (np.asarray(lons, dtype=float) + 180) % 360 - 180
+    n_lon = len(lon180)
+    cell_area = np.cos(np.deg2rad(lats))
+
+    rows, cols, vals = [], [], []
+    for row, geom in enumerate(geometries):
+        shapely.prepare(geom)
+        minx, miny, maxx, maxy = geom.bounds
+        lat_idx = np.flatnonzero((lats >= miny) & (lats <= maxy))
+        lon_idx = np.flatnonzero((lon180 >= minx) & (lon180 <= maxx))
+        ii, jj = np.meshgrid(lat_idx, lon_idx, indexing='ij')
+        inside = shapely.contains_xy(geom, lon180[jj], lats[ii])
+        ii, jj = ii[inside], jj[inside]
+
+        if ii.size == 0:
+            point = geom.representative_point()
+            ii = np.array([np.abs(lats - point.y).argmin()])
+            jj = np.array([np.abs((lon180 - point.x + 180) % 360 - 180).argmin()])
+
+        weights = cell_area[ii]
+        rows.append(np.full(ii.size, row))
+        cols.append(ii * n_lon + jj)
+        vals.append(weights / weights.sum())
+
+    return sparse.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(len(geometries), len(lats) * n_lon)
+    )
+
+
+def _weights_key(countries, geometries, lats, lons):
+    digest = hashlib.sha256()
+    digest.update('\0'.join(countries).encode())
+    for geom in geometries:
+        digest.update(geom.wkb)
+    digest.update(np.asarray(lats, dtype=float).tobytes())
+    digest.update(np.asarray(lons, dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def load_or_build_weights(cache_dir, polygons, lats, lons):
+    """
+    Country weight matrix for a grid, read from cache_dir when already built
+
+    The cache file name is a hash of the countries, their geometries and the
+    grid coordinates, so a new grid or new polygons build a new matrix.
+
+    Args:
+        cache_dir: Directory for cached matrices
+        polygons: Dictionary mapping country to geometry
+        lats: Grid latitudes
+        lons: Grid longitudes
+
+    Returns:
+        Tuple (countries, weights CSR matrix)
+    """
+    countries = list(polygons)
+    geometries = [polygons[c] for c in countries]
+    path = os.path.join(cache_dir, f'zonal_weights_{_weights_key(countries, geometries, lats, lons)}.npz')
+
+    if os.path.exists(path):
+        return countries, sparse.load_npz(path).tocsr()
+
+    weights = build_weight_matrix(geometries, lats, lons)
+    os.makedirs(cache_dir, exist_ok=True)
+    sparse.save_npz(path, weights)
+    return countries, weights
+
+
+def aggregate_countries(ds, countries, weights, variables=None, time_chunk=12, workers=None):
+    """
+    Area-weighted country means of every variable and time step
+
+    Reads `time_chunk` time steps of every variable at a time, so memory
+    stays bounded when the dataset is opened lazily; the variables of a
+    block are read and decoded concurrently by `workers` dask threads.
+
+    Args:
+        ds: Dataset with (valid_time, latitude, longitude) variables
+        countries: Row labels of the weight matrix
+        weights: CSR matrix from build_weight_matrix
+        variables: Variables to aggregate (default: all data variables)
+        time_chunk: Time steps read per block
+        workers: Number of dask threads reading each block
+
+    Returns:
+        DataFrame with valid_time, Country/Territory and one column per variable
+    """
+    variables = list(variables or ds.data_vars)
+    n_time = ds.sizes[TIME_DIM]
+    n_cells = ds.sizes['latitude'] * ds.sizes['longitude']
+
+    columns = {
+        TIME_DIM: np.repeat(ds[TIME_DIM].values, len(countries)),
+        'Country/Territory': np.tile(countries, n_time)
+    }
+    for var in variables:
+        if set(ds[var].dims) != {TIME_DIM, 'latitude', 'longitude'}:
+            raise ValueError(f"{var} has dimensions {ds[var].dims}, expected time/latitude/longitude")
+    out = {var: np.empty((n_time, len(countries))) for var in variables}
+
+    scheduler = contextlib.nullcontext()
+    if dask is not None:
+        scheduler = dask.config.set(scheduler='threads', num_workers=workers)
+    with scheduler:
+        for start in range(0, n_time, time_chunk):
+            # All variables of the block in one compute, read concurrently
+            block = ds[variables].isel({TIME_DIM: slice(start, start + time_chunk)}).load()
+            for var in variables:
+                values = block[var].transpose(TIME_DIM, 'latitude', 'longitude').values
+                values = np.asarray(values, dtype=float).reshape(-1, n_cells)
+                out[var][start:start + len(values)] = (weights @ values.T).T
+    for var in variables:
+        columns[var] = out[var].ravel()
+
+    return pd.DataFrame(columns)
@@ -1,6 +1,6 @@
 import os
 
-PROJECT_DIR = r'c:\Users\Luis\Desktop\global-weather-analysis'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 EXTERNAL_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'external')
 
 nc_file = os.path.join(EXTERNAL_DATA_DIR, 'era5_climate_data_1990_2019.nc')